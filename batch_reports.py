@@ -0,0 +1,145 @@
+import time
+
+# Taken before the other imports, so the reported startup includes them
+STARTED = time.perf_counter()
+
+import argparse
+import os
+import sys
+from collections import Counter
+
+from pick_route import layout_for_cells
+from scan_io import COLUMNAR_EXTENSIONS, is_columnar_file, is_scan_file, is_zip_file, write_table
+from sku_styles import EXPORT_HEADERS as STYLE_DUPLICATE_HEADERS
+from consolidation import EXPORT_HEADERS as MOVE_HEADERS
+from warehouse_core import DUPLICATE_HEADERS, EMPTY_BINS_HEADERS, WarehouseData
+
+IMPORTED = time.perf_counter()
+
+# Report name -> (headers, rows of a loaded dataset); the same reports the
+# apps' export buttons write
+REPORTS = {
+    "duplicates": (DUPLICATE_HEADERS, lambda data: data.duplicate_skus_rows()),
+    "empty_bins": (EMPTY_BINS_HEADERS, lambda data: data.empty_bins_rows()),
+    "style_duplicates": (STYLE_DUPLICATE_HEADERS, lambda data: data.style_index().export_duplicate_rows()),
+    "consolidation": (MOVE_HEADERS, lambda data: data.consolidation_plan(layout_for_cells(
+        {(column, row) for column in data.grid_data for row in data.grid_data[column]})).export_rows()),
+}
+DEFAULT_REPORTS = ["duplicates", "empty_bins"]
+
+OUTPUT_FORMATS = ("csv", "csv.gz", "parquet", "feather")
+
+# Extensions stripped from a snapshot's file name to name its reports
+SNAPSHOT_EXTENSIONS = ('.gz', '.bz2', '.xz', '.lzma', '.csv', '.zip') + COLUMNAR_EXTENSIONS
+
+# Modules this tool must never load; listed by --timings as a check
+UI_MODULES = ("tkinter", "streamlit", "plotly")
+
+
+def snapshot_files(folder):
+    """Return the scan files, archives and columnar files in a folder, each one a snapshot"""
+    return [os.path.join(folder, entry) for entry in sorted(os.listdir(folder))
+            if os.path.isfile(os.path.join(folder, entry))
+            and (is_scan_file(entry) or is_zip_file(entry) or is_columnar_file(entry))]
+
+
+def snapshot_name(path):
+    """Return a file name without its scan, compression or archive extensions, e.g. day1 for day1.csv.zip"""
+    name = os.path.basename(os.path.normpath(path))
+    while True:
+        ext = next((ext for ext in SNAPSHOT_EXTENSIONS if name.lower().endswith(ext) and len(name) > len(ext)), None)
+        if ext is None:
+            return name
+        name = name[:-len(ext)]
+
+
+def report_names(snapshots):
+    """Return the name each snapshot's reports start with
+
+    Snapshots whose names collide without extensions (day1.csv and
+    day1.csv.gz) keep their full file names. Raises ValueError when names
+    still collide, e.g. same-named folders in different places.
+    """
+    names = [snapshot_name(source) for source in snapshots]
+    counts = Counter(names)
+    names = [os.path.basename(os.path.normpath(source)) if counts[name] > 1 else name
+             for source, name in zip(snapshots, names)]
+    clashes = sorted(name for name, count in Counter(names).items() if count > 1)
+    if clashes:
+        raise ValueError(f"several snapshots would write reports named {', '.join(clashes)}_*; "
+                         f"rename them or run them with separate --output-dir folders")
+    return names
+
+
+def write_reports(source, name, reports, output_dir, output_format, timings=False):
+    """Load one snapshot and write each report, named <name>_<report>, next to the others in output_dir"""
+    start = time.perf_counter()
+    data = WarehouseData().load(source)
+    loaded = time.perf_counter()
+    print(f"{source}: {len(data.csv_data)} rows, {len(data.duplicate_skus)} duplicate SKUs, "
+          f"{len(data.empty_bins_locations)} cells with empty bins"
+          + (f" (loaded in {loaded - start:.2f}s)" if timings else ""))
+
+    for report in reports:
+        headers, rows_of = REPORTS[report]
+        report_start = time.perf_counter()
+        rows = rows_of(data)
+        output = os.path.join(output_dir, f"{name}_{report}.{output_format}")
+        write_table(output, headers, rows)
+        print(f"  {report}: {len(rows)} rows to {output}"
+              + (f" in {time.perf_counter() - report_start:.2f}s" if timings else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write duplicate SKU, empty bin and other reports for scan "
+                                                 "files without starting either app")
+    parser.add_argument("sources", nargs="+",
+                        help="Scan files, archives or columnar files; a folder is a set of snapshots, one report "
+                             "set per file")
+    parser.add_argument("--reports", nargs="+", choices=sorted(REPORTS) + ["all"], default=DEFAULT_REPORTS,
+                        help="Reports to write (default: duplicates empty_bins)")
+    parser.add_argument("--output-dir", default=".", help="Folder for the reports, named <snapshot>_<report>.<format>")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", dest="output_format",
+                        help="Report file format")
+    parser.add_argument("--merge", action="store_true",
+                        help="Load each folder as one dataset, as the apps do, instead of one per file")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print the startup, load and report times and check no UI module was imported")
+    args = parser.parse_args(argv)
+
+    reports = sorted(REPORTS) if "all" in args.reports else args.reports
+    snapshots = []
+    for source in args.sources:
+        if os.path.isdir(source) and not args.merge:
+            snapshots.extend(snapshot_files(source))
+        else:
+            snapshots.append(source)
+
+    try:
+        names = report_names(snapshots)
+    except ValueError as e:
+        print(f"Not writing reports: {e}", file=sys.stderr)
+        return 1
+
+    if args.timings:
+        print(f"Startup: {(IMPORTED - STARTED) * 1000:.0f} ms importing, "
+              f"{(time.perf_counter() - STARTED) * 1000:.0f} ms to first load")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for source, name in zip(snapshots, names):
+        try:
+            write_reports(source, name, reports, args.output_dir, args.output_format, args.timings)
+        except Exception as e:
+            print(f"{source}: failed: {e}", file=sys.stderr)
+            failed += 1
+
+    if args.timings:
+        loaded_ui = [name for name in UI_MODULES if name in sys.modules]
+        print(f"Total: {time.perf_counter() - STARTED:.2f}s for {len(snapshots)} snapshots; "
+              f"UI modules imported: {', '.join(loaded_ui) or 'none'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
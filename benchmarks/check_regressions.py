@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from run_benchmarks import DEFAULT_DATA_DIR, DEFAULT_REPEAT, run_suite
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Allowed slowdown and peak memory growth as fractions of the baseline,
+# used for benchmarks without their own entry in the baseline's tolerances
+DEFAULT_TOLERANCES = {"time": 0.5, "memory": 0.25}
+
+# Differences below these are noise however large the ratio, which matters
+# for sub-millisecond benchmarks
+MIN_TIME_DELTA = 0.001
+MIN_MEMORY_DELTA = 1_000_000
+
+# A suspected time regression is measured again with this many repetitions
+# before it fails the check
+DEFAULT_CONFIRM_REPEAT = 10
+
+PASSED = "ok"
+FASTER = "faster"
+REGRESSED = "REGRESSED"
+MISSING = "missing"
+NEW = "new"
+SKIPPED = "skipped"
+
+
+def load_json(file_path):
+    with open(file_path) as infile:
+        return json.load(infile)
+
+
+def tolerances_for(baseline, name):
+    """Return the {"time", "memory"} tolerances of a benchmark in a baseline file"""
+    tolerances = dict(DEFAULT_TOLERANCES)
+    configured = baseline.get("tolerances", {})
+    tolerances.update(configured.get("default", {}))
+    tolerances.update(configured.get(name, {}))
+    return tolerances
+
+
+def compare_result(base, current, tolerances):
+    """Return (status, time ratio, memory ratio) of one benchmark against its baseline"""
+    if current is None:
+        return MISSING, None, None
+    if "skipped" in base or "skipped" in current:
+        return SKIPPED, None, None
+
+    time_ratio = current["median"] / base["median"] if base["median"] else None
+    memory_ratio = current["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else None
+
+    slower = (current["median"] > base["median"] * (1 + tolerances["time"])
+              and current["median"] - base["median"] > MIN_TIME_DELTA)
+    bigger = (current["peak_bytes"] > base["peak_bytes"] * (1 + tolerances["memory"])
+              and current["peak_bytes"] - base["peak_bytes"] > MIN_MEMORY_DELTA)
+    if slower or bigger:
+        return REGRESSED, time_ratio, memory_ratio
+    if time_ratio is not None and time_ratio < 1 / (1 + tolerances["time"]):
+        return FASTER, time_ratio, memory_ratio
+    return PASSED, time_ratio, memory_ratio
+
+
+def compare(baseline, current):
+    """Return [(key, base, current, status, time ratio, memory ratio)] for every benchmark in either run"""
+    base_results = baseline["results"]
+    current_results = current["results"]
+    rows = []
+    for key, base in base_results.items():
+        status, time_ratio, memory_ratio = compare_result(base, current_results.get(key),
+                                                          tolerances_for(baseline, base["benchmark"]))
+        rows.append((key, base, current_results.get(key), status, time_ratio, memory_ratio))
+    for key, result in current_results.items():
+        if key not in base_results:
+            rows.append((key, None, result, NEW, None, None))
+    return rows
+
+
+def format_delta(ratio):
+    return f"{(ratio - 1) * 100:+.0f}%" if ratio is not None else ""
+
+
+def format_table(rows):
+    """Return the comparison as a text table of medians, peak memory and their deltas"""
+    def millis(result):
+        return f"{result['median'] * 1000:.2f}" if result and "median" in result else "-"
+
+    def megabytes(result):
+        return f"{result['peak_bytes'] / 1e6:.1f}" if result and "peak_bytes" in result else "-"
+
+    lines = [f"{'Benchmark':<36}{'Base ms':>11}{'Now ms':>11}{'Time':>8}"
+             f"{'Base MB':>10}{'Now MB':>10}{'Memory':>8}  Status"]
+    for key, base, current, status, time_ratio, memory_ratio in rows:
+        lines.append(f"{key:<36}{millis(base):>11}{millis(current):>11}{format_delta(time_ratio):>8}"
+                     f"{megabytes(base):>10}{megabytes(current):>10}{format_delta(memory_ratio):>8}  {status}")
+    return "\n".join(lines)
+
+
+def confirm_regressions(baseline, current, rows, repeat, data_dir):
+    """Measure suspected regressions again with more repetitions and keep the new results"""
+    suspects = {key: base for key, base, _, status, _, _ in rows if status == REGRESSED}
+    if not suspects:
+        return rows
+
+    print(f"Re-measuring {len(suspects)} suspected regressions with {repeat} repetitions...")
+    names = {base["benchmark"] for base in suspects.values()}
+    datasets = {base["dataset"] for base in suspects.values()}
+    sizes = [size for size in baseline.get("sizes", []) if size in datasets]
+    scan_files = [path for path in baseline.get("scan_files", []) if os.path.basename(path) in datasets]
+    rerun = run_suite(sizes, repeat, names, data_dir, scan_files, progress=lambda message: None)
+    for key in suspects:
+        if key in rerun["results"]:
+            current["results"][key] = rerun["results"][key]
+    return compare(baseline, current)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare benchmark results against a committed baseline "
+                                                 "and exit non-zero on regressions")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON")
+    parser.add_argument("--results", help="Compare this results JSON instead of running the benchmarks")
+    parser.add_argument("--repeat", type=int, help="Timed repetitions (default: the baseline's)")
+    parser.add_argument("--confirm-repeat", type=int, default=DEFAULT_CONFIRM_REPEAT,
+                        help="Repetitions when re-measuring a suspected regression (0 to fail at once)")
+    parser.add_argument("--only", nargs="*", help="Check only these benchmarks")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Folder for generated datasets")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Run the benchmarks and store the results as the new baseline, keeping its tolerances")
+    parser.add_argument("--sizes", nargs="*", help="Dataset sizes for --update-baseline (default: the baseline's)")
+    args = parser.parse_args(argv)
+
+    baseline = load_json(args.baseline) if os.path.exists(args.baseline) else {"results": {}}
+    sizes = args.sizes or baseline.get("sizes") or ["10k"]
+    repeat = args.repeat or baseline.get("repeat") or DEFAULT_REPEAT
+
+    if args.update_baseline:
+        report = run_suite(sizes, repeat, args.only, args.data_dir, baseline.get("scan_files", []))
+        report["tolerances"] = baseline.get("tolerances", {"default": DEFAULT_TOLERANCES})
+        with open(args.baseline, "w") as outfile:
+            json.dump(report, outfile, indent=2)
+        print(f"Wrote {len(report['results'])} baseline results to {args.baseline}")
+        return 0
+
+    if not baseline["results"]:
+        parser.error(f"no baseline at {args.baseline}, create one with --update-baseline")
+
+    if args.only:
+        baseline["results"] = {key: result for key, result in baseline["results"].items()
+                               if result["benchmark"] in args.only}
+
+    if args.results:
+        current = load_json(args.results)
+    else:
+        current = run_suite(sizes, repeat, args.only, args.data_dir, baseline.get("scan_files", []))
+
+    rows = compare(baseline, current)
+    if not args.results and args.confirm_repeat:
+        rows = confirm_regressions(baseline, current, rows, args.confirm_repeat, args.data_dir)
+
+    print()
+    print(f"Baseline {(baseline.get('commit') or '')[:12]} ({baseline.get('created', '?')}) "
+          f"vs {(current.get('commit') or 'current')[:12]}")
+    print(format_table(rows))
+
+    regressions = [key for key, _, _, status, _, _ in rows if status == REGRESSED]
+    if regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
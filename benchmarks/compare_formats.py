@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Allow running as "python benchmarks/compare_formats.py" from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_io import iter_scan_readers, read_scan_frame, write_table
+
+
+def load_pairs(file_path):
+    """Load (sku, location) pairs the same way the visualizers do"""
+    pairs = []
+    for file_name, reader in iter_scan_readers(file_path):
+        headers = [header.lower() for header in next(reader)]
+        sku_idx = headers.index("garment_sku")
+        location_idx = headers.index("location_id")
+        for row in reader:
+            pairs.append((row[sku_idx], row[location_idx]))
+    return pairs
+
+
+def best_time(func, repeat):
+    """Return the fastest of several timed calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def compare_formats(csv_file, repeat=3, output_dir=None):
+    """Convert a scan CSV to columnar formats and compare size and load time"""
+    import pandas as pd
+
+    # Convert once through the same writer the exporters use
+    headers, rows = None, []
+    for file_name, reader in iter_scan_readers(csv_file):
+        headers = next(reader)
+        rows.extend(reader)
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        paths = {"csv": csv_file}
+        for extension in ("parquet", "feather"):
+            paths[extension] = os.path.join(tmp_dir, f"scans.{extension}")
+            write_table(paths[extension], headers, rows)
+
+        for name, path in paths.items():
+            if name == "csv":
+                frame_loader = lambda: pd.read_csv(path, dtype=str, keep_default_na=False)
+            else:
+                frame_loader = lambda: read_scan_frame(path)
+            results.append({
+                "format": name,
+                "size_bytes": os.path.getsize(path),
+                "app_load_seconds": best_time(lambda: load_pairs(path), repeat),
+                "pandas_load_seconds": best_time(frame_loader, repeat),
+            })
+
+    return len(rows), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CSV against Parquet and Arrow IPC scan files")
+    parser.add_argument("csv_file", help="Scan CSV file to convert and compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per format")
+    args = parser.parse_args(argv)
+
+    row_count, results = compare_formats(args.csv_file, repeat=args.repeat)
+    print(f"{row_count} rows from {args.csv_file}")
+    print(f"{'Format':<10}{'Size (KB)':>12}{'App load (s)':>15}{'pandas load (s)':>18}")
+    for result in results:
+        print(f"{result['format']:<10}{result['size_bytes'] / 1024:>12.1f}"
+              f"{result['app_load_seconds']:>15.3f}{result['pandas_load_seconds']:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import itertools
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Allow running as "python benchmarks/generate_scans.py" from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_io import write_table
+
+SCAN_HEADERS = ["match_date_time", "garment_sku", "location_id"]
+
+# Aisles of each level and the rows of an aisle, as laid out in the visualizers' grid
+LEVEL_AISLES = {
+    '1': string.ascii_uppercase,
+    '2': string.ascii_uppercase[:19],
+    '3': string.ascii_uppercase.replace('O', ''),
+}
+ROW_COUNT = 90
+
+# Slots of a bin side with their relative frequency in real scans; the
+# rare NS side has its own slots
+SIDE_SLOTS = {
+    'N': [(f"{bay}T{n}", 5) for bay in "ABCD" for n in "123"]
+         + [(f"{bay}D{n}", 4) for bay in "ABCD" for n in "12"]
+         + [(f"{bay}O1", 2) for bay in "ABCD"] + [("AB1", 0.3)],
+    'NS': [(f"{bay}0", 1) for bay in "ABCD"],
+}
+SIDE_SLOTS['S'] = SIDE_SLOTS['N']
+SIDE_WEIGHTS = {'N': 49.5, 'S': 49.5, 'NS': 1}
+
+# Sizes with their relative frequency in real scans; a SKU is a 7-character
+# style followed by one of these
+SIZE_WEIGHTS = {
+    "XL": 3785, "0L": 1314, "0M": 1299, "0S": 1284, "XS": 618,
+    "2T": 21, "3T": 17, "4T": 21, "6T": 12, "2M": 20, "6M": 19, "8M": 16,
+}
+
+# A tote of one style is scanned into neighbouring slots of one bin side
+TOTE_SIZES = [1, 2, 3, 4, 5]
+TOTE_WEIGHTS = [30, 25, 20, 15, 10]
+
+DEFAULT_EMPTY_RATE = 0.05
+DEFAULT_START = "2025-04-04 08:00:00"
+MAX_SCAN_GAP = 10
+
+STYLE_LETTERS = 26 ** 4
+STYLE_SUFFIXES = 36 ** 3
+SUFFIX_CHARS = string.digits + string.ascii_uppercase
+
+COUNT_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_count(text):
+    """Parse a row count such as 10000, 10k or 1M"""
+    text = str(text).strip()
+    multiplier = COUNT_SUFFIXES.get(text[-1:].lower(), 1)
+    number = text[:-1] if multiplier > 1 else text
+    return int(float(number) * multiplier)
+
+
+def style_name(number):
+    """Return a 7-character style (4 letters, 3 letters/digits) for a catalogue number
+
+    Numbers are spread over the whole name space first, so neighbouring
+    catalogue numbers do not give look-alike styles.
+    """
+    number = (number * 2_654_435_761) % (STYLE_LETTERS * STYLE_SUFFIXES)
+    letters, suffix = divmod(number, STYLE_SUFFIXES)
+    name = []
+    for _ in range(4):
+        letters, digit = divmod(letters, 26)
+        name.append(string.ascii_uppercase[digit])
+    for _ in range(3):
+        suffix, digit = divmod(suffix, 36)
+        name.append(SUFFIX_CHARS[digit])
+    return "".join(name)
+
+
+def bin_sides():
+    """Return every (location prefix, side) a tote can go to, e.g. ("R2E59-N", "N")"""
+    return [(f"R{level}{aisle}{row:02d}-{side}", side)
+            for level, aisles in LEVEL_AISLES.items() for aisle in aisles
+            for row in range(1, ROW_COUNT + 1) for side in SIDE_WEIGHTS]
+
+
+def generate_rows(count, seed=0, empty_rate=DEFAULT_EMPTY_RATE, styles=None, start=DEFAULT_START):
+    """Yield count [match_date_time, garment_sku, location_id] rows in time order
+
+    Rows come in totes: a few sizes of one style scanned into slots of one
+    bin side seconds apart, like real put-away scans. Styles are drawn from
+    a catalogue of styles (default 2 x count) so some turn up in several
+    places, and empty_rate of the rows are empty bin scans (blank or EMPTY).
+    """
+    rng = random.Random(seed)
+    styles = styles or max(10, 2 * count)
+
+    # Cumulative weights, so each draw is a binary search rather than a sum
+    # over every bin side
+    sides = bin_sides()
+    side_weights = list(itertools.accumulate(SIDE_WEIGHTS[side] for _, side in sides))
+    slots = {side: [slot for slot, _ in weighted] for side, weighted in SIDE_SLOTS.items()}
+    slot_weights = {side: list(itertools.accumulate(weight for _, weight in weighted))
+                    for side, weighted in SIDE_SLOTS.items()}
+    sizes = list(SIZE_WEIGHTS)
+    size_weights = list(itertools.accumulate(SIZE_WEIGHTS.values()))
+    tote_weights = list(itertools.accumulate(TOTE_WEIGHTS))
+
+    # An empty scan is one row and a tote several, so pick empty scans per
+    # tote at the rate that makes empty_rate of the rows empty
+    mean_tote = sum(size * weight for size, weight in zip(TOTE_SIZES, TOTE_WEIGHTS)) / sum(TOTE_WEIGHTS)
+    empty_chance = empty_rate * mean_tote / (1 - empty_rate + empty_rate * mean_tote)
+
+    # Timestamps are formatted once per minute and completed with the seconds
+    clock = datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+    seconds = clock.second
+    clock = clock.replace(second=0)
+    minute_text = clock.strftime("%Y-%m-%d %H:%M:")
+
+    produced = 0
+    while produced < count:
+        (prefix, side), = rng.choices(sides, cum_weights=side_weights)
+        if rng.random() < empty_chance:
+            skus = ["EMPTY" if rng.random() < 0.2 else ""]
+        else:
+            style = style_name(rng.randrange(styles))
+            tote = rng.choices(TOTE_SIZES, cum_weights=tote_weights)[0]
+            tote_sizes = set()
+            while len(tote_sizes) < tote:
+                tote_sizes.add(rng.choices(sizes, cum_weights=size_weights)[0])
+            skus = [style + size for size in sorted(tote_sizes)]
+
+        for sku, slot in zip(skus, rng.choices(slots[side], cum_weights=slot_weights[side], k=len(skus))):
+            if produced == count:
+                return
+            seconds += rng.randint(1, MAX_SCAN_GAP)
+            if seconds >= 60:
+                clock += timedelta(minutes=seconds // 60)
+                seconds %= 60
+                minute_text = clock.strftime("%Y-%m-%d %H:%M:")
+            yield [f"{minute_text}{seconds:02d}", sku, f"{prefix}-{slot}"]
+            produced += 1
+
+
+def write_scans(file_path, count, **options):
+    """Write a synthetic scan file; CSV is streamed, columnar formats are built in memory"""
+    write_table(file_path, SCAN_HEADERS, generate_rows(count, **options))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic scan file following the location grammar")
+    parser.add_argument("rows", help="Number of rows, e.g. 10k, 1M or 10M")
+    parser.add_argument("output", help="Output file (.csv, .csv.gz, .parquet, .feather, ...)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same file")
+    parser.add_argument("--empty-rate", type=float, default=DEFAULT_EMPTY_RATE,
+                        help="Fraction of rows that are empty bin scans")
+    parser.add_argument("--styles", type=int, help="Size of the style catalogue (default 2 x rows)")
+    parser.add_argument("--start", default=DEFAULT_START, help="Timestamp of the first scan")
+    args = parser.parse_args(argv)
+
+    count = parse_count(args.rows)
+    start = time.perf_counter()
+    write_scans(args.output, count, seed=args.seed, empty_rate=args.empty_rate,
+                styles=args.styles, start=args.start)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} rows to {args.output} in {elapsed:.1f}s "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
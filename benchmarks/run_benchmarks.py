@@ -0,0 +1,345 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Allow running as "python benchmarks/run_benchmarks.py" from the repo root
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from bins import grid_cell
+from generate_scans import parse_count, write_scans
+from fuzzy_search import FuzzySkuIndex
+from location_index import LocationIndex
+from pattern_search import REGEX, WILDCARD, PatternIndex
+from scan_io import write_table
+from sku_lookup import SkuIndex
+from sku_styles import StyleIndex
+from warehouse_core import DUPLICATE_HEADERS, WarehouseData
+
+# Row counts benchmarked by default; 10M also works but needs several GB of RAM
+DEFAULT_SIZES = ["10k", "1M"]
+DEFAULT_REPEAT = 5
+DEFAULT_DATA_DIR = os.path.join(BENCHMARK_DIR, "data")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# Registered benchmarks: (name, prepare, max_rows). prepare(dataset) does the
+# untimed setup and returns the callable that is timed
+BENCHMARKS = []
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by prepare when a benchmark cannot run here"""
+
+
+def benchmark(name, max_rows=None):
+    """Register a benchmark; datasets larger than max_rows skip it"""
+    def register(prepare):
+        BENCHMARKS.append((name, prepare, max_rows))
+        return prepare
+    return register
+
+
+class Dataset:
+    """A scan file with its loaded data and a few queries drawn from it"""
+
+    def __init__(self, label, path):
+        self.label = label
+        self.path = path
+        self.data = WarehouseData().load(path)
+        self.rows = len(self.data.csv_data)
+
+        rng = random.Random(0)
+        skus = sorted({sku for sku, _ in self.data.csv_data if len(sku) == 9})
+        self.sku = skus[len(skus) // 2] if skus else "YTVTL90XS"
+        self.pick_list = rng.sample(skus, min(1000, len(skus)))
+        self.cells = sorted({grid_cell(location) for _, location in self.data.csv_data} - {None})
+
+
+@benchmark("load")
+def bench_load(dataset):
+    return lambda: WarehouseData().load(dataset.path)
+
+
+@benchmark("analyze")
+def bench_analyze(dataset):
+    return dataset.data.analyze
+
+
+@benchmark("sku_index")
+def bench_sku_index(dataset):
+    return lambda: SkuIndex(dataset.data.csv_data)
+
+
+@benchmark("pattern_index")
+def bench_pattern_index(dataset):
+    return lambda: PatternIndex(dataset.data.csv_data)
+
+
+@benchmark("location_index")
+def bench_location_index(dataset):
+    return lambda: LocationIndex(location for _, location in dataset.data.csv_data)
+
+
+@benchmark("style_index")
+def bench_style_index(dataset):
+    return lambda: StyleIndex(dataset.data.csv_data)
+
+
+@benchmark("fuzzy_index")
+def bench_fuzzy_index(dataset):
+    sku_index = dataset.data.sku_index()
+    return lambda: FuzzySkuIndex(sku_index)
+
+
+@benchmark("search_substring")
+def bench_search_substring(dataset):
+    return lambda: dataset.data.search(dataset.sku[:7], "")
+
+
+@benchmark("search_location_prefix")
+def bench_search_location_prefix(dataset):
+    dataset.data.location_index()
+    return lambda: dataset.data.search("", "R2E5")
+
+
+@benchmark("search_wildcard")
+def bench_search_wildcard(dataset):
+    dataset.data.pattern_index()
+    return lambda: dataset.data.search(dataset.sku[:4] + "*", "", WILDCARD)
+
+
+@benchmark("search_regex")
+def bench_search_regex(dataset):
+    dataset.data.pattern_index()
+    return lambda: dataset.data.search(f"^{dataset.sku[:3]}.*X[LS]$", "", REGEX)
+
+
+@benchmark("search_fuzzy")
+def bench_search_fuzzy(dataset):
+    dataset.data.fuzzy_index()
+    typo = dataset.sku[:5] + "Q" + dataset.sku[6:]
+    return lambda: dataset.data.search(typo, "", fuzzy_distance=2)
+
+
+@benchmark("pick_list_lookup")
+def bench_pick_list_lookup(dataset):
+    sku_index = dataset.data.sku_index()
+    return lambda: sku_index.lookup(dataset.pick_list)
+
+
+@benchmark("filter_duplicates")
+def bench_filter_duplicates(dataset):
+    return dataset.data.duplicate_cells
+
+
+@benchmark("filter_empty")
+def bench_filter_empty(dataset):
+    return dataset.data.empty_cells
+
+
+@benchmark("filter_style_duplicates")
+def bench_filter_style_duplicates(dataset):
+    return dataset.data.style_index().duplicate_styles
+
+
+@benchmark("nearest_empty_1000")
+def bench_nearest_empty(dataset):
+    queries = [random.Random(seed).choice(dataset.cells) for seed in range(1000)]
+    index = dataset.data.empty_bin_index
+    return lambda: [index.nearest(cell) for cell in queries]
+
+
+@benchmark("export_duplicates")
+def bench_export_duplicates(dataset):
+    return dataset.data.duplicate_skus_rows
+
+
+@benchmark("export_empty_bins")
+def bench_export_empty_bins(dataset):
+    return dataset.data.empty_bins_rows
+
+
+@benchmark("export_duplicates_csv")
+def bench_export_duplicates_csv(dataset):
+    rows = dataset.data.duplicate_skus_rows()
+    path = os.path.join(tempfile.gettempdir(), "benchmark_duplicates.csv")
+    return lambda: write_table(path, DUPLICATE_HEADERS, rows)
+
+
+@benchmark("grid_streamlit")
+def bench_grid_streamlit(dataset):
+    try:
+        import streamlit as st
+        from streamlit import logger
+        from warehouse_grid_visualizer_streamlit import WarehouseGridVisualizerStreamlit
+    except ImportError as e:
+        raise BenchmarkSkipped(f"streamlit app not importable: {e}")
+
+    # Bare mode (no "streamlit run") warns on every session state access
+    logger.set_log_level("error")
+    app = WarehouseGridVisualizerStreamlit()
+    st.session_state['data'] = dataset.data
+
+    def build_grid():
+        st.session_state['grid_matrix'] = None
+        return app.create_grid_visualization()
+    return build_grid
+
+
+@benchmark("grid_tk")
+def bench_grid_tk(dataset):
+    try:
+        import tkinter as tk
+        from warehouse_grid_visualizer_v0 import WarehouseGridVisualizer
+    except ImportError as e:
+        raise BenchmarkSkipped(f"tkinter app not importable: {e}")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise BenchmarkSkipped(f"no display: {e}")
+
+    root.withdraw()
+    app = WarehouseGridVisualizer(root)
+    app.data = dataset.data
+    return app.draw_grid
+
+
+def measure(func, repeat):
+    """Return (wall times of repeat calls, peak traced bytes of one extra call)
+
+    The traced call runs first and doubles as a warm-up; tracemalloc slows
+    code down, so it is kept out of the timed calls.
+    """
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times, peak
+
+
+def summarize(times, peak):
+    """Return the JSON record of one benchmark run"""
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def dataset_path(size, data_dir):
+    """Return the synthetic scan file for a size, generating it on first use"""
+    count = parse_count(size)
+    path = os.path.join(data_dir, f"scans_{size}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {count} rows into {path}...", flush=True)
+        write_scans(path, count, seed=0)
+    return path
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, only=None, data_dir=DEFAULT_DATA_DIR,
+              scan_files=(), progress=print):
+    """Run the benchmarks over synthetic datasets and scan files, returning the results record
+
+    Results are keyed "name[dataset]", e.g. "load[1M]"; skipped benchmarks
+    record the reason instead of timings.
+    """
+    datasets = [(size, dataset_path(size, data_dir)) for size in sizes]
+    datasets += [(os.path.basename(path), path) for path in scan_files]
+
+    results = {}
+    for label, path in datasets:
+        dataset = Dataset(label, path)
+        progress(f"{label}: {dataset.rows} rows from {path}")
+        for name, prepare, max_rows in BENCHMARKS:
+            if only and name not in only:
+                continue
+            key = f"{name}[{label}]"
+            if max_rows is not None and dataset.rows > max_rows:
+                results[key] = {"benchmark": name, "dataset": label, "rows": dataset.rows,
+                                "skipped": f"slow above {max_rows} rows"}
+                progress(f"  {name:<26} skipped: slow above {max_rows} rows")
+                continue
+            try:
+                func = prepare(dataset)
+            except BenchmarkSkipped as e:
+                results[key] = {"benchmark": name, "dataset": label, "rows": dataset.rows, "skipped": str(e)}
+                progress(f"  {name:<26} skipped: {e}")
+                continue
+            times, peak = measure(func, repeat)
+            results[key] = {"benchmark": name, "dataset": label, "rows": dataset.rows, **summarize(times, peak)}
+            progress(f"  {name:<26} median {statistics.median(times) * 1000:>10.2f} ms"
+                     f"  min {min(times) * 1000:>10.2f} ms  peak {peak / 1e6:>8.1f} MB")
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "sizes": list(sizes),
+        "scan_files": list(scan_files),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time loading, analysis, search, filters, exports and "
+                                                 "grid construction on synthetic scan data")
+    parser.add_argument("--sizes", nargs="*", default=DEFAULT_SIZES,
+                        help="Synthetic dataset sizes, e.g. 10k 1M 10M (generated once into --data-dir)")
+    parser.add_argument("--scan", nargs="*", default=[], dest="scan_files", help="Also benchmark these scan files")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed repetitions per benchmark")
+    parser.add_argument("--only", nargs="*", help="Run only these benchmarks")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Folder for generated datasets")
+    parser.add_argument("--output", help="Results JSON file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, _, max_rows in BENCHMARKS:
+            print(name + (f" (up to {max_rows} rows)" if max_rows else ""))
+        return
+
+    report = run_suite(args.sizes, args.repeat, args.only, args.data_dir, args.scan_files)
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{(report['commit'] or 'results')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as outfile:
+        json.dump(report, outfile, indent=2)
+    print(f"Wrote {len(report['results'])} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+def grid_cell(location):
+    """Return the (column, row) grid cell of a bin location, or None if it cannot be placed"""
+    if len(location) >= 5 and location.startswith('R'):
+        return location[1:3], location[3:5]
+    return None
+
+
+def is_empty_sku(sku):
+    """Check whether a SKU value marks an empty bin: "EMPTY" or a blank field"""
+    return not sku.strip() or sku.upper() == "EMPTY"
@@ -0,0 +1,60 @@
+# Ways of combining a new filter result with the current highlight
+REPLACE = "Replace"
+AND = "AND"
+OR = "OR"
+AND_NOT = "AND NOT"
+COMBINE_OPS = [REPLACE, AND, OR, AND_NOT]
+
+
+class CellSpace:
+    """Numbering of the grid cells so sets of cells can be held as int bitsets
+
+    Bit i of a mask is set when the cell with id i is in the set. Python ints
+    have no fixed width, so the 6300 cells of the grid fit in one int, and
+    AND/OR/NOT of whole filter results are single bitwise operations.
+    """
+
+    def __init__(self, columns, rows):
+        self.cell_list = [(column, row) for column in columns for row in rows]
+        self.ids = {cell: idx for idx, cell in enumerate(self.cell_list)}
+        self.full = (1 << len(self.cell_list)) - 1
+        self.num_bytes = (len(self.cell_list) + 7) // 8
+
+    def mask(self, cells):
+        """Return the bitset of a collection of (column, row) cells; unknown cells are ignored"""
+        bits = bytearray(self.num_bytes)
+        for cell in cells:
+            idx = self.ids.get(cell)
+            if idx is not None:
+                bits[idx >> 3] |= 1 << (idx & 7)
+        return int.from_bytes(bits, 'little')
+
+    def cells(self, mask):
+        """Return the set of (column, row) cells in a bitset"""
+        cells = set()
+        for byte_idx, byte in enumerate(mask.to_bytes(self.num_bytes, 'little')):
+            while byte:
+                low_bit = byte & -byte
+                cells.add(self.cell_list[(byte_idx << 3) + low_bit.bit_length() - 1])
+                byte ^= low_bit
+        return cells
+
+    def contains(self, mask, cell):
+        """Check whether a cell's bit is set in a mask"""
+        idx = self.ids.get(cell)
+        return idx is not None and (mask >> idx) & 1 == 1
+
+    def invert(self, mask):
+        """Return the complement of a mask within the grid (NOT)"""
+        return self.full & ~mask
+
+
+def combine(current, mask, op):
+    """Combine the current highlight mask with a new filter mask"""
+    if op == AND:
+        return current & mask
+    if op == OR:
+        return current | mask
+    if op == AND_NOT:
+        return current & ~mask
+    return mask
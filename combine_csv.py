@@ -0,0 +1,79 @@
+import argparse
+
+from scan_io import iter_scan_readers, write_table
+
+# Header names accepted for each field: the older scanner exports and the
+# match_date_time,garment_sku,location_id layout the visualizer reads
+TIMESTAMP_HEADERS = ('match_date_time', 'timestamp')
+SKU_HEADERS = ('garment_sku', 'sku')
+LOCATION_HEADERS = ('location_id', 'location')
+
+OUTPUT_HEADER = ['match_date_time', 'garment_sku', 'location_id']
+
+
+def find_column(headers, names):
+    """Return the index of the first header matching one of the names (case insensitive)"""
+    lowered = [header.strip().lower() for header in headers]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+
+def combine_csv_files(input_path, output_file):
+    """Combine scan files into one CSV keeping the first timestamp of each SKU-Location pair
+
+    The input can be a folder, a zip archive of scan folders, or a single
+    file; plain, .gz, .bz2 and .xz files are all streamed without extracting.
+    Parquet and Arrow inputs are read column-wise. The output format follows
+    its extension: CSV (optionally compressed), .parquet, .feather or .arrow.
+    """
+    # Dictionary to track unique SKU-Location combinations
+    # Format: {(sku, location): timestamp}
+    unique_entries = {}
+    file_count = 0
+    
+    # Process each scan file as it is decompressed
+    for file_name, reader in iter_scan_readers(input_path):
+        file_count += 1
+        print(f"Processing: {file_name}")
+        header = next(reader, None)
+        
+        timestamp_idx = find_column(header or [], TIMESTAMP_HEADERS)
+        sku_idx = find_column(header or [], SKU_HEADERS)
+        location_idx = find_column(header or [], LOCATION_HEADERS)
+        
+        # Continue if the file has the expected header structure
+        if timestamp_idx is None or sku_idx is None or location_idx is None:
+            print(f"Skipping {file_name} - Incorrect header structure")
+            continue
+        
+        min_length = max(timestamp_idx, sku_idx, location_idx) + 1
+        
+        # Process each row
+        for row in reader:
+            if len(row) >= min_length:
+                # Add entry if it's not a duplicate
+                entry_key = (row[sku_idx], row[location_idx])
+                if entry_key not in unique_entries:
+                    unique_entries[entry_key] = row[timestamp_idx]
+    
+    print(f"Found {file_count} scan files in {input_path}")
+    
+    # Write the combined data to output file
+    print(f"Writing {len(unique_entries)} unique entries to {output_file}")
+    write_table(output_file, OUTPUT_HEADER,
+                ([timestamp, sku, location] for (sku, location), timestamp in unique_entries.items()))
+    
+    print(f"Finished! Combined data saved to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine scan CSV files into one file")
+    parser.add_argument("input", nargs="?", default="scan0404",
+                        help="Folder, zip archive or scan file to combine")
+    parser.add_argument("output", nargs="?", default="combined_sku_locations.csv",
+                        help="Output file (.csv, .csv.gz/.bz2/.xz, .parquet, .feather or .arrow)")
+    args = parser.parse_args()
+    
+    combine_csv_files(args.input, args.output)
@@ -0,0 +1,143 @@
+import argparse
+import time
+from collections import Counter
+
+from bins import grid_cell
+from pick_route import layout_for_cells
+from scan_io import write_table
+from sku_lookup import SkuIndex
+from sku_styles import SKU_LENGTH
+from snapshot_diff import load_scan_pairs
+
+EXPORT_HEADERS = ["SKU", "From Bin", "To Bin", "Units", "Distance"]
+
+
+def plan_sku_moves(sku, units, occupancy, layout, capacity=None):
+    """Return [(sku, from bin, to bin, units, distance)] gathering one SKU into the fewest bins
+
+    units maps each bin holding the SKU to its scanned units of it, and
+    occupancy maps every bin to its units of all SKUs. Only bins already
+    holding the SKU are kept. Without a capacity the SKU goes into the one
+    bin with the least unit-weighted walk from its other bins, ties going
+    to the bin with the fewest units of other SKUs. With a capacity (units
+    per bin) the fewest bins with room for every unit are kept, preferring
+    the least-travel ones. Each moved bin goes to its nearest kept bin.
+    """
+    bins = sorted(units)
+    count = len(bins)
+    matrix = layout.matrix([layout.point(grid_cell(location)) for location in bins])
+    travel = [sum(distances[other] * units[bins[other]] for other in range(count)) for distances in matrix]
+    others = [occupancy[location] - units[location] for location in bins]
+    by_travel = sorted(range(count), key=lambda idx: (travel[idx], others[idx], bins[idx]))
+
+    if capacity is None:
+        keep = by_travel[:1]
+        room = {keep[0]: float("inf")}
+    else:
+        total = sum(units.values())
+        free = [capacity - other for other in others]
+        by_room = sorted(range(count), key=lambda idx: (-free[idx], travel[idx], bins[idx]))
+        needed = next((size for size in range(1, count + 1)
+                       if sum(free[idx] for idx in by_room[:size]) >= total), count)
+        if needed == count:
+            return []
+        keep = by_travel[:needed]
+        if sum(free[idx] for idx in keep) < total:
+            keep = by_room[:needed]
+        room = {idx: free[idx] - units[bins[idx]] for idx in keep}
+
+    moves = []
+    kept = set(keep)
+    for source in by_travel:
+        if source in kept:
+            continue
+        remaining = units[bins[source]]
+        for target in sorted(keep, key=lambda idx: (matrix[source][idx], bins[idx])):
+            moved = min(remaining, room[target])
+            if moved <= 0:
+                continue
+            moves.append((sku, bins[source], bins[target], moved, matrix[source][target]))
+            room[target] -= moved
+            remaining -= moved
+            if not remaining:
+                break
+    return moves
+
+
+class ConsolidationPlan:
+    """Consolidation moves for every duplicate SKU in a dataset
+
+    Uses the SKU hash index for each SKU's bins and unit counts, the
+    occupancy of every bin, and the aisle layout's walking distances.
+    """
+
+    def __init__(self, sku_index, layout, capacity=None):
+        started = time.perf_counter()
+        self.capacity = capacity
+
+        # bin -> scanned units of every SKU it holds
+        occupancy = Counter()
+        for locations in sku_index.locations.values():
+            occupancy.update(locations)
+
+        self.moves = []
+        self.skus = 0
+        for sku, locations in sku_index.locations.items():
+            if len(sku) != SKU_LENGTH:
+                continue
+            units = Counter(location for location in locations if grid_cell(location) in layout.points)
+            if len(units) < 2:
+                continue
+            self.skus += 1
+            self.moves.extend(plan_sku_moves(sku, units, occupancy, layout, capacity))
+
+        # Bins whose every unit is moved out end up empty
+        moved_out = Counter()
+        for _, source, _, moved, _ in self.moves:
+            moved_out[source] += moved
+        self.emptied = sorted(location for location, moved in moved_out.items() if moved >= occupancy[location])
+        self.elapsed = time.perf_counter() - started
+
+    def __len__(self):
+        return len(self.moves)
+
+    def travel(self):
+        """Return the total unit-weighted walking distance of the moves"""
+        return sum(moved * distance for _, _, _, moved, distance in self.moves)
+
+    def source_cells(self):
+        """Return the grid cells of every bin that units move out of"""
+        return {grid_cell(source) for _, source, _, _, _ in self.moves}
+
+    def summary(self):
+        """Return a one-line description of the plan for status bars"""
+        return (f"Consolidation: {len(self.moves)} moves for {self.skus} duplicate SKUs, "
+                f"{len(self.emptied)} bins emptied, travel {self.travel()}, "
+                f"planned in {self.elapsed:.2f}s")
+
+    def export_rows(self):
+        """Return rows for EXPORT_HEADERS, sorted by SKU and source bin"""
+        return [list(move) for move in sorted(self.moves)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan moves that gather each duplicate SKU into the fewest bins")
+    parser.add_argument("scan", help="Scan file, archive or columnar file")
+    parser.add_argument("--output", help="Write the move list to a CSV, Parquet or Arrow file")
+    parser.add_argument("--capacity", type=int, help="Units a bin can hold (default: unlimited)")
+    args = parser.parse_args(argv)
+
+    pairs = list(load_scan_pairs(args.scan))
+    sku_index = SkuIndex(pairs)
+    layout = layout_for_cells({grid_cell(location) for _, location in pairs} - {None})
+
+    plan = ConsolidationPlan(sku_index, layout, args.capacity)
+    print(plan.summary())
+
+    if args.output:
+        write_table(args.output, EXPORT_HEADERS, plan.export_rows())
+        print(f"Wrote {len(plan)} moves to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+
+from memory_report import dataset_bytes, megabytes
+
+# WH_DATASET_BUDGET_MB caps the memory the loaded datasets hold together;
+# past it the least recently used are dropped
+BUDGET_ENV = "WH_DATASET_BUDGET_MB"
+DEFAULT_BUDGET_MB = 2000
+
+
+class CachedDataset:
+    """A loaded dataset with the front end's view state for it (highlights, filter, replay...)"""
+
+    def __init__(self, name, data, state):
+        self.name = name
+        self.data = data
+        self.state = state
+        self.last_used = 0
+
+
+class DatasetCache:
+    """Loaded datasets kept for instant switching, the least recently used dropped past a memory budget
+
+    Sizes come from dataset_bytes: traced when allocation tracing was on
+    during the load, otherwise estimated from the rows, grid, analysis and
+    the replay kept in the view state. Search indexes are not estimated, so
+    the front ends drop them from every dataset but the one shown. The
+    dataset just added or switched to is never dropped, even when it alone
+    is over the budget. Names keep the order the datasets were loaded in.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1_000_000):
+        self.budget_bytes = budget_bytes
+        self.entries = {}
+        self.clock = 0
+
+    @classmethod
+    def from_env(cls):
+        """Return a cache with the budget from WH_DATASET_BUDGET_MB, or the default"""
+        return cls(float(os.environ.get(BUDGET_ENV) or DEFAULT_BUDGET_MB) * 1_000_000)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def names(self):
+        return list(self.entries)
+
+    def get(self, name):
+        """Return a dataset's entry and mark it as the most recently used"""
+        entry = self.entries[name]
+        self.clock += 1
+        entry.last_used = self.clock
+        return entry
+
+    def add(self, name, data, state):
+        """Add or replace a dataset, then drop the least recently used ones over budget; returns their names"""
+        self.entries.pop(name, None)
+        self.entries[name] = CachedDataset(name, data, state)
+        self.get(name)
+        return self.evict(keep=name)
+
+    def evict(self, keep):
+        evicted = []
+        while len(self.entries) > 1 and self.total_bytes() > self.budget_bytes:
+            oldest = min((entry for entry in self.entries.values() if entry.name != keep),
+                         key=lambda entry: entry.last_used)
+            del self.entries[oldest.name]
+            evicted.append(oldest.name)
+        return evicted
+
+    def total_bytes(self):
+        return sum(dataset_bytes(entry.data, entry.state.get('replay')) for entry in self.entries.values())
+
+    def describe(self):
+        """Return the dataset count and memory use as one line, e.g. "3 datasets, 412.5 of 2000.0 MB" """
+        return (f"{len(self.entries)} dataset{'s' if len(self.entries) != 1 else ''}, "
+                f"{megabytes(self.total_bytes())} of {megabytes(self.budget_bytes)} MB")
@@ -0,0 +1,192 @@
+import argparse
+import time
+from collections import defaultdict
+from math import sqrt
+
+from bins import grid_cell, is_empty_sku
+from snapshot_diff import load_scan_pairs
+
+# Side length, in grid cells, of the square buckets of the spatial index
+DEFAULT_BUCKET_SIZE = 8
+
+# Default number of empty bins returned by a nearest query
+DEFAULT_K = 5
+
+
+def cell_position(cell):
+    """Return the (level, aisle, row) coordinates of a (column, row) grid cell, or None"""
+    if cell is None:
+        return None
+    column, row = cell
+    if len(column) != 2 or not column[0].isdigit() or not column[1].isalpha() or not row.isdigit():
+        return None
+    return column[0], ord(column[1].upper()) - ord('A'), int(row)
+
+
+def parse_query_cell(query):
+    """Return the grid cell of a location (R2E59-N-BD1), a cell name (2E59) or a (column, row) tuple
+
+    Raises ValueError when the query cannot be placed on the grid.
+    """
+    if isinstance(query, tuple):
+        cell = query
+    else:
+        query = query.strip().upper()
+        if query.startswith('R'):
+            cell = grid_cell(query)
+        else:
+            cell = (query[:2], query[2:]) if len(query) == 4 else None
+    if cell_position(cell) is None:
+        raise ValueError(f"'{query}' is not a bin location or grid cell, e.g. R2E59-N-BD1 or 2E59")
+    return cell
+
+
+def ring_buckets(center_x, center_y, ring):
+    """Yield the bucket keys at Chebyshev distance ring from a center bucket"""
+    if ring == 0:
+        yield center_x, center_y
+        return
+    for x in range(center_x - ring, center_x + ring + 1):
+        yield x, center_y - ring
+        yield x, center_y + ring
+    for y in range(center_y - ring + 1, center_y + ring):
+        yield center_x - ring, y
+        yield center_x + ring, y
+
+
+class EmptyBinIndex:
+    """Spatial grid index over empty bin positions, one per level
+
+    Each empty bin sits at its grid cell's (aisle, row) position and is kept
+    in a square bucket of bucket_size x bucket_size cells on its level. A
+    nearest query visits rings of buckets outward from the query's bucket and
+    stops as soon as the next ring cannot hold anything closer than the k-th
+    bin found, so only a few buckets are read however large the layout is.
+    Distances are computed per cell, not per bin, since every bin of a cell
+    is equally far. Bins on other levels are never considered.
+    """
+
+    def __init__(self, locations=(), bucket_size=DEFAULT_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.size = 0
+
+        # level -> (aisle bucket, row bucket) -> {(aisle, row): set of locations}
+        self.levels = defaultdict(lambda: defaultdict(lambda: defaultdict(set)))
+        for location in locations:
+            self.add(location)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, location):
+        """Add an empty bin; locations that cannot be placed are ignored"""
+        position = cell_position(grid_cell(location))
+        if position is None:
+            return
+        level, aisle, row = position
+        bins = self.levels[level][(aisle // self.bucket_size, row // self.bucket_size)][(aisle, row)]
+        if location not in bins:
+            bins.add(location)
+            self.size += 1
+
+    def discard(self, location):
+        """Remove a bin that is no longer empty, if present"""
+        position = cell_position(grid_cell(location))
+        if position is None:
+            return
+        level, aisle, row = position
+        bucket = self.levels.get(level, {}).get((aisle // self.bucket_size, row // self.bucket_size))
+        bins = bucket.get((aisle, row)) if bucket else None
+        if bins and location in bins:
+            bins.discard(location)
+            self.size -= 1
+            if not bins:
+                del bucket[(aisle, row)]
+            if not bucket:
+                del self.levels[level][(aisle // self.bucket_size, row // self.bucket_size)]
+
+    def nearest(self, query, k=DEFAULT_K):
+        """Return up to k [(distance, location)] empty bins nearest the query on its level
+
+        The query is a bin location, a cell name or a (column, row) cell.
+        Distance is measured in grid cells, aisles across and rows along;
+        bins in the same cell are at distance 0. Ties sort by location.
+        """
+        level, aisle, row = cell_position(parse_query_cell(query))
+        buckets = self.levels.get(level)
+        if not buckets or k <= 0:
+            return []
+
+        size = self.bucket_size
+        center_x, center_y = aisle // size, row // size
+        last_ring = max(max(abs(x - center_x), abs(y - center_y)) for x, y in buckets)
+
+        # (squared distance, bins) per cell, trimmed to the cells within the
+        # squared distance that holds at least k bins
+        found = []
+        count = 0
+        for ring in range(last_ring + 1):
+            for key in ring_buckets(center_x, center_y, ring):
+                bucket = buckets.get(key)
+                if bucket:
+                    for (bin_aisle, bin_row), bins in bucket.items():
+                        found.append(((bin_aisle - aisle) ** 2 + (bin_row - row) ** 2, bins))
+                        count += len(bins)
+
+            if count >= k:
+                found.sort(key=lambda entry: entry[0])
+                count = 0
+                for squared, bins in found:
+                    count += len(bins)
+                    if count >= k:
+                        break
+                bound = squared
+                found = [entry for entry in found if entry[0] <= bound]
+                count = sum(len(bins) for _, bins in found)
+
+                # Every bin in the next ring is at least ring * size + 1 cells away
+                if bound < (ring * size + 1) ** 2:
+                    break
+
+        nearest = sorted((squared, location) for squared, bins in found for location in bins)
+        return [(sqrt(squared), location) for squared, location in nearest[:k]]
+
+    def nearest_cells(self, query, k=DEFAULT_K):
+        """Return (nearest bins, grid cells holding them)"""
+        nearest = self.nearest(query, k)
+        return nearest, {grid_cell(location) for _, location in nearest}
+
+
+def describe_nearest(nearest, shown=5):
+    """Return a short text listing the nearest bins with their distances"""
+    text = ", ".join(f"{location} ({distance:.1f})" for distance, location in nearest[:shown])
+    if len(nearest) > shown:
+        text += f" and {len(nearest) - shown} more"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the empty bins nearest to a location on the same level")
+    parser.add_argument("scan", help="Scan file, archive or columnar file")
+    parser.add_argument("queries", nargs="+", help="Bin locations or grid cells, e.g. R2E59-N-BD1 or 2E59")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="Number of empty bins to return")
+    parser.add_argument("--bucket-size", type=int, default=DEFAULT_BUCKET_SIZE,
+                        help="Side length of the index buckets in grid cells")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = EmptyBinIndex((location for sku, location in load_scan_pairs(args.scan) if is_empty_sku(sku)),
+                          bucket_size=args.bucket_size)
+    print(f"Indexed {len(index)} empty bins in {time.perf_counter() - start:.2f}s")
+
+    for query in args.queries:
+        start = time.perf_counter()
+        nearest = index.nearest(query, args.k)
+        elapsed = time.perf_counter() - start
+        print(f"{query}: {len(nearest)} empty bins in {elapsed * 1000:.3f} ms")
+        for distance, location in nearest:
+            print(f"  {location} ({distance:.1f} cells)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import time
+from collections import defaultdict
+
+from bins import grid_cell
+from sku_lookup import SkuIndex
+from snapshot_diff import load_scan_pairs
+
+# Default number of single-character edits a fuzzy match may differ by
+DEFAULT_MAX_DISTANCE = 1
+
+# Default number of nearest SKUs returned by a fuzzy search
+DEFAULT_LIMIT = 50
+
+
+def pattern_masks(word):
+    """Return {character: bit mask of its positions in word} for levenshtein"""
+    masks = {}
+    for position, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def levenshtein(word, other, masks=None):
+    """Return the edit distance between two strings
+
+    Uses the bit-parallel algorithm of Myers (as formulated by Hyyrö): one
+    column of the edit matrix is held in the bits of a Python int, so each
+    character of other costs a handful of integer operations instead of a
+    loop over word. Pass masks=pattern_masks(word) to reuse them across calls.
+    """
+    length = len(word)
+    if not length:
+        return len(other)
+    if masks is None:
+        masks = pattern_masks(word)
+
+    all_bits = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+    positive = all_bits
+    negative = 0
+    score = length
+    for char in other:
+        eq = masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | (~(xh | positive) & all_bits)
+        horizontal_negative = positive & xh
+        if horizontal_positive & last_bit:
+            score += 1
+        elif horizontal_negative & last_bit:
+            score -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & all_bits
+        horizontal_negative = (horizontal_negative << 1) & all_bits
+        positive = horizontal_negative | (~(xv | horizontal_positive) & all_bits)
+        negative = horizontal_positive & xv
+    return score
+
+
+def query_pieces(word, max_distance):
+    """Split a word into max_distance + 1 pieces, one of which any word within max_distance edits contains
+
+    Each edit changes at most one piece, so at least one is left intact.
+    Returns None when the word is too short to split.
+    """
+    count = max_distance + 1
+    if len(word) < count:
+        return None
+    bounds = [len(word) * number // count for number in range(count + 1)]
+    return [word[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class FuzzySkuIndex:
+    """Nearest-SKU search over the distinct SKUs of a dataset
+
+    Distinct SKUs are grouped by length, since the edit distance is at least
+    the length difference. A search reads only the lengths within
+    max_distance of the query's, keeps the SKUs containing an intact piece of
+    the query (a fast substring test), and computes the distance for those
+    alone. Building is one pass over the distinct SKUs, so the first search
+    does not wait for a tree build, and searches are several times faster
+    than a BK-tree over the same SKUs. The SKU hash index maps the matches
+    back to their bin locations.
+    """
+
+    def __init__(self, sku_index):
+        self.sku_index = sku_index
+        self.lengths = defaultdict(list)
+        for sku in sku_index.locations:
+            self.lengths[len(sku)].append(sku)
+
+    def __len__(self):
+        return len(self.sku_index.locations)
+
+    def nearest(self, word, max_distance):
+        """Return [(distance, sku)] for every SKU within max_distance of word, nearest first"""
+        pieces = query_pieces(word, max_distance)
+        masks = pattern_masks(word)
+        matches = []
+        for length in range(len(word) - max_distance, len(word) + max_distance + 1):
+            candidates = self.lengths.get(length, ())
+            if pieces:
+                candidates = {sku for piece in pieces for sku in candidates if piece in sku}
+            for sku in candidates:
+                distance = levenshtein(word, sku, masks)
+                if distance <= max_distance:
+                    matches.append((distance, sku))
+        matches.sort()
+        return matches
+
+    def search(self, sku, max_distance=DEFAULT_MAX_DISTANCE, limit=DEFAULT_LIMIT):
+        """Return up to limit [(distance, sku, locations)] nearest to the query"""
+        matches = self.nearest(sku.strip().upper(), max_distance)[:limit]
+        return [(distance, match, self.sku_index.locations[match]) for distance, match in matches]
+
+    def search_cells(self, sku, max_distance=DEFAULT_MAX_DISTANCE, limit=DEFAULT_LIMIT):
+        """Return (matches, grid cells holding any matched SKU)"""
+        matches = self.search(sku, max_distance, limit)
+        cells = {grid_cell(location) for _, _, locations in matches for location in locations}
+        cells.discard(None)
+        return matches, cells
+
+
+def describe_matches(matches, shown=5):
+    """Return a short text listing the nearest matches with their distances"""
+    text = ", ".join(f"{sku} ({distance})" for distance, sku, _ in matches[:shown])
+    if len(matches) > shown:
+        text += f" and {len(matches) - shown} more"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the SKUs nearest to a possibly mistyped SKU")
+    parser.add_argument("scan", help="Scan file, archive or columnar file to search")
+    parser.add_argument("skus", nargs="+", help="SKUs to look up")
+    parser.add_argument("--distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="Maximum number of single-character edits")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Maximum matches per SKU")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = FuzzySkuIndex(SkuIndex(load_scan_pairs(args.scan)))
+    print(f"Indexed {len(index)} distinct SKUs in {time.perf_counter() - start:.2f}s")
+
+    for sku in args.skus:
+        start = time.perf_counter()
+        matches = index.search(sku, args.distance, args.limit)
+        elapsed = time.perf_counter() - start
+        print(f"{sku}: {len(matches)} matches in {elapsed * 1000:.1f} ms")
+        for distance, match, locations in matches:
+            print(f"  {match} (distance {distance}): {', '.join(sorted(locations))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from datetime import datetime
+
+from bins import grid_cell
+
+# Scanner timestamps look like 2025-04-04 17:15:42, but some files leave hours
+# unpadded (2025-04-04 9:05:38), so they are parsed rather than compared as text
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+MINUTE_LABEL_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def parse_timestamp(text):
+    """Parse a scan timestamp to a datetime, or return None if it is not one"""
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+class GridReplay:
+    """Precomputed per-minute bin changes for scrubbing through a day of scans
+
+    Every scan that changes what a bin holds becomes a change event
+    (bin, sku before, sku after), grouped into buckets by minute. Position 0
+    is the grid before the first scan and position N is the grid after the
+    last bucket. Seeking applies or reverts only the buckets in between and
+    reports which grid cells changed, so front ends repaint just those cells.
+    """
+
+    def __init__(self, events):
+        # Parse each distinct timestamp once, drop scans without one and sort by time
+        parsed = {}
+        scans = []
+        for timestamp, sku, location in events:
+            if timestamp not in parsed:
+                parsed[timestamp] = parse_timestamp(timestamp)
+            when = parsed[timestamp]
+            if when is not None:
+                scans.append((when, sku, location))
+        scans.sort(key=lambda scan: scan[0])
+
+        # Start of each bucket's minute, as datetimes
+        self.minutes = []
+        self.buckets = []
+        bin_state = {}
+
+        for when, sku, location in scans:
+            before = bin_state.get(location)
+            if before == sku:
+                continue
+            bin_state[location] = sku
+
+            minute = when.replace(second=0, microsecond=0)
+            if not self.minutes or self.minutes[-1] != minute:
+                self.minutes.append(minute)
+                self.buckets.append([])
+            self.buckets[-1].append((location, before, sku))
+
+        # Live state at the current position; starts with nothing scanned
+        self.position = 0
+        self.bin_state = {}
+        self.grid_data = defaultdict(lambda: defaultdict(list))
+
+        # (bin, sku before, sku after) of each change the last seek made, in order
+        self.changed_bins = []
+
+    def __len__(self):
+        """Return the number of minute buckets (the last slider position)"""
+        return len(self.buckets)
+
+    def label(self, position):
+        """Return a display label for a slider position"""
+        if position <= 0 or not self.minutes:
+            return "Start"
+        return self.minutes[position - 1].strftime(MINUTE_LABEL_FORMAT)
+
+    def seek(self, position):
+        """Move to a slider position and return the set of grid cells that changed
+
+        The bin changes it made are left in changed_bins.
+        """
+        position = max(0, min(position, len(self.buckets)))
+        changed_cells = set()
+        self.changed_bins = []
+
+        # Forward: apply buckets in order; backward: revert them newest first
+        if position > self.position:
+            for bucket in self.buckets[self.position:position]:
+                for location, before, after in bucket:
+                    self._set_bin(location, before, after, changed_cells)
+        elif position < self.position:
+            for bucket in reversed(self.buckets[position:self.position]):
+                for location, before, after in reversed(bucket):
+                    self._set_bin(location, after, before, changed_cells)
+
+        self.position = position
+        return changed_cells
+
+    def _set_bin(self, location, old_sku, new_sku, changed_cells):
+        """Replace what a bin holds in the live state and grid data"""
+        self.changed_bins.append((location, old_sku, new_sku))
+        if new_sku is None:
+            self.bin_state.pop(location, None)
+        else:
+            self.bin_state[location] = new_sku
+
+        cell = grid_cell(location)
+        if cell is None:
+            return
+        column, row = cell
+
+        # Remove the old entry, then add the new one
+        if old_sku is not None and column in self.grid_data and row in self.grid_data[column]:
+            entries = self.grid_data[column][row]
+            entries.remove((old_sku, location))
+            if not entries:
+                # Drop empty cells so "row in grid_data[column]" still means occupied
+                del self.grid_data[column][row]
+                if not self.grid_data[column]:
+                    del self.grid_data[column]
+        if new_sku is not None:
+            self.grid_data[column][row].append((new_sku, location))
+
+        changed_cells.add(cell)
+
+    def current_rows(self):
+        """Return (sku, location) pairs for the current position, like csv_data"""
+        return [(sku, location) for location, sku in self.bin_state.items()]
@@ -0,0 +1,314 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from perf_stats import PerfStats
+from scan_io import TIMESTAMP_COLUMNS, iter_scan_readers
+from scan_validator import resolve_columns
+from warehouse_core import WarehouseData
+
+# Where the apps listen unless told otherwise: tcp:<host>:<port>,
+# udp:<host>:<port> or unix:<socket path>
+DEFAULT_ADDRESS = "tcp:127.0.0.1:8766"
+ADDRESS_KINDS = ("tcp", "udp", "unix")
+
+# Scans received between frames are applied as one batch, at most this many
+# times a second, so a burst of scans repaints each changed cell once
+DEFAULT_FRAME_RATE = 10
+
+# Bytes read per socket read, and lines per UDP datagram sent
+READ_SIZE = 1 << 16
+LINES_PER_DATAGRAM = 100
+
+
+def parse_address(address):
+    """Split tcp:host:port, udp:host:port or unix:path into (kind, host or path, port or None)"""
+    kind, _, rest = address.partition(":")
+    if kind not in ADDRESS_KINDS or not rest:
+        raise ValueError(f"'{address}' is not an address like tcp:127.0.0.1:8766, udp:127.0.0.1:8766 "
+                         f"or unix:/tmp/scans.sock")
+    if kind == "unix":
+        return kind, rest, None
+    host, _, port = rest.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"'{address}' needs a host and port, e.g. {kind}:127.0.0.1:8766")
+    return kind, host, int(port)
+
+
+def parse_scan_line(line):
+    """Return the (timestamp, sku, location) of a timestamp,sku,location line, or None
+
+    Header lines, blank lines and lines without three fields or without a
+    location give None.
+    """
+    fields = line.strip().split(",")
+    if len(fields) != 3:
+        return None
+    timestamp, sku, location = (field.strip() for field in fields)
+    if not location or location.lower() == "location_id":
+        return None
+    return timestamp, sku, location
+
+
+class DatagramReceiver:
+    """asyncio datagram protocol for a listener; it does not subclass
+    asyncio.DatagramProtocol, so importing this module does not load asyncio"""
+
+    def __init__(self, listener):
+        self.listener = listener
+
+    def connection_made(self, transport):
+        pass
+
+    def connection_lost(self, exc):
+        pass
+
+    def error_received(self, exc):
+        pass
+
+    def datagram_received(self, data, addr):
+        self.listener.add_lines(data.split(b"\n"))
+
+
+class ScanListener:
+    """Receives timestamp,sku,location lines on a local socket in a background thread
+
+    TCP and Unix socket clients send newline-separated lines over one
+    connection; each UDP datagram holds one or more lines. Parsed scans wait
+    in pending until the app drains them once per frame.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        self.kind, self.host, self.port = parse_address(address)
+        self.pending = deque()
+        self.received = 0
+        self.skipped = 0
+        self.loop = None
+        self.thread = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def start(self):
+        """Start listening in a background thread; raises OSError when the address cannot be used"""
+        self.thread = threading.Thread(target=self.run, name="scan-listener", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error:
+            raise self.error
+        return self
+
+    def run(self):
+        # asyncio takes about 40 ms to import, so it waits until a listener starts
+        import asyncio
+
+        self.loop = asyncio.new_event_loop()
+        try:
+            server = self.loop.run_until_complete(self.open())
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            self.loop.close()
+            return
+
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            self.loop.close()
+
+    async def open(self):
+        import asyncio
+
+        if self.kind == "udp":
+            transport, _ = await self.loop.create_datagram_endpoint(lambda: DatagramReceiver(self),
+                                                                    local_addr=(self.host, self.port))
+            return transport
+        if self.kind == "unix":
+            return await asyncio.start_unix_server(self.handle_stream, self.host)
+        return await asyncio.start_server(self.handle_stream, self.host, self.port)
+
+    async def handle_stream(self, reader, writer):
+        """Read lines from one TCP or Unix socket client until it disconnects"""
+        partial = b""
+        try:
+            while True:
+                chunk = await reader.read(READ_SIZE)
+                if not chunk:
+                    break
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                self.add_lines(lines)
+            self.add_lines([partial])
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def add_lines(self, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            event = parse_scan_line(line.decode("utf-8", "replace"))
+            if event:
+                self.pending.append(event)
+                self.received += 1
+            else:
+                self.skipped += 1
+
+    def drain(self):
+        """Return every scan received since the last drain, oldest first"""
+        pending = self.pending
+        return [pending.popleft() for _ in range(len(pending))]
+
+    def describe(self):
+        return f"Live scans on {self.address}: {self.received} received, {self.skipped} lines skipped"
+
+    def stop(self):
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+        if self.kind == "unix" and os.path.exists(self.host):
+            os.remove(self.host)
+
+
+def scan_lines(source):
+    """Yield timestamp,sku,location lines from a scan file; rows without a timestamp column get an empty one"""
+    for file_name, reader in iter_scan_readers(source):
+        headers = next(reader, None)
+        if headers is None:
+            continue
+        sku_idx, location_idx = resolve_columns(headers)
+        time_idx = next((idx for idx, header in enumerate(headers)
+                         if header.strip().lower() in TIMESTAMP_COLUMNS), None)
+        for row in reader:
+            if len(row) <= max(sku_idx, location_idx):
+                continue
+            timestamp = row[time_idx] if time_idx is not None and time_idx < len(row) else ""
+            fields = (timestamp, row[sku_idx], row[location_idx])
+            if not any("," in field or "\n" in field for field in fields):
+                yield ",".join(fields) + "\n"
+
+
+def open_sender(address):
+    """Return a function that sends a list of lines to a listening app"""
+    kind, host, port = parse_address(address)
+    if kind == "udp":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        def send(lines):
+            for start in range(0, len(lines), LINES_PER_DATAGRAM):
+                sock.sendto("".join(lines[start:start + LINES_PER_DATAGRAM]).encode(), (host, port))
+        return send, sock
+
+    if kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(host)
+    else:
+        sock = socket.create_connection((host, port))
+    return lambda lines: sock.sendall("".join(lines).encode()), sock
+
+
+def send_scans(source, address, rate, limit=None):
+    """Stream a scan file to a listening app at rate lines per second (0 for as fast as possible)"""
+    send, sock = open_sender(address)
+    # Lines go out in ticks of 10 ms, so the rate holds without a send per line
+    tick = 0.01
+    per_tick = max(1, int(rate * tick)) if rate else 1000
+    sent = 0
+    start = time.perf_counter()
+    batch = []
+    try:
+        for line in scan_lines(source):
+            batch.append(line)
+            if len(batch) >= per_tick:
+                send(batch)
+                sent += len(batch)
+                batch = []
+                if rate:
+                    delay = start + sent / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+            if limit and sent + len(batch) >= limit:
+                break
+        if batch:
+            send(batch)
+            sent += len(batch)
+    finally:
+        sock.close()
+    return sent, time.perf_counter() - start
+
+
+def listen(address, base, frame_rate, duration):
+    """Apply received scans to a dataset at frame_rate without a display and print the rates each second"""
+    perf = PerfStats(enabled=True)
+    data = WarehouseData(perf).load(base) if base else WarehouseData(perf)
+    # Switch to live state now rather than stalling the first batch
+    data.start_live()
+    listener = ScanListener(address).start()
+    print(f"Listening on {address} with {len(data.csv_data)} rows loaded (Ctrl+C to stop)")
+
+    frame = 1 / frame_rate
+    start = last_report = time.perf_counter()
+    applied = changed = frames = 0
+    try:
+        while not duration or time.perf_counter() - start < duration:
+            time.sleep(frame)
+            events = listener.drain()
+            if events:
+                changed += len(data.apply_scans(events))
+                applied += len(events)
+                frames += 1
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                print(f"{applied / (now - last_report):.0f} scans/s applied in {frames} frames, "
+                      f"{changed} cells changed; {listener.received} received in total")
+                applied = changed = frames = 0
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+
+    for name, count, last_ms, p50_ms, p95_ms in perf.summary_rows():
+        if name == "apply_scans":
+            print(f"apply_scans: {count} batches, p50 {p50_ms} ms, p95 {p95_ms} ms")
+    print(f"{listener.received} scans received, {listener.skipped} lines skipped, "
+          f"{len(data.duplicate_skus)} duplicate SKUs, {len(data.empty_bins_locations)} cells with empty bins")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream scanner events to a running visualizer, or receive them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    send_parser = subparsers.add_parser("send", help="Stream a scan file as a stand-in scanner")
+    send_parser.add_argument("scan", help="Scan file, archive or columnar file to stream")
+    send_parser.add_argument("--to", default=DEFAULT_ADDRESS, dest="address",
+                             help=f"Listening app address (default: {DEFAULT_ADDRESS})")
+    send_parser.add_argument("--rate", type=float, default=5000, help="Scans per second (0 for as fast as possible)")
+    send_parser.add_argument("--limit", type=int, help="Stop after this many scans")
+
+    listen_parser = subparsers.add_parser("listen", help="Apply received scans without a display and print rates")
+    listen_parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Address to listen on")
+    listen_parser.add_argument("--load", dest="base", help="Scan file to start from")
+    listen_parser.add_argument("--frame-rate", type=float, default=DEFAULT_FRAME_RATE,
+                               help="Batches applied per second")
+    listen_parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "send":
+        sent, elapsed = send_scans(args.scan, args.address, args.rate, args.limit)
+        print(f"Sent {sent} scans to {args.address} in {elapsed:.2f}s ({sent / max(elapsed, 1e-9):.0f}/s)")
+    else:
+        listen(args.address, args.base, args.frame_rate, args.duration)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
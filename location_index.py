@@ -0,0 +1,147 @@
+import argparse
+import re
+import time
+from bisect import bisect_left, bisect_right
+
+from bins import grid_cell
+from scan_io import iter_scan_readers
+from scan_validator import LOCATION_PATTERN, resolve_columns
+
+# Location components in the order they appear in R2E59-N-BD1
+COMPONENTS = ("level", "aisle", "row", "side", "slot")
+
+# Sorts after every character used in locations, closing a prefix range
+PREFIX_END = "\uffff"
+
+# A plain location prefix: R, a level digit, then anything
+LOCATION_PREFIX = re.compile(r"^R\d")
+
+
+def parse_location(location):
+    """Split a location into its (level, aisle, row, side, slot) components, or None"""
+    match = LOCATION_PATTERN.match(location)
+    return match.groups() if match else None
+
+
+def is_index_query(query):
+    """Check whether a location query can be answered by the index
+
+    Component terms (side=N) and prefixes that start like a location (R2E5)
+    are indexed. Anything else is left to the substring search, since a
+    prefix and a substring only agree when the query starts the location.
+    """
+    terms = query.replace(",", " ").split()
+    return bool(terms) and all("=" in term or LOCATION_PREFIX.match(term.upper()) for term in terms)
+
+
+def parse_location_query(query):
+    """Parse a query into (location prefixes, {component: (value, is_prefix)})
+
+    Terms are separated by spaces or commas. A term like "side=N" or
+    "slot=B*" constrains one component, a trailing * matching by prefix;
+    any other term is a location prefix such as "R2E5".
+    """
+    prefixes = []
+    components = {}
+    for term in query.upper().replace(",", " ").split():
+        if "=" in term:
+            name, value = term.split("=", 1)
+            name = name.lower()
+            if name not in COMPONENTS:
+                raise ValueError(f"Unknown location component '{name}', use one of: {', '.join(COMPONENTS)}")
+            components[name] = (value.rstrip("*"), value.endswith("*"))
+        else:
+            prefixes.append(term.rstrip("*"))
+    return prefixes, components
+
+
+class LocationIndex:
+    """Sorted-key index over distinct bin locations and their parsed components
+
+    Locations are kept in one sorted list, so a prefix such as R2E5 (rows
+    50-59 of aisle E on level 2) is a range found by binary search. Each
+    component also has its own sorted (value, location id) list, so a query
+    like "side=N slot=B*" intersects a few range scans instead of testing
+    every location.
+    """
+
+    def __init__(self, locations):
+        self.keys = sorted({location.strip().upper() for location in locations})
+
+        # component -> parallel sorted lists of values and location ids
+        self.component_values = {}
+        self.component_ids = {}
+        parsed = [(parse_location(key), idx) for idx, key in enumerate(self.keys)]
+        parsed = [(parts, idx) for parts, idx in parsed if parts]
+        for position, name in enumerate(COMPONENTS):
+            entries = sorted((parts[position], idx) for parts, idx in parsed)
+            self.component_values[name] = [value for value, _ in entries]
+            self.component_ids[name] = [idx for _, idx in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix_range(self, prefix):
+        """Return the (start, end) slice of keys that start with prefix"""
+        return bisect_left(self.keys, prefix), bisect_right(self.keys, prefix + PREFIX_END)
+
+    def component_match(self, name, value, is_prefix):
+        """Return the ids of locations whose component equals (or starts with) value"""
+        values = self.component_values[name]
+        start = bisect_left(values, value)
+        end = bisect_right(values, value + PREFIX_END if is_prefix else value)
+        return set(self.component_ids[name][start:end])
+
+    def query(self, query):
+        """Return the sorted locations matching a prefix and/or component query"""
+        prefixes, components = parse_location_query(query)
+
+        ids = None
+        for prefix in prefixes:
+            start, end = self.prefix_range(prefix)
+            matched = set(range(start, end))
+            ids = matched if ids is None else ids & matched
+
+        # Narrowest component first keeps the intersections small
+        matches = sorted((self.component_match(name, value, is_prefix)
+                          for name, (value, is_prefix) in components.items()), key=len)
+        for matched in matches:
+            ids = matched if ids is None else ids & matched
+
+        return [self.keys[idx] for idx in sorted(ids or ())]
+
+    def query_cells(self, query):
+        """Return the grid cells holding any location matching the query"""
+        cells = set(map(grid_cell, self.query(query)))
+        cells.discard(None)
+        return cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query bin locations by prefix or component")
+    parser.add_argument("scan", help="Scan file, archive or columnar file")
+    parser.add_argument("query", help="e.g. 'R2E5' or 'side=N slot=B*'")
+    args = parser.parse_args(argv)
+
+    locations = []
+    for file_name, reader in iter_scan_readers(args.scan):
+        headers = next(reader, None)
+        if headers is None:
+            continue
+        _, location_idx = resolve_columns(headers)
+        locations.extend(row[location_idx] for row in reader if len(row) > location_idx)
+
+    start = time.perf_counter()
+    index = LocationIndex(locations)
+    built = time.perf_counter()
+    matches = index.query(args.query)
+    finished = time.perf_counter()
+
+    for location in matches:
+        print(location)
+    print(f"{len(matches)} of {len(index)} locations match "
+          f"(index built in {built - start:.2f}s, query {(finished - built) * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
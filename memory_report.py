@@ -0,0 +1,178 @@
+import os
+import sys
+import tracemalloc
+
+from perf_stats import NULL_SPAN
+
+# WH_MEMORY_TRACE=1 starts allocation tracing when an app starts, so the
+# first load is measured too
+MEMORY_ENV = "WH_MEMORY_TRACE"
+
+REPORT_HEADERS = ["Part", "MB"]
+
+
+def start_tracing():
+    """Start tracemalloc unless it is already tracing; returns whether it was started now"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start()
+    return True
+
+
+def start_tracing_from_env():
+    if os.environ.get(MEMORY_ENV, "") not in ("", "0"):
+        start_tracing()
+
+
+def megabytes(size):
+    return f"{size / 1e6:.1f}"
+
+
+class MemoryTrack:
+    """Records the traced bytes a block leaves allocated, less what nested tracks recorded"""
+    __slots__ = ("ledger", "part", "accumulate", "start")
+
+    def __init__(self, ledger, part, accumulate):
+        self.ledger = ledger
+        self.part = part
+        self.accumulate = accumulate
+
+    def __enter__(self):
+        self.start = tracemalloc.get_traced_memory()[0]
+        self.ledger.nested.append(0)
+        return self
+
+    def __exit__(self, *exc_info):
+        retained = tracemalloc.get_traced_memory()[0] - self.start
+        retained_here = retained - self.ledger.nested.pop()
+        if self.accumulate:
+            retained_here += self.ledger.parts.get(self.part, 0)
+        self.ledger.parts[self.part] = retained_here
+        if self.ledger.nested:
+            self.ledger.nested[-1] += retained
+        return False
+
+
+class MemoryLedger:
+    """Bytes held by each part of a loaded dataset, measured by allocation tracing
+
+    Each part is built inside track(part), and the traced memory it leaves
+    allocated is what the part holds, since temporaries are freed by then.
+    Parts are only measured while tracemalloc is tracing, so a dataset loaded
+    before tracing started has no entries until it is reloaded.
+    """
+
+    def __init__(self):
+        self.parts = {}
+        self.nested = []
+
+    def track(self, part, accumulate=False):
+        """Return a context manager that measures what the block leaves allocated as part
+
+        With accumulate the bytes are added to the part, for a part built in
+        several steps (possibly freeing what an earlier step allocated).
+        """
+        if not tracemalloc.is_tracing():
+            return NULL_SPAN
+        return MemoryTrack(self, part, accumulate)
+
+    def split(self, part, other, size):
+        """Move size bytes measured as part over to other"""
+        if part in self.parts:
+            size = min(size, self.parts[part])
+            self.parts[part] -= size
+            self.parts[other] = size
+
+    def clear(self):
+        self.parts.clear()
+
+    def report_rows(self):
+        """Return [part, MB] rows for each part, the dataset total and traced totals"""
+        if not tracemalloc.is_tracing():
+            return []
+        current, peak = tracemalloc.get_traced_memory()
+        held = sum(self.parts.values())
+        rows = [[part, megabytes(size)] for part, size in self.parts.items()]
+        rows.append(["dataset total", megabytes(held)])
+        rows.append(["everything else traced", megabytes(current - held)])
+        rows.append(["traced now", megabytes(current)])
+        rows.append(["traced peak", megabytes(peak)])
+        return rows
+
+    def describe(self):
+        """Return the report as one line for logging"""
+        if not tracemalloc.is_tracing():
+            return f"Memory tracing is off; set {MEMORY_ENV}=1 or start tracing and reload to measure"
+        return "Memory: " + ", ".join(f"{part} {size} MB" for part, size in self.report_rows())
+
+
+# Sizes of the tuples rows are stored in and of an empty ASCII string, so
+# the grid and event sizes are counted without visiting a million objects
+PAIR_BYTES = sys.getsizeof(("", ""))
+TRIPLE_BYTES = sys.getsizeof(("", "", ""))
+EMPTY_TEXT_BYTES = sys.getsizeof("")
+
+
+def grid_container_bytes(grid_data):
+    """Return the bytes of grid_data's dicts, lists and (sku, location) tuples, not the strings shared with the rows"""
+    size = sys.getsizeof(grid_data)
+    for column_rows in grid_data.values():
+        size += sys.getsizeof(column_rows)
+        for items in column_rows.values():
+            size += sys.getsizeof(items) + len(items) * PAIR_BYTES
+    return size
+
+
+def event_bytes(scan_events):
+    """Return the bytes of the scan event list, its tuples and ASCII timestamps; SKUs and locations are the rows'"""
+    return (sys.getsizeof(scan_events) + len(scan_events) * (TRIPLE_BYTES + EMPTY_TEXT_BYTES)
+            + sum(len(timestamp) for timestamp, _, _ in scan_events))
+
+
+def row_bytes(csv_data, sample=1000):
+    """Estimate the bytes of csv_data's list, tuples and strings from an even sample of rows"""
+    if not csv_data:
+        return sys.getsizeof(csv_data)
+    sampled = csv_data[::max(1, len(csv_data) // sample)]
+    per_row = sum(PAIR_BYTES + sys.getsizeof(sku) + sys.getsizeof(location) for sku, location in sampled) / len(sampled)
+    return sys.getsizeof(csv_data) + int(per_row * len(csv_data))
+
+
+def analysis_bytes(data):
+    """Return the bytes of the duplicate and empty bin sets, the empty bin index and the live or replay counts"""
+    size = (sys.getsizeof(data.duplicate_skus) + sys.getsizeof(data.empty_bins_locations)
+            + len(data.empty_bins_locations) * PAIR_BYTES)
+    for buckets in data.empty_bin_index.levels.values():
+        size += sys.getsizeof(buckets)
+        for cells in buckets.values():
+            size += sys.getsizeof(cells) + sum(map(sys.getsizeof, cells.values()))
+    if data.bin_rows is not None:
+        size += sys.getsizeof(data.bin_rows) + sys.getsizeof(data.sku_counts) + sys.getsizeof(data.empty_counts)
+    return size
+
+
+def replay_bytes(replay):
+    """Return the bytes of a replay's change buckets, minutes and state; SKUs and locations are the rows'"""
+    changes = sum(map(len, replay.buckets))
+    return (sys.getsizeof(replay.buckets) + sum(map(sys.getsizeof, replay.buckets)) + changes * TRIPLE_BYTES
+            + sys.getsizeof(replay.minutes) + sum(map(sys.getsizeof, replay.minutes))
+            + sys.getsizeof(replay.bin_state) + grid_container_bytes(replay.grid_data))
+
+
+def dataset_bytes(data, replay=None):
+    """Return the bytes a loaded dataset and its replay hold: as traced when they were, otherwise an estimate
+
+    The estimate counts the rows, the grid index, pending scan events, the
+    analysis and the replay. Search indexes are left out, so front ends
+    keeping several datasets drop the indexes of those not shown.
+    """
+    if data.memory.parts:
+        return sum(data.memory.parts.values())
+    size = (row_bytes(data.csv_data) + grid_container_bytes(data.grid_data) + event_bytes(data.scan_events)
+            + analysis_bytes(data))
+    if replay:
+        size += replay_bytes(replay)
+        # An active replay's grid is the dataset's grid, counted above
+        if replay.grid_data is data.grid_data:
+            size -= grid_container_bytes(replay.grid_data)
+    return size
@@ -0,0 +1,101 @@
+import fnmatch
+import itertools
+import re
+from collections import OrderedDict, defaultdict
+
+from bins import grid_cell
+
+# Query modes offered next to the search fields
+SUBSTRING = "Substring"
+WILDCARD = "Wildcard"
+REGEX = "Regex"
+SEARCH_MODES = [SUBSTRING, WILDCARD, REGEX]
+
+# Number of (dataset, query) results kept by the query cache
+DEFAULT_CACHE_SIZE = 128
+
+# Every PatternIndex gets a new version, so cached results never outlive their data
+_dataset_versions = itertools.count(1)
+
+
+def compile_query(query, mode):
+    """Compile a search query into a case-insensitive regular expression
+
+    Wildcard queries use shell syntax (* any run, ? one character, [12] a set)
+    and must match the whole value. Regex queries match anywhere unless
+    anchored, like re.search. Substring queries match anywhere.
+    """
+    if mode == WILDCARD:
+        return re.compile(fnmatch.translate(query), re.IGNORECASE)
+    if mode == REGEX:
+        return re.compile(query, re.IGNORECASE)
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+
+class QueryCache:
+    """Least-recently-used cache of query results"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key and mark it recently used, or None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+# Shared by every dataset; keys start with the dataset version
+query_cache = QueryCache()
+
+
+class PatternIndex:
+    """Distinct SKU and location dictionaries for pattern searches
+
+    A compiled pattern is tested once per distinct value rather than once per
+    row, and the matched values expand to grid cells through the
+    dictionaries. Results are cached per (dataset version, field, mode, query).
+    """
+
+    def __init__(self, pairs, cache=None):
+        self.version = next(_dataset_versions)
+        self.cache = query_cache if cache is None else cache
+
+        # field -> {distinct value: set of grid cells}
+        self.values = {'sku': defaultdict(set), 'location': defaultdict(set)}
+        for sku, location in pairs:
+            cell = grid_cell(location)
+            if cell is None:
+                continue
+            self.values['sku'][sku].add(cell)
+            self.values['location'][location].add(cell)
+
+    def search_cells(self, field, query, mode):
+        """Return the frozenset of grid cells whose SKU or location matches the query
+
+        Raises re.error for an invalid regular expression.
+        """
+        key = (self.version, field, mode, query)
+        cells = self.cache.get(key)
+        if cells is None:
+            pattern = compile_query(query, mode)
+            # Wildcards must match the whole value, the other modes anywhere in it
+            matches = pattern.fullmatch if mode == WILDCARD else pattern.search
+            values = self.values[field]
+            cells = frozenset().union(*map(values.__getitem__, filter(matches, values)))
+            self.cache.put(key, cells)
+        return cells
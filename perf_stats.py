@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict, deque
+
+# WH_PERF_STATS=1 turns timing on at startup; WH_PERF_TRACE=<file> also
+# appends every span to a JSON-lines trace
+STATS_ENV = "WH_PERF_STATS"
+TRACE_ENV = "WH_PERF_TRACE"
+
+# Recent durations kept per operation for the percentiles
+DEFAULT_WINDOW = 200
+
+SUMMARY_HEADERS = ["Operation", "Count", "Last ms", "p50 ms", "p95 ms"]
+
+
+class NullSpan:
+    """Span returned while timing is off; entering and leaving it does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Times one run of an operation and records it on exit, also when it raises"""
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class PerfStats:
+    """Timing spans around the apps' hot paths, with gauges for the stats panel
+
+    While disabled, span() hands back a shared do-nothing span, so the
+    instrumented code pays one attribute check per operation. While enabled,
+    each operation keeps its last DEFAULT_WINDOW durations for last/p50/p95,
+    and a trace file, when set, gets one JSON line per span and gauge update.
+    """
+
+    def __init__(self, enabled=False, trace_path=None, window=DEFAULT_WINDOW):
+        self.enabled = enabled or bool(trace_path)
+        self.trace_path = trace_path
+        self.trace_file = None
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+        self.gauges = {}
+
+    @classmethod
+    def from_env(cls):
+        """Return stats configured from WH_PERF_STATS and WH_PERF_TRACE"""
+        return cls(enabled=os.environ.get(STATS_ENV, "") not in ("", "0"),
+                   trace_path=os.environ.get(TRACE_ENV) or None)
+
+    def span(self, name):
+        """Return a context manager that times the block as the named operation"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        """Add one duration of an operation"""
+        self.samples[name].append(seconds)
+        self.counts[name] += 1
+        self.trace({"span": name, "ms": round(seconds * 1000, 3)})
+
+    def set_gauges(self, **values):
+        """Set current values such as canvas_items, rows and cells; only changes are traced"""
+        changed = {name: value for name, value in values.items() if self.gauges.get(name) != value}
+        if changed:
+            self.gauges.update(changed)
+            self.trace({"gauges": changed})
+
+    def trace(self, record):
+        if not self.trace_path:
+            return
+        if self.trace_file is None:
+            self.trace_file = open(self.trace_path, "a", buffering=1)
+        self.trace_file.write(json.dumps({"time": round(time.time(), 6), **record}) + "\n")
+
+    def summary_rows(self):
+        """Return [operation, count, last ms, p50 ms, p95 ms] rows, slowest p95 first"""
+        rows = []
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            rows.append([name, self.counts[name], round(samples[-1] * 1000, 2),
+                         round(percentile(ordered, 50) * 1000, 2), round(percentile(ordered, 95) * 1000, 2)])
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return rows
+
+    def describe_gauges(self):
+        """Return the gauges as one line, e.g. "rows: 10000, cells: 1843" """
+        return ", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in self.gauges.items())
+
+    def clear(self):
+        """Forget the recorded durations, keeping the gauges"""
+        self.samples.clear()
+        self.counts.clear()
+
+    def close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
@@ -0,0 +1,265 @@
+import argparse
+import random
+import time
+
+from bins import grid_cell
+from empty_bins import cell_position
+from sku_lookup import SkuIndex, read_sku_list
+from snapshot_diff import load_scan_pairs
+
+# Walking cost of one step across to the next aisle, in row lengths
+AISLE_PITCH = 1
+
+# Extra cost of changing level by one at the lift
+LEVEL_CHANGE_COST = 30
+
+# Number of nearest stops each stop tries as a new neighbor during 2-opt
+NEIGHBORS = 12
+
+
+class AisleLayout:
+    """Walking distances between grid cells, precomputed once per layout
+
+    Rows run along an aisle and aisles sit side by side on each level. A
+    picker can only change aisle in a cross aisle: by default the front
+    (before row 01) and the back (after the last row). Changing level goes
+    through a lift at the front of aisle A. The precomputed tables are the
+    cost of getting from one row to another through the best cross aisle
+    and the gap between every pair of aisles, so any cell-to-cell distance
+    is a few lookups.
+    """
+
+    def __init__(self, columns, rows, cross_aisles=None, aisle_pitch=AISLE_PITCH,
+                 level_change=LEVEL_CHANGE_COST):
+        # cell -> (level, aisle index, row number)
+        self.points = {}
+        for column in columns:
+            for row in rows:
+                point = cell_position((column, row))
+                if point:
+                    self.points[(column, row)] = point
+
+        last_row = max(point[2] for point in self.points.values()) + 1
+        self.cross_aisles = tuple(cross_aisles) if cross_aisles else (0, last_row)
+        self.level_change = level_change
+        self.lift_aisle, self.lift_row = 0, min(self.cross_aisles)
+
+        # Row-to-row cost through the best cross aisle, and which one it is
+        self.via = []
+        self.via_row = []
+        for row in range(last_row + 1):
+            best = [min((abs(row - cross) + abs(cross - other), cross) for cross in self.cross_aisles)
+                    for other in range(last_row + 1)]
+            self.via.append([cost for cost, _ in best])
+            self.via_row.append([cross for _, cross in best])
+
+        aisles = max(point[1] for point in self.points.values()) + 1
+        self.aisle_gap = [[aisle_pitch * abs(aisle - other) for other in range(aisles)] for aisle in range(aisles)]
+
+    def point(self, cell):
+        """Return the (level, aisle, row) point of a grid cell"""
+        return self.points[cell]
+
+    def lift(self, level):
+        """Return the point of the lift on a level"""
+        return level, self.lift_aisle, self.lift_row
+
+    def distance(self, point, other):
+        """Return the walking distance between two points"""
+        level, aisle, row = point
+        other_level, other_aisle, other_row = other
+        if level != other_level:
+            return (self.distance(point, self.lift(level))
+                    + self.level_change * abs(int(level) - int(other_level))
+                    + self.distance(self.lift(other_level), other))
+        if aisle == other_aisle:
+            return abs(row - other_row)
+        return self.aisle_gap[aisle][other_aisle] + self.via[row][other_row]
+
+    def path(self, point, other):
+        """Return the points a picker walks through from one point to another"""
+        level, aisle, row = point
+        other_level, other_aisle, other_row = other
+        if level != other_level:
+            return self.path(point, self.lift(level)) + self.path(self.lift(other_level), other)
+        if aisle == other_aisle:
+            return [point, other]
+        cross = self.via_row[row][other_row]
+        return [point, (level, aisle, cross), (level, other_aisle, cross), other]
+
+    def matrix(self, points):
+        """Return the symmetric distance matrix between points as a list of lists
+
+        Same as calling distance for every pair, with the table rows and each
+        point's walk to its lift looked up once per point instead of per pair.
+        """
+        size = len(points)
+        to_lift = [self.distance(point, self.lift(point[0])) for point in points]
+        level_numbers = [int(point[0]) for point in points]
+        level_change = self.level_change
+
+        matrix = [[0] * size for _ in range(size)]
+        for i, (level, aisle, row) in enumerate(points):
+            distances = matrix[i]
+            gaps = self.aisle_gap[aisle]
+            via = self.via[row]
+            for j in range(i + 1, size):
+                other_level, other_aisle, other_row = points[j]
+                if other_level != level:
+                    distance = (to_lift[i] + level_change * abs(level_numbers[i] - level_numbers[j])
+                                + to_lift[j])
+                elif other_aisle == aisle:
+                    distance = abs(row - other_row)
+                else:
+                    distance = gaps[other_aisle] + via[other_row]
+                distances[j] = matrix[j][i] = distance
+        return matrix
+
+
+def layout_for_cells(cells, cross_aisles=None):
+    """Return an AisleLayout covering the columns and rows of a collection of grid cells"""
+    cells = [cell for cell in cells if cell_position(cell)]
+    last_row = max(int(row) for _, row in cells)
+    return AisleLayout(sorted({column for column, _ in cells}),
+                       [str(row).zfill(2) for row in range(1, last_row + 1)], cross_aisles)
+
+
+def tour_length(matrix, tour):
+    """Return the length of a closed tour"""
+    return sum(matrix[tour[i - 1]][tour[i]] for i in range(len(tour)))
+
+
+def nearest_neighbor_tour(matrix, start=0):
+    """Return a tour that always walks to the nearest unvisited stop"""
+    unvisited = set(range(len(matrix)))
+    unvisited.discard(start)
+    tour = [start]
+    while unvisited:
+        distances = matrix[tour[-1]]
+        stop = min(unvisited, key=distances.__getitem__)
+        unvisited.discard(stop)
+        tour.append(stop)
+    return tour
+
+
+def two_opt(matrix, tour, neighbors=NEIGHBORS):
+    """Improve a closed tour in place by 2-opt moves; tour[0] stays first
+
+    A move replaces edges (a, b) and (c, d) with (a, c) and (b, d) by
+    reversing the stretch from b to c. Only moves that make c one of the
+    nearest neighbors of a are tried, with b either of a's neighbors on the
+    tour, which keeps each sweep close to linear in the number of stops;
+    sweeps repeat until nothing improves.
+    """
+    size = len(tour)
+    if size < 4:
+        return tour
+
+    candidates = [sorted((stop for stop in range(size) if stop != city), key=matrix[city].__getitem__)[:neighbors]
+                  for city in range(size)]
+    position = [0] * size
+    for index, city in enumerate(tour):
+        position[city] = index
+
+    improved = True
+    while improved:
+        improved = False
+        for a in range(size):
+            distances = matrix[a]
+            # The new edge (a, c) replaces a's edge to the next stop (step 1)
+            # or to the previous one (step -1), and the matching edge at c
+            for step in (1, -1):
+                for c in candidates[a]:
+                    # Only a new edge shorter than the one it replaces at a can pay off
+                    if distances[c] >= distances[tour[(position[a] + step) % size]]:
+                        break
+                    if step == 1:
+                        i, j = position[a], position[c]
+                    else:
+                        i, j = (position[a] - 1) % size, (position[c] - 1) % size
+                    if i > j:
+                        i, j = j, i
+                    if j - i < 2 or (i == 0 and j == size - 1):
+                        continue
+                    first, second = tour[i], tour[i + 1]
+                    third, fourth = tour[j], tour[(j + 1) % size]
+                    delta = (matrix[first][third] + matrix[second][fourth]
+                             - matrix[first][second] - matrix[third][fourth])
+                    if delta < 0:
+                        tour[i + 1:j + 1] = tour[j:i:-1]
+                        for index in range(i + 1, j + 1):
+                            position[tour[index]] = index
+                        improved = True
+    return tour
+
+
+class PickRoute:
+    """A closed walking order from the start point through a set of grid cells"""
+
+    def __init__(self, layout, cells, start=None):
+        started = time.perf_counter()
+        self.layout = layout
+        self.start = start or layout.lift(min(point[0] for point in layout.points.values()))
+
+        placed = sorted(cell for cell in cells if cell in layout.points)
+        points = [self.start] + [layout.point(cell) for cell in placed]
+        matrix = layout.matrix(points)
+
+        tour = nearest_neighbor_tour(matrix)
+        self.initial_length = tour_length(matrix, tour)
+        two_opt(matrix, tour)
+        self.length = tour_length(matrix, tour)
+
+        self.cells = [placed[stop - 1] for stop in tour[1:]]
+        self.points = [points[stop] for stop in tour]
+        self.elapsed = time.perf_counter() - started
+
+    def __len__(self):
+        return len(self.cells)
+
+    def path(self):
+        """Return every point walked through, from the start back to the start"""
+        path = [self.start]
+        for point, other in zip(self.points, self.points[1:] + [self.start]):
+            path.extend(self.layout.path(point, other)[1:])
+        return path
+
+    def summary(self):
+        """Return a one-line description of the route for status bars"""
+        return (f"Route through {len(self.cells)} cells: length {self.length} "
+                f"(nearest neighbor {self.initial_length}), planned in {self.elapsed * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a walking order through the bins of a pick list")
+    parser.add_argument("scan", help="Scan file, archive or columnar file")
+    parser.add_argument("pick_list", nargs="?", help="Pick list file (one SKU per line, or a CSV with a sku column)")
+    parser.add_argument("--random", type=int, metavar="N", help="Plan a route through N random occupied cells instead")
+    parser.add_argument("--cross-aisle", type=int, action="append", dest="cross_aisles",
+                        help="Row number where pickers can change aisle (repeatable; default front and back)")
+    args = parser.parse_args(argv)
+    if not args.pick_list and not args.random:
+        parser.error("give a pick list or --random N")
+
+    pairs = list(load_scan_pairs(args.scan))
+    placed = {cell for cell in map(grid_cell, (location for _, location in pairs)) if cell_position(cell)}
+
+    start = time.perf_counter()
+    layout = layout_for_cells(placed, args.cross_aisles)
+    print(f"Built distance tables in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.random:
+        cells = random.sample(sorted(placed), min(args.random, len(placed)))
+    else:
+        result = SkuIndex(pairs).lookup(read_sku_list(args.pick_list))
+        print(result.summary())
+        cells = result.cells
+
+    route = PickRoute(layout, cells)
+    print(route.summary())
+    for stop, cell in enumerate(route.cells, 1):
+        print(f"{stop:4d}. {''.join(cell)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import parse_qs, quote, urlsplit
+
+from bins import grid_cell
+from empty_bins import cell_position, parse_query_cell
+from location_index import is_index_query
+from perf_stats import SUMMARY_HEADERS, PerfStats, percentile
+from warehouse_core import WarehouseData
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, so one client cannot exhaust memory
+MAX_BODY_BYTES = 10_000_000
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large"}
+
+
+class QueryError(Exception):
+    """A query the service cannot answer; the message goes back to the client"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def cell_names(locations):
+    """Return the sorted grid cell names (e.g. 2E59) of bin locations"""
+    return sorted({"".join(cell) for cell in map(grid_cell, locations) if cell})
+
+
+class QueryService:
+    """JSON answers to SKU, location, cell, duplicate and empty bin queries over one loaded dataset
+
+    A query is a dict with a "type" and, for sku, location and cell, the
+    query text "q". The same queries arrive one per GET request or many in
+    one POST, so batched and single answers match. The SKU and location
+    indexes and the two report answers are built before serving, so no request
+    waits for an index build.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.perf = data.perf
+        self.requests = 0
+        self.handlers = {
+            "sku": self.sku,
+            "location": self.location,
+            "cell": self.cell,
+            "duplicates": self.duplicates,
+            "empty": self.empty,
+        }
+        self.warm_up()
+
+    def warm_up(self):
+        self.data.sku_index()
+        self.data.location_index()
+        self.duplicates("")
+        self.empty("")
+
+    def answer(self, query):
+        """Return the JSON-ready answer to one query; raises QueryError for a bad query"""
+        if not isinstance(query, dict):
+            raise QueryError("Each query must be an object with a 'type'")
+        handler = self.handlers.get(query.get("type"))
+        if handler is None:
+            raise QueryError(f"Unknown query type '{query.get('type')}', use one of: {', '.join(self.handlers)}")
+        text = query.get("q", "")
+        if not isinstance(text, str):
+            raise QueryError("'q' must be a string")
+        return handler(text.strip())
+
+    def answer_batch(self, queries):
+        """Answer a list of queries; a bad query gets an error entry instead of failing the batch"""
+        if not isinstance(queries, list):
+            raise QueryError("Send {\"queries\": [...]} or a list of queries")
+        results = []
+        for query in queries:
+            try:
+                results.append(self.answer(query))
+            except QueryError as e:
+                results.append({"error": str(e)})
+        return {"results": results}
+
+    def sku(self, query):
+        if not query:
+            raise QueryError("Give the SKU as q")
+        locations = sorted(self.data.sku_index().locations.get(query.upper(), ()))
+        return {"sku": query.upper(), "found": bool(locations), "locations": locations,
+                "cells": cell_names(locations)}
+
+    def location(self, query):
+        if not is_index_query(query):
+            raise QueryError("Location queries are prefixes like R2E5 or components like 'side=N slot=B*'")
+        try:
+            locations = self.data.location_index().query(query)
+        except ValueError as e:
+            raise QueryError(str(e))
+        return {"query": query, "locations": locations, "cells": cell_names(locations)}
+
+    def cell(self, query):
+        try:
+            column, row = parse_query_cell(query)
+        except ValueError as e:
+            raise QueryError(str(e))
+        items = self.data.cell_items(column, row)
+        return {"cell": column + row, "items": [{"sku": sku, "location": location} for sku, location in items]}
+
+    def duplicates(self, query):
+        # Whole reports, so they are built once per dataset like the indexes
+        return self.data.cached('duplicates answer', lambda: {
+            "duplicates": [{"sku": sku, "locations": locations.split(", ")}
+                           for sku, locations in self.data.duplicate_skus_rows()]})
+
+    def empty(self, query):
+        return self.data.cached('empty answer', lambda: {
+            "empty_bins": [{"cell": cell, "locations": locations.split(", ")}
+                           for cell, locations in self.data.empty_bins_rows()]})
+
+    def stats(self):
+        """Return the request counts and per-endpoint latency percentiles"""
+        keys = [header.lower().replace(" ", "_") for header in SUMMARY_HEADERS]
+        return {"requests": self.requests, "rows": len(self.data.csv_data),
+                "operations": [dict(zip(keys, row)) for row in self.perf.summary_rows()]}
+
+    def respond(self, method, target, body):
+        """Return (status, JSON-ready payload) for one HTTP request"""
+        self.requests += 1
+        url = urlsplit(target)
+        route = url.path.strip("/")
+        with self.perf.span(f"http:{route}" if route in self.handlers or route == "query" else "http:other"):
+            try:
+                if route == "query":
+                    if method != "POST":
+                        raise QueryError("Batches are POSTed as {\"queries\": [...]}", 405)
+                    try:
+                        queries = json.loads(body or b"null")
+                    except ValueError:
+                        raise QueryError("The body is not valid JSON")
+                    return 200, self.answer_batch(queries.get("queries") if isinstance(queries, dict)
+                                                  else queries)
+                if method != "GET":
+                    raise QueryError(f"Use GET for /{route}", 405)
+                if route in self.handlers:
+                    params = parse_qs(url.query)
+                    return 200, self.answer({"type": route, "q": params.get("q", [""])[0]})
+                if route == "stats":
+                    return 200, self.stats()
+                if route == "health":
+                    return 200, {"status": "ok", "rows": len(self.data.csv_data)}
+                raise QueryError(f"No endpoint /{route}; use /sku, /location, /cell, /duplicates, /empty, "
+                                 f"/query, /stats or /health", 404)
+            except QueryError as e:
+                return e.status, {"error": str(e)}
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, keeping it open between requests"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                length = headers.get("content-length") or "0"
+                length = int(length) if length.isdecimal() else None
+                if len(parts) != 3:
+                    status, payload, keep_alive = 400, {"error": "Malformed request line"}, False
+                elif length is None:
+                    status, payload, keep_alive = 400, {"error": "Content-Length must be a whole number"}, False
+                elif length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = 413, {"error": f"Bodies are limited to {MAX_BODY_BYTES} bytes"}, False
+                else:
+                    method, target, version = parts
+                    body = await reader.readexactly(length)
+                    status, payload = self.respond(method, target, body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                content = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening and return the asyncio server; port 0 picks a free port"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def request(reader, writer, method, target, payload=None):
+    """Send one request on a keep-alive connection and return (status, decoded JSON)"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def sample_requests(data, count, batch_size, seed=0):
+    """Return count (method, target, payload) requests mixing SKU, location and cell queries with batches"""
+    rng = random.Random(seed)
+    skus = sorted(data.sku_index().locations) or ["YTVTL90XS"]
+    # Only locations on the layout, so every cell query names a real cell
+    locations = [location for _, location in data.csv_data[:100_000]
+                 if cell_position(grid_cell(location))] or ["R2E59"]
+
+    def query():
+        kind = rng.choice(("sku", "sku", "location", "cell"))
+        location = rng.choice(locations)
+        text = {"sku": rng.choice(skus), "location": location[:4], "cell": location[1:5]}[kind]
+        return {"type": kind, "q": text}
+
+    requests = []
+    for number in range(count):
+        if batch_size and number % 10 == 9:
+            requests.append(("POST", "/query", {"queries": [query() for _ in range(batch_size)]}))
+        else:
+            single = query()
+            requests.append(("GET", f"/{single['type']}?q={quote(single['q'])}", None))
+    requests.append(("GET", "/duplicates", None))
+    return requests
+
+
+async def load_test(service, count, connections, batch_size):
+    """Serve on a free localhost port, send count requests over several connections and print latencies"""
+    server = await service.start(DEFAULT_HOST, 0)
+    port = server.sockets[0].getsockname()[1]
+    requests = sample_requests(service.data, count, batch_size)
+    latencies = []
+    failures = 0
+
+    async def client(share):
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+        for method, target, payload in share:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, method, target, payload)
+            latencies.append(time.perf_counter() - start)
+            failures += status != 200
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[number::connections]) for number in range(connections)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {connections} connections in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} requests/s, {failures} failed); round trip "
+          + ", ".join(f"p{p} {percentile(latencies, p) * 1000:.2f} ms" for p in (50, 95, 99)))
+    print("Server side:")
+    for row in service.perf.summary_rows():
+        print("  " + ", ".join(f"{header} {value}" for header, value in zip(SUMMARY_HEADERS, row)))
+    return failures
+
+
+async def serve(service, host, port):
+    server = await service.start(host, port)
+    print(f"Serving {len(service.data.csv_data)} rows on http://{host}:{port} (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer SKU, location, cell, duplicate and empty bin queries "
+                                                 "over HTTP/JSON from a loaded scan file")
+    parser.add_argument("scan", help="Scan file, archive, columnar file or folder, loaded as the apps do")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--load-test", type=int, metavar="REQUESTS",
+                        help="Instead of serving, send this many sample requests to a local instance and "
+                             "print the latency percentiles")
+    parser.add_argument("--connections", type=int, default=8, help="Concurrent connections for --load-test")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="Queries per batched request in --load-test (every tenth request; 0 for none)")
+    args = parser.parse_args(argv)
+
+    # Always timed, since /stats reports the latencies; WH_PERF_TRACE still adds a trace file
+    perf = PerfStats.from_env()
+    perf.enabled = True
+    start = time.perf_counter()
+    service = QueryService(WarehouseData(perf).load(args.scan))
+    print(f"Loaded {args.scan} and built the indexes in {time.perf_counter() - start:.2f}s")
+
+    try:
+        if args.load_test:
+            return 1 if asyncio.run(load_test(service, args.load_test, args.connections, args.batch_size)) else 0
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        perf.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import zipfile
+
+# Decompressors keyed by file extension; each one wraps a binary stream
+# and decompresses lazily as it is read
+DECOMPRESSORS = {
+    '.gz': lambda stream: gzip.GzipFile(fileobj=stream, mode='rb'),
+    '.bz2': lambda stream: bz2.BZ2File(stream, mode='rb'),
+    '.xz': lambda stream: lzma.LZMAFile(stream, mode='rb'),
+    '.lzma': lambda stream: lzma.LZMAFile(stream, mode='rb'),
+}
+
+# Openers for writing compressed output files
+COMPRESSED_WRITERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+}
+
+SCAN_EXTENSIONS = ('.csv',) + tuple('.csv' + ext for ext in DECOMPRESSORS)
+
+# Columnar formats read and written through pandas (needs pyarrow)
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather', '.arrow')
+
+# Scan columns stored as timestamps rather than dictionary-encoded strings
+TIMESTAMP_COLUMNS = ('match_date_time', 'timestamp')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# File dialog patterns for every input the loaders can stream
+SCAN_FILETYPES = [
+    ("Scan Files", " ".join("*" + ext for ext in SCAN_EXTENSIONS + COLUMNAR_EXTENSIONS + ('.zip',))),
+    ("CSV Files", "*.csv"),
+    ("Parquet Files", "*.parquet"),
+    ("Arrow/Feather Files", "*.feather *.arrow"),
+    ("All Files", "*.*"),
+]
+
+# File dialog patterns for exports
+EXPORT_FILETYPES = [
+    ("CSV files", "*.csv"),
+    ("Parquet files", "*.parquet"),
+    ("Arrow/Feather files", "*.feather *.arrow"),
+    ("All files", "*.*"),
+]
+
+# Read buffer for decompressed streams, large enough that csv parsing
+# rather than decompression call overhead dominates
+READ_BUFFER_SIZE = 1 << 20
+
+
+def compression_extension(name):
+    """Return the compression extension of a file name, or None for plain files"""
+    _, ext = os.path.splitext(name.lower())
+    return ext if ext in DECOMPRESSORS else None
+
+
+def is_scan_file(name):
+    """Check whether a file name looks like a plain or compressed scan CSV"""
+    return name.lower().endswith(SCAN_EXTENSIONS)
+
+
+def is_columnar_file(name):
+    """Check whether a file name is a Parquet or Arrow IPC file"""
+    return name.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def is_zip_file(name):
+    """Check whether a file name is a zip archive"""
+    return name.lower().endswith('.zip')
+
+
+def wrap_text_stream(binary_stream, name):
+    """Wrap a binary stream as CSV-ready text, decompressing based on the file name"""
+    ext = compression_extension(name)
+    if ext:
+        binary_stream = DECOMPRESSORS[ext](binary_stream)
+    buffered = io.BufferedReader(binary_stream, buffer_size=READ_BUFFER_SIZE) \
+        if not isinstance(binary_stream, io.BufferedReader) else binary_stream
+    return io.TextIOWrapper(buffered, encoding='utf-8', newline='')
+
+
+def open_scan_file(file_path):
+    """Open a single plain or compressed scan file as a text stream"""
+    if is_zip_file(file_path):
+        raise ValueError(f"{file_path} is an archive, use iter_scan_files instead")
+    return wrap_text_stream(open(file_path, 'rb'), file_path)
+
+
+def open_output_file(file_path):
+    """Open an output file for writing text, compressing based on its extension"""
+    ext = compression_extension(file_path)
+    if ext:
+        return COMPRESSED_WRITERS[ext](file_path, 'wt', newline='', encoding='utf-8')
+    return open(file_path, 'w', newline='', encoding='utf-8')
+
+
+def iter_scan_files(source):
+    """Yield (name, text stream) for every scan file in a source
+
+    The source can be a path to a plain or compressed CSV file, a zip archive
+    of scan files or folders, a directory, or an uploaded file object with a
+    name attribute. Streams are decompressed while they are read and each one
+    is closed before the next is opened, so only one file is open at a time.
+    """
+    if hasattr(source, 'read'):
+        name = getattr(source, 'name', '') or ''
+        if is_zip_file(name):
+            yield from _iter_zip_members(source)
+        else:
+            yield name, wrap_text_stream(source, name)
+        return
+
+    if os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if os.path.isfile(path) and (is_scan_file(entry) or is_zip_file(entry)):
+                yield from iter_scan_files(path)
+        return
+
+    if is_zip_file(source):
+        with open(source, 'rb') as archive_file:
+            yield from _iter_zip_members(archive_file)
+        return
+
+    with open_scan_file(source) as text_stream:
+        yield source, text_stream
+
+
+def _iter_zip_members(archive_file):
+    """Yield (name, text stream) for every scan file inside a zip archive"""
+    with zipfile.ZipFile(archive_file) as archive:
+        for info in sorted(archive.infolist(), key=lambda item: item.filename):
+            member_name = info.filename
+            # Skip folders and metadata added by macOS archivers
+            if info.is_dir() or member_name.startswith('__MACOSX/'):
+                continue
+            if not is_scan_file(member_name):
+                continue
+
+            with archive.open(info) as member:
+                with wrap_text_stream(member, member_name) as text_stream:
+                    yield member_name, text_stream
+
+
+def iter_scan_readers(source):
+    """Yield (name, rows) for every scan file in a source, header row first
+
+    Works like iter_scan_files but also accepts Parquet and Arrow IPC files,
+    so loaders can treat text and columnar inputs the same way.
+    """
+    if hasattr(source, 'read'):
+        name = getattr(source, 'name', '') or ''
+    else:
+        name = source
+
+    if is_columnar_file(name):
+        yield name, read_columnar_rows(source, name)
+        return
+
+    if not hasattr(source, 'read') and os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if os.path.isfile(path) and is_columnar_file(entry):
+                yield path, read_columnar_rows(path, path)
+            elif os.path.isfile(path) and (is_scan_file(entry) or is_zip_file(entry)):
+                yield from iter_scan_readers(path)
+        return
+
+    for file_name, text_stream in iter_scan_files(source):
+        yield file_name, csv.reader(text_stream)
+
+
+def read_scan_frame(source, name=None):
+    """Read a Parquet or Arrow IPC file into a pandas DataFrame"""
+    import pandas as pd
+
+    name = name or getattr(source, 'name', None) or source
+    if name.lower().endswith('.parquet'):
+        return pd.read_parquet(source)
+    return pd.read_feather(source)
+
+
+def read_columnar_rows(source, name=None):
+    """Yield the header and then every row of a columnar file as tuples of strings"""
+    frame = read_scan_frame(source, name)
+    yield [str(column) for column in frame.columns]
+    yield from zip(*(decode_column(frame[column]) for column in frame.columns))
+
+
+def decode_column(series):
+    """Convert a column to a list of strings, formatting each distinct value once"""
+    import numpy as np
+    import pandas as pd
+
+    # Dictionary-encoded columns are already factorized, and repeated
+    # timestamps only need formatting once
+    codes, uniques = pd.factorize(series)
+    if isinstance(uniques, pd.DatetimeIndex):
+        labels = uniques.strftime(timestamp_format(uniques)).tolist()
+    else:
+        labels = [str(value) for value in uniques]
+
+    # Missing values get code -1, which picks the trailing blank label
+    labels.append('')
+    return np.asarray(labels, dtype=object)[codes].tolist()
+
+
+def timestamp_format(timestamps):
+    """Return the strftime format that writes timestamps back without dropping fractions or offsets"""
+    file_format = TIMESTAMP_FORMAT
+    if (timestamps.microsecond != 0).any():
+        file_format += '.%f'
+    if timestamps.tz is not None:
+        file_format += '%z'
+    return file_format
+
+
+def parse_timestamps(series):
+    """Parse a text column to timestamps, or return None if any non-empty value cannot be parsed
+
+    ISO 8601 variants (unpadded hours, a T separator, fractions) parse
+    directly. Other layouts are kept only if reading them day first gives
+    the same times, so 04/05/2025 is never silently taken as April or May.
+    """
+    import pandas as pd
+
+    values = pd.Index(series.unique())
+    values = values[values != '']
+    try:
+        parsed = pd.to_datetime(values, format='ISO8601', errors='coerce')
+        if parsed.isna().any():
+            parsed = pd.to_datetime(values, format='mixed', errors='coerce')
+            if not parsed.equals(pd.to_datetime(values, format='mixed', dayfirst=True, errors='coerce')):
+                return None
+    except (ValueError, TypeError):
+        # Mixed time zones, out of range dates
+        return None
+    if parsed.isna().any():
+        return None
+    return series.map(pd.Series(parsed, index=values))
+
+
+def rows_to_frame(headers, rows):
+    """Build a DataFrame from rows with dictionary-encoded text columns
+
+    Timestamp columns are stored as timestamps when every value parses,
+    otherwise as text like the other columns.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame(list(rows), columns=list(headers))
+    for column in frame.columns:
+        timestamps = None
+        if str(column).lower() in TIMESTAMP_COLUMNS:
+            timestamps = parse_timestamps(frame[column])
+        if timestamps is not None:
+            frame[column] = timestamps
+        else:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def write_frame(frame, destination, file_format):
+    """Write a DataFrame as 'parquet' or 'feather' to a path or binary buffer"""
+    if file_format == 'parquet':
+        frame.to_parquet(destination, index=False)
+    elif file_format == 'feather':
+        frame.to_feather(destination)
+    else:
+        raise ValueError(f"Unsupported columnar format: {file_format}")
+
+
+def columnar_format(file_path):
+    """Return 'parquet' or 'feather' for a columnar file name"""
+    return 'parquet' if file_path.lower().endswith('.parquet') else 'feather'
+
+
+def write_table(file_path, headers, rows):
+    """Write rows to CSV (optionally compressed), Parquet or Arrow IPC based on the extension"""
+    if is_columnar_file(file_path):
+        write_frame(rows_to_frame(headers, rows), file_path, columnar_format(file_path))
+        return
+
+    with open_output_file(file_path) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+
+def table_to_bytes(headers, rows, file_format):
+    """Serialize rows for a download button as 'csv', 'parquet' or 'feather' bytes"""
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    buffer = io.BytesIO()
+    write_frame(rows_to_frame(headers, rows), buffer, file_format)
+    return buffer.getvalue()
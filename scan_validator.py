@@ -0,0 +1,212 @@
+import argparse
+import csv
+import hashlib
+import math
+import os
+import re
+import tempfile
+
+from bins import is_empty_sku
+from scan_io import iter_scan_readers
+
+# Column names used by the scan exports (matched case insensitively)
+SKU_COLUMN = "garment_sku"
+LOCATION_COLUMN = "location_id"
+
+# Full bin location grammar, e.g. R1S32-N-AT1:
+# R<level><aisle letter><two digit row>-<side N, S or NS>-<slot or FULL>
+LOCATION_PATTERN = re.compile(r"^R(\d)([A-Z])(\d{2})-(N|S|NS)-([A-Z]{1,2}\d|FULL)$")
+
+
+class HyperLogLog:
+    """Fixed-size sketch for estimating the number of distinct values"""
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+
+        # Bias correction constant for the harmonic mean
+        self.alpha = 0.7213 / (1 + 1.079 / self.num_registers)
+
+    def add(self, value):
+        """Add a string value to the sketch"""
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+
+        # First bits pick the register, the rest give the rank of the first 1 bit
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Merge another sketch with the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        for idx, rank in enumerate(other.registers):
+            if rank > self.registers[idx]:
+                self.registers[idx] = rank
+
+    def count(self):
+        """Return the estimated number of distinct values added"""
+        m = self.num_registers
+        estimate = self.alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+
+        # Small range correction: fall back to linear counting
+        zero_registers = self.registers.count(0)
+        if estimate <= 2.5 * m and zero_registers:
+            estimate = m * math.log(m / zero_registers)
+
+        return int(round(estimate))
+
+
+def resolve_columns(headers):
+    """Find the garment_sku and location_id column indices from the header row"""
+    sku_idx = None
+    location_idx = None
+
+    for idx, header in enumerate(headers):
+        name = header.strip().lower()
+        if name == SKU_COLUMN:
+            sku_idx = idx
+        elif name == LOCATION_COLUMN:
+            location_idx = idx
+
+    if sku_idx is None or location_idx is None:
+        raise ValueError("CSV file must contain 'garment_sku' and 'location_id' columns")
+
+    return sku_idx, location_idx
+
+
+def is_placeable_location(location):
+    """Check whether the grid visualizer can place this location on the grid"""
+    return len(location) >= 5 and location.startswith('R')
+
+
+def count_distinct_pairs_exact(pairs, spill_dir=None, partitions=64):
+    """Count distinct (sku, location) pairs exactly by spilling hash partitions to disk
+
+    Only one partition is held in memory at a time, so peak memory is roughly
+    the size of the largest partition instead of the whole file.
+    """
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="scan_validator_") as tmp_dir:
+        # Spill every pair into the partition picked by its hash
+        paths = [os.path.join(tmp_dir, f"part_{idx:03d}.csv") for idx in range(partitions)]
+        files = [open(path, 'w', newline='', encoding='utf-8') for path in paths]
+        try:
+            writers = [csv.writer(file) for file in files]
+            for sku, location in pairs:
+                key = f"{sku}\x1f{location}".encode("utf-8")
+                digest = hashlib.blake2b(key, digest_size=8).digest()
+                writers[int.from_bytes(digest, "big") % partitions].writerow((sku, location))
+        finally:
+            for file in files:
+                file.close()
+
+        # Equal pairs always land in the same partition, so counts can be summed
+        distinct = 0
+        for path in paths:
+            with open(path, 'r', newline='', encoding='utf-8') as file:
+                distinct += len({tuple(row) for row in csv.reader(file)})
+
+        return distinct
+
+
+def validate_scan_file(file_path, exact=False, precision=14, spill_dir=None, partitions=64):
+    """Validate a scan file or archive in a single streaming pass and return a report dict"""
+    report = {
+        "file": file_path,
+        "rows": 0,
+        "short_rows": 0,
+        "empty_skus": 0,
+        "unplaceable_locations": 0,
+        "malformed_locations": 0,
+        "approx_distinct_pairs": 0,
+        "exact_distinct_pairs": None,
+    }
+    sketch = HyperLogLog(precision)
+
+    def iter_pairs():
+        # Yield pairs while updating the report, so exact mode stays single pass.
+        # Compressed files and zip archives are decompressed as they stream.
+        for file_name, reader in iter_scan_readers(file_path):
+            headers = next(reader, None)
+            if headers is None:
+                continue
+            sku_idx, location_idx = resolve_columns(headers)
+            min_length = max(sku_idx, location_idx) + 1
+
+            for row in reader:
+                report["rows"] += 1
+                if len(row) < min_length:
+                    report["short_rows"] += 1
+                    continue
+
+                sku = row[sku_idx]
+                location = row[location_idx]
+
+                if is_empty_sku(sku):
+                    report["empty_skus"] += 1
+                if not is_placeable_location(location):
+                    report["unplaceable_locations"] += 1
+                if not LOCATION_PATTERN.match(location):
+                    report["malformed_locations"] += 1
+
+                sketch.add(f"{sku}\x1f{location}")
+                yield sku, location
+
+    if exact:
+        report["exact_distinct_pairs"] = count_distinct_pairs_exact(
+            iter_pairs(), spill_dir=spill_dir, partitions=partitions)
+    else:
+        for _ in iter_pairs():
+            pass
+
+    report["approx_distinct_pairs"] = sketch.count()
+    return report
+
+
+def print_report(report):
+    """Print a validation report in the same style as the old check_combined script"""
+    valid_rows = report["rows"] - report["short_rows"]
+    print(f"File: {report['file']}")
+    print(f"Total rows in file (excluding header): {report['rows']}")
+    print(f"Rows missing columns: {report['short_rows']}")
+    print(f"Empty SKUs: {report['empty_skus']}")
+    print(f"Locations that cannot be placed on the grid: {report['unplaceable_locations']}")
+    print(f"Malformed locations: {report['malformed_locations']}")
+    print(f"Approximate unique SKU-Location pairs: {report['approx_distinct_pairs']}")
+
+    if report["exact_distinct_pairs"] is not None:
+        print(f"Unique SKU-Location pairs: {report['exact_distinct_pairs']}")
+        print(f"All SKU-Location pairs are unique: {valid_rows == report['exact_distinct_pairs']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate warehouse scan CSV files")
+    parser.add_argument("files", nargs="+", help="Scan files, compressed files, zip archives or folders")
+    parser.add_argument("--exact", action="store_true",
+                        help="Also count distinct pairs exactly, spilling to disk")
+    parser.add_argument("--precision", type=int, default=14,
+                        help="HyperLogLog precision (registers = 2**precision)")
+    parser.add_argument("--spill-dir", default=None,
+                        help="Directory for exact mode temporary files")
+    parser.add_argument("--partitions", type=int, default=64,
+                        help="Number of on-disk partitions used by exact mode")
+    args = parser.parse_args(argv)
+
+    for file_path in args.files:
+        report = validate_scan_file(file_path, exact=args.exact, precision=args.precision,
+                                    spill_dir=args.spill_dir, partitions=args.partitions)
+        print_report(report)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import csv
+import io
+import re
+import time
+from collections import defaultdict
+
+from bins import grid_cell, is_empty_sku
+from scan_io import iter_scan_files, write_table
+from snapshot_diff import load_scan_pairs
+
+# Pick lists may separate SKUs with newlines, commas, semicolons or tabs.
+# Spaces are not separators because some SKUs contain them (e.g. "3001 3XL AG").
+SKU_SEPARATORS = re.compile(r"[\r\n,;\t]+")
+
+# Header names that mark the SKU column of an uploaded pick list
+PICK_LIST_COLUMNS = ("garment_sku", "sku")
+
+EXPORT_HEADERS = ["SKU", "Status", "Bin Locations", "Grid Cells"]
+
+
+def parse_sku_list(text):
+    """Split pasted text into unique upper-case SKUs, keeping their first-seen order"""
+    skus = (sku.strip() for sku in SKU_SEPARATORS.split(text.upper()))
+    return list(dict.fromkeys(sku for sku in skus if sku))
+
+
+def read_sku_list(source):
+    """Read SKUs from a pick list file (path or uploaded file object)
+
+    A file with a garment_sku or sku header is read from that column; any
+    other file is treated as plain text with one or more SKUs per line.
+    """
+    skus = []
+    for file_name, text_stream in iter_scan_files(source):
+        text = text_stream.read()
+        rows = csv.reader(io.StringIO(text))
+        headers = [header.strip().lower() for header in next(rows, [])]
+        sku_column = next((headers.index(name) for name in PICK_LIST_COLUMNS if name in headers), None)
+        if sku_column is None:
+            skus.append(text)
+        else:
+            skus.extend(row[sku_column] for row in rows if len(row) > sku_column)
+    return parse_sku_list("\n".join(skus))
+
+
+class SkuIndex:
+    """Hash index from upper-case SKU to the bin locations holding it
+
+    Built once per loaded dataset; a lookup of any number of SKUs is then
+    one dictionary probe per SKU instead of a full pass over the data.
+    """
+
+    def __init__(self, pairs):
+        self.locations = defaultdict(list)
+        for sku, location in pairs:
+            self.locations[sku.strip().upper()].append(location)
+        self.locations.pop("", None)
+        self.locations.pop("EMPTY", None)
+        self.locations = dict(self.locations)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def lookup(self, skus):
+        """Resolve SKUs in one pass and return a PickListResult"""
+        skus = [sku.upper() for sku in skus if not is_empty_sku(sku)]
+        resolved = list(map(self.locations.get, skus))
+        return PickListResult(skus, resolved)
+
+
+class PickListResult:
+    """Outcome of a batch lookup: where each found SKU is and which were not found"""
+
+    def __init__(self, skus, resolved):
+        self.found = {sku: locations for sku, locations in zip(skus, resolved) if locations}
+        self.not_found = [sku for sku, locations in zip(skus, resolved) if not locations]
+
+        self.cells = set()
+        for locations in self.found.values():
+            self.cells.update(map(grid_cell, locations))
+        self.cells.discard(None)
+
+    def summary(self):
+        """Return a one-line description of the lookup for status bars"""
+        return (f"Pick list: {len(self.found)} SKUs found in {len(self.cells)} cells, "
+                f"{len(self.not_found)} not found")
+
+    def export_rows(self):
+        """Return rows for EXPORT_HEADERS: found SKUs in pick list order, then the missing ones"""
+        rows = []
+        for sku, locations in self.found.items():
+            cells = sorted({"".join(cell) for cell in map(grid_cell, locations) if cell})
+            rows.append([sku, "Found", ", ".join(sorted(locations)), ", ".join(cells)])
+        for sku in self.not_found:
+            rows.append([sku, "Not Found", "", ""])
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the bins of every SKU on a pick list")
+    parser.add_argument("scan", help="Scan file, archive or columnar file to search")
+    parser.add_argument("pick_list", help="Pick list file (one SKU per line, or a CSV with a sku column)")
+    parser.add_argument("--output", help="Write the resolved list to a CSV, Parquet or Arrow file")
+    args = parser.parse_args(argv)
+
+    index = SkuIndex(load_scan_pairs(args.scan))
+    skus = read_sku_list(args.pick_list)
+
+    start = time.perf_counter()
+    result = index.lookup(skus)
+    elapsed = time.perf_counter() - start
+
+    print(f"{result.summary()} ({len(skus)} SKUs resolved in {elapsed * 1000:.1f} ms)")
+    for sku in result.not_found:
+        print(f"Not found: {sku}")
+
+    if args.output:
+        write_table(args.output, EXPORT_HEADERS, result.export_rows())
+        print(f"Wrote {len(skus)} SKUs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+from collections import defaultdict
+
+from bins import grid_cell, is_empty_sku
+from scan_io import write_table
+from snapshot_diff import load_scan_pairs
+
+# SKUs are a style prefix plus a size suffix, e.g. YTVTL90XS = style YTVTL90, size XS
+SKU_LENGTH = 9
+STYLE_LENGTH = 7
+
+EXPORT_HEADERS = ["Style", "Sizes", "Grid Cells", "Bin Locations"]
+
+
+def parse_sku(sku, style_length=STYLE_LENGTH):
+    """Split a SKU into (style, size), or return None if it is not a style SKU"""
+    sku = sku.strip().upper()
+    if len(sku) != SKU_LENGTH or is_empty_sku(sku):
+        return None
+    return sku[:style_length], sku[style_length:]
+
+
+class StyleIndex:
+    """Index from style to sizes to the bins holding them
+
+    Built once per dataset, so every bin holding any size of a style is a
+    dictionary lookup instead of a substring scan over the rows. Repeated
+    (sku, location) rows are indexed once.
+    """
+
+    def __init__(self, pairs, style_length=STYLE_LENGTH):
+        self.style_length = style_length
+
+        # style -> size -> list of bin locations
+        self.styles = defaultdict(lambda: defaultdict(list))
+        for sku, location in dict.fromkeys(pairs):
+            self.add(sku, location)
+
+    def __len__(self):
+        return len(self.styles)
+
+    def add(self, sku, location):
+        """Index one bin holding a SKU; non-style SKUs and off-grid locations are ignored"""
+        parsed = parse_sku(sku, self.style_length)
+        if parsed and grid_cell(location):
+            style, size = parsed
+            self.styles[style][size].append(location)
+
+    def discard(self, sku, location):
+        """Remove one bin holding a SKU, if indexed"""
+        parsed = parse_sku(sku, self.style_length)
+        if not parsed:
+            return
+        style, size = parsed
+        sizes = self.styles.get(style)
+        locations = sizes.get(size) if sizes else None
+        if locations and location in locations:
+            locations.remove(location)
+            if not locations:
+                del sizes[size]
+            if not sizes:
+                del self.styles[style]
+
+    def normalize(self, style):
+        """Upper-case a style, accepting a full SKU in place of its style"""
+        style = style.strip().upper()
+        if len(style) == SKU_LENGTH:
+            style = style[:self.style_length]
+        return style
+
+    def sizes(self, style):
+        """Return {size: [bin locations]} for a style (empty if unknown)"""
+        return self.styles.get(self.normalize(style), {})
+
+    def locations(self, style):
+        """Return every bin location holding any size of a style"""
+        return sorted(location for locations in self.sizes(style).values() for location in locations)
+
+    def cells(self, style):
+        """Return the grid cells holding any size of a style"""
+        return set(map(grid_cell, self.locations(style)))
+
+    def duplicate_styles(self):
+        """Return {style: cells} for styles whose sizes are spread over more than one grid cell"""
+        duplicates = {}
+        for style, sizes in self.styles.items():
+            cells = {grid_cell(location) for locations in sizes.values() for location in locations}
+            if len(cells) > 1:
+                duplicates[style] = cells
+        return duplicates
+
+    def export_duplicate_rows(self):
+        """Return rows for EXPORT_HEADERS, one per style spread over several cells"""
+        rows = []
+        for style, cells in sorted(self.duplicate_styles().items()):
+            rows.append([
+                style,
+                ", ".join(sorted(self.styles[style])),
+                ", ".join(sorted("".join(cell) for cell in cells)),
+                ", ".join(self.locations(style)),
+            ])
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up styles or report styles spread over several grid cells")
+    parser.add_argument("scan", help="Scan file, archive or columnar file")
+    parser.add_argument("styles", nargs="*", help="Styles (or full SKUs) to look up")
+    parser.add_argument("--style-length", type=int, default=STYLE_LENGTH,
+                        help="Number of leading SKU characters that make up the style")
+    parser.add_argument("--duplicates", help="Write the style-level duplicate report to this file")
+    args = parser.parse_args(argv)
+
+    index = StyleIndex(load_scan_pairs(args.scan), style_length=args.style_length)
+    print(f"Indexed {len(index)} styles")
+
+    for style in args.styles:
+        sizes = index.sizes(style)
+        print(f"{index.normalize(style)}: {len(sizes)} sizes")
+        for size, locations in sorted(sizes.items()):
+            print(f"  {size}: {', '.join(sorted(locations))}")
+
+    if args.duplicates:
+        rows = index.export_duplicate_rows()
+        write_table(args.duplicates, EXPORT_HEADERS, rows)
+        print(f"Wrote {len(rows)} styles spread over several grid cells to {args.duplicates}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import time
+from collections import defaultdict
+from itertools import compress
+from operator import itemgetter
+
+from bins import grid_cell, is_empty_sku
+from scan_io import iter_scan_readers, write_table
+from scan_validator import resolve_columns
+
+# Diff categories in overlay priority order (a cell shows the first that applies)
+NEWLY_EMPTY = "newly_empty"
+NEWLY_FILLED = "newly_filled"
+MOVED = "moved"
+VANISHED = "vanished"
+CATEGORIES = [NEWLY_EMPTY, NEWLY_FILLED, MOVED, VANISHED]
+
+CATEGORY_LABELS = {
+    NEWLY_EMPTY: "Newly empty bins",
+    NEWLY_FILLED: "Newly filled bins",
+    MOVED: "Moved SKUs",
+    VANISHED: "Vanished SKUs",
+}
+
+# Overlay colors shared by both front ends (Tk and Plotly color names)
+CATEGORY_COLORS = {
+    NEWLY_EMPTY: "red",
+    NEWLY_FILLED: "blue",
+    MOVED: "purple",
+    VANISHED: "gray",
+}
+
+EXPORT_HEADERS = ["Change", "SKU", "Old Bin Locations", "New Bin Locations"]
+
+
+class ScanSide:
+    """Distinct placements, SKUs and occupied bins of one scan, ignoring empty markers
+
+    The emptiness check runs once per distinct SKU, and the per-row work
+    stays inside set, map and compress so large scans diff quickly.
+    """
+
+    def __init__(self, pairs):
+        self.placements = set(pairs)
+        self.skus = set(map(itemgetter(0), self.placements))
+
+        empty_skus = {sku for sku in self.skus if is_empty_sku(sku)}
+        if empty_skus:
+            self.skus -= empty_skus
+            is_empty = map(empty_skus.__contains__, map(itemgetter(0), self.placements))
+            self.placements -= set(compress(self.placements, is_empty))
+
+        # A bin is occupied when it holds at least one real SKU
+        self.occupied = set(map(itemgetter(1), self.placements))
+
+
+def load_scan_pairs(source):
+    """Load (sku, location) pairs from any scan file, archive or columnar file"""
+    pairs = []
+    for file_name, reader in iter_scan_readers(source):
+        headers = next(reader, None)
+        if headers is None:
+            continue
+        sku_idx, location_idx = resolve_columns(headers)
+        min_length = max(sku_idx, location_idx) + 1
+        pairs.extend((row[sku_idx], row[location_idx]) for row in reader if len(row) >= min_length)
+    return pairs
+
+
+class SnapshotDiff:
+    """Differences between an older and a newer scan of the warehouse
+
+    Pairs are hash-joined on (sku, location): a pair present on only one side
+    is a placement that disappeared or appeared. Those placements are then
+    grouped by SKU (moved or vanished SKUs) and by bin (newly empty or newly
+    filled bins). Work is proportional to the number of rows on both sides.
+    """
+
+    def __init__(self, old_pairs, new_pairs):
+        old_side = ScanSide(old_pairs)
+        new_side = ScanSide(new_pairs)
+
+        # Placements that only exist on one side of the join
+        removed = old_side.placements - new_side.placements
+        added = new_side.placements - old_side.placements
+
+        self.unchanged_count = len(old_side.placements) - len(removed)
+
+        # Group the one-sided placements by SKU
+        removed_by_sku = defaultdict(set)
+        for sku, location in removed:
+            removed_by_sku[sku].add(location)
+        added_by_sku = defaultdict(set)
+        for sku, location in added:
+            added_by_sku[sku].add(location)
+
+        old_skus = old_side.skus
+        new_skus = new_side.skus
+
+        # SKU -> (old locations it left, new locations it arrived at)
+        self.moved_skus = {}
+        for sku in (removed_by_sku.keys() | added_by_sku.keys()) & old_skus & new_skus:
+            self.moved_skus[sku] = (sorted(removed_by_sku.get(sku, ())),
+                                    sorted(added_by_sku.get(sku, ())))
+
+        # SKU -> locations it was last seen at
+        self.vanished_skus = {sku: sorted(removed_by_sku[sku]) for sku in old_skus - new_skus}
+
+        # SKU -> locations where a never-seen SKU appeared
+        self.new_skus = {sku: sorted(added_by_sku[sku]) for sku in new_skus - old_skus}
+
+        self.newly_empty_bins = sorted(old_side.occupied - new_side.occupied)
+        self.newly_filled_bins = sorted(new_side.occupied - old_side.occupied)
+
+    def summary(self):
+        """Return counts for each kind of change"""
+        return {
+            MOVED: len(self.moved_skus),
+            VANISHED: len(self.vanished_skus),
+            NEWLY_EMPTY: len(self.newly_empty_bins),
+            NEWLY_FILLED: len(self.newly_filled_bins),
+            "new_skus": len(self.new_skus),
+            "unchanged_placements": self.unchanged_count,
+        }
+
+    def cell_categories(self):
+        """Return {(column, row): category} for the grid overlay"""
+        cells = defaultdict(set)
+        for location in self.newly_empty_bins:
+            cells[grid_cell(location)].add(NEWLY_EMPTY)
+        for location in self.newly_filled_bins:
+            cells[grid_cell(location)].add(NEWLY_FILLED)
+        for old_locations, new_locations in self.moved_skus.values():
+            for location in old_locations + new_locations:
+                cells[grid_cell(location)].add(MOVED)
+        for locations in self.vanished_skus.values():
+            for location in locations:
+                cells[grid_cell(location)].add(VANISHED)
+
+        # Bins that cannot be placed on the grid have no cell
+        cells.pop(None, None)
+        return {cell: next(category for category in CATEGORIES if category in categories)
+                for cell, categories in cells.items()}
+
+    def export_rows(self):
+        """Return rows for EXPORT_HEADERS, one per changed SKU or bin"""
+        rows = []
+        for sku, (old_locations, new_locations) in sorted(self.moved_skus.items()):
+            rows.append(["Moved", sku, ", ".join(old_locations), ", ".join(new_locations)])
+        for sku, locations in sorted(self.vanished_skus.items()):
+            rows.append(["Vanished", sku, ", ".join(locations), ""])
+        for sku, locations in sorted(self.new_skus.items()):
+            rows.append(["New SKU", sku, "", ", ".join(locations)])
+        for location in self.newly_empty_bins:
+            rows.append(["Newly Empty", "", location, ""])
+        for location in self.newly_filled_bins:
+            rows.append(["Newly Filled", "", "", location])
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show what changed between two warehouse scans")
+    parser.add_argument("old", help="Older scan file (e.g. yesterday)")
+    parser.add_argument("new", help="Newer scan file (e.g. today)")
+    parser.add_argument("--output", help="Write every change to a CSV, Parquet or Arrow file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    old_pairs = load_scan_pairs(args.old)
+    new_pairs = load_scan_pairs(args.new)
+    loaded = time.perf_counter()
+    diff = SnapshotDiff(old_pairs, new_pairs)
+    finished = time.perf_counter()
+
+    print(f"Loaded {len(old_pairs)} + {len(new_pairs)} rows in {loaded - start:.2f}s, "
+          f"diffed in {finished - loaded:.2f}s")
+    for key, count in diff.summary().items():
+        print(f"{CATEGORY_LABELS.get(key, key.replace('_', ' ').capitalize())}: {count}")
+
+    if args.output:
+        rows = diff.export_rows()
+        write_table(args.output, EXPORT_HEADERS, rows)
+        print(f"Wrote {len(rows)} changes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
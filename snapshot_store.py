@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from scan_io import decode_column, iter_scan_readers, write_table
+from scan_validator import resolve_columns
+
+# Columns stored for every scan event, in the layout the visualizers read
+TIME_COLUMN = 'match_date_time'
+SKU_COLUMN = 'garment_sku'
+LOCATION_COLUMN = 'location_id'
+EVENT_COLUMNS = [TIME_COLUMN, SKU_COLUMN, LOCATION_COLUMN]
+
+INDEX_FILE = 'index.json'
+INDEX_VERSION = 1
+
+# Default number of events between checkpoints, which bounds the replay
+# needed to answer an as-of query
+DEFAULT_CHECKPOINT_INTERVAL = 250000
+
+
+class SnapshotStore:
+    """Append-only, time-indexed history of scan events with periodic checkpoints
+
+    Events are stored as time-sorted Parquet segments. index.json records the
+    time range of every segment, plus checkpoints that hold the full bin state
+    (the latest scan of every bin) after a given number of segments. An as-of
+    query loads the newest checkpoint at or before the requested time and
+    replays at most one checkpoint interval of events on top of it.
+    """
+
+    def __init__(self, root_dir, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, INDEX_FILE)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as index_file:
+                self.index = json.load(index_file)
+            if self.index.get('version') != INDEX_VERSION:
+                raise ValueError(f"Unsupported snapshot store version in {self.index_path}")
+        else:
+            self.index = {
+                'version': INDEX_VERSION,
+                'checkpoint_interval': checkpoint_interval,
+                'segments': [],
+                'checkpoints': [],
+            }
+
+    @property
+    def checkpoint_interval(self):
+        return self.index['checkpoint_interval']
+
+    @property
+    def segments(self):
+        return self.index['segments']
+
+    @property
+    def checkpoints(self):
+        return self.index['checkpoints']
+
+    def total_rows(self):
+        """Return the number of events stored"""
+        return sum(segment['rows'] for segment in self.segments)
+
+    def time_range(self):
+        """Return (first, last) event times as pandas Timestamps, or (None, None) if empty"""
+        import pandas as pd
+
+        if not self.segments:
+            return None, None
+        return (pd.Timestamp(self.segments[0]['min_time']),
+                pd.Timestamp(self.segments[-1]['max_time']))
+
+    def save_index(self):
+        """Write index.json atomically so readers never see a partial index"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as index_file:
+            json.dump(self.index, index_file, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def read_events(self, sources):
+        """Read scan files into one time-sorted event DataFrame
+
+        Rows whose timestamp cannot be parsed are dropped, since they cannot
+        be placed on the timeline.
+        """
+        import pandas as pd
+
+        frames = []
+        for source in sources:
+            for file_name, reader in iter_scan_readers(source):
+                headers = next(reader, None)
+                if headers is None:
+                    continue
+                sku_idx, location_idx = resolve_columns(headers)
+                lowered = [header.strip().lower() for header in headers]
+                if TIME_COLUMN not in lowered:
+                    raise ValueError(f"{file_name} has no '{TIME_COLUMN}' column")
+                time_idx = lowered.index(TIME_COLUMN)
+
+                min_length = max(time_idx, sku_idx, location_idx) + 1
+                rows = [(row[time_idx], row[sku_idx], row[location_idx])
+                        for row in reader if len(row) >= min_length]
+                frames.append(pd.DataFrame(rows, columns=EVENT_COLUMNS))
+
+        if not frames:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        events = pd.concat(frames, ignore_index=True)
+        events[TIME_COLUMN] = pd.to_datetime(events[TIME_COLUMN], errors='coerce')
+        events = events.dropna(subset=[TIME_COLUMN])
+
+        # Stable sort keeps file order for scans with the same timestamp
+        return events.sort_values(TIME_COLUMN, kind='stable').reset_index(drop=True)
+
+    def ingest(self, sources):
+        """Append the events from scan files to the store and return the number added
+
+        The store is append-only: the new events must not start before the
+        last stored event. Ingest several days at once to have them sorted
+        together.
+        """
+        events = self.read_events(sources)
+        if events.empty:
+            return 0
+
+        _, last_time = self.time_range()
+        if last_time is not None and events[TIME_COLUMN].iloc[0] < last_time:
+            raise ValueError(
+                f"Events start at {events[TIME_COLUMN].iloc[0]}, before the last stored "
+                f"event at {last_time}; the snapshot store is append-only")
+
+        # Split into segments so no more than one checkpoint interval of
+        # events ever needs replaying
+        rows_since_checkpoint = self.rows_since_checkpoint()
+        start = 0
+        while start < len(events):
+            take = max(1, self.checkpoint_interval - rows_since_checkpoint)
+            chunk = events.iloc[start:start + take]
+            self.write_segment(chunk)
+            rows_since_checkpoint += len(chunk)
+            start += len(chunk)
+
+            if rows_since_checkpoint >= self.checkpoint_interval:
+                self.write_checkpoint()
+                rows_since_checkpoint = 0
+
+        self.save_index()
+        return len(events)
+
+    def rows_since_checkpoint(self):
+        """Return the number of events stored after the last checkpoint"""
+        first_segment = self.checkpoints[-1]['segment_count'] if self.checkpoints else 0
+        return sum(segment['rows'] for segment in self.segments[first_segment:])
+
+    def write_segment(self, events):
+        """Write a sorted chunk of events as the next Parquet segment"""
+        file_name = f"segment_{len(self.segments):06d}.parquet"
+        frame = events.copy()
+        frame[SKU_COLUMN] = frame[SKU_COLUMN].astype('category')
+        frame[LOCATION_COLUMN] = frame[LOCATION_COLUMN].astype('category')
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        frame.to_parquet(os.path.join(self.root_dir, file_name), index=False)
+
+        self.segments.append({
+            'file': file_name,
+            'rows': len(frame),
+            'min_time': frame[TIME_COLUMN].iloc[0].isoformat(),
+            'max_time': frame[TIME_COLUMN].iloc[-1].isoformat(),
+        })
+
+    def write_checkpoint(self):
+        """Write the bin state after all current segments as a checkpoint"""
+        state = self.state_frame_as_of(None)
+        file_name = f"checkpoint_{len(self.checkpoints):06d}.parquet"
+        state.to_parquet(os.path.join(self.root_dir, file_name), index=False)
+
+        self.checkpoints.append({
+            'file': file_name,
+            'segment_count': len(self.segments),
+            'time': self.segments[-1]['max_time'],
+            'bins': len(state),
+        })
+
+    def read_part(self, file_name):
+        """Read one segment or checkpoint file"""
+        import pandas as pd
+
+        return pd.read_parquet(os.path.join(self.root_dir, file_name))
+
+    def state_frame_as_of(self, as_of):
+        """Return the latest scan of every bin at or before as_of (None for the newest state)"""
+        import pandas as pd
+
+        if as_of is not None:
+            as_of = pd.Timestamp(as_of)
+
+        # Newest checkpoint that does not pass the requested time
+        checkpoint = None
+        for candidate in self.checkpoints:
+            if as_of is None or pd.Timestamp(candidate['time']) <= as_of:
+                checkpoint = candidate
+            else:
+                break
+
+        frames = []
+        first_segment = 0
+        if checkpoint:
+            frames.append(self.read_part(checkpoint['file']))
+            first_segment = checkpoint['segment_count']
+
+        # Replay the events between the checkpoint and the requested time
+        for segment in self.segments[first_segment:]:
+            if as_of is not None and pd.Timestamp(segment['min_time']) > as_of:
+                break
+            events = self.read_part(segment['file'])
+            if as_of is not None and pd.Timestamp(segment['max_time']) > as_of:
+                cutoff = events[TIME_COLUMN].searchsorted(as_of, side='right')
+                events = events.iloc[:cutoff]
+            frames.append(events)
+
+        if not frames:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        # Later scans of a bin replace earlier ones
+        for frame in frames:
+            frame[SKU_COLUMN] = frame[SKU_COLUMN].astype(str)
+            frame[LOCATION_COLUMN] = frame[LOCATION_COLUMN].astype(str)
+        state = pd.concat(frames, ignore_index=True)
+        state = state.drop_duplicates(subset=[LOCATION_COLUMN], keep='last')
+        return state.reset_index(drop=True)
+
+    def rows_as_of(self, as_of):
+        """Return the header and rows of the grid state at a time, as a CSV file would have them"""
+        state = self.state_frame_as_of(as_of)
+        columns = [decode_column(state[column]) for column in EVENT_COLUMNS]
+        return list(EVENT_COLUMNS), list(zip(*columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-indexed store of warehouse scan snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Append scan files to a store")
+    ingest_parser.add_argument("store", help="Snapshot store directory")
+    ingest_parser.add_argument("files", nargs="+", help="Scan files, archives or folders")
+    ingest_parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_CHECKPOINT_INTERVAL,
+                               help="Events between checkpoints (new stores only)")
+
+    as_of_parser = subparsers.add_parser("as-of", help="Write the grid state at a point in time")
+    as_of_parser.add_argument("store", help="Snapshot store directory")
+    as_of_parser.add_argument("time", help="Timestamp, e.g. '2025-04-04 17:00:00'")
+    as_of_parser.add_argument("output", help="Output file (.csv, .csv.gz, .parquet, .feather)")
+
+    info_parser = subparsers.add_parser("info", help="Show what a store contains")
+    info_parser.add_argument("store", help="Snapshot store directory")
+
+    args = parser.parse_args(argv)
+
+    # Out-of-order ingests, scan files without timestamps and bad times are
+    # reported in one line rather than as a traceback
+    try:
+        if args.command == "ingest":
+            store = SnapshotStore(args.store, checkpoint_interval=args.checkpoint_interval)
+            start = time.perf_counter()
+            added = store.ingest(args.files)
+            print(f"Ingested {added} events in {time.perf_counter() - start:.2f}s")
+        elif args.command == "as-of":
+            store = SnapshotStore(args.store)
+            start = time.perf_counter()
+            headers, rows = store.rows_as_of(args.time)
+            elapsed = time.perf_counter() - start
+            write_table(args.output, headers, rows)
+            print(f"Wrote {len(rows)} bins as of {args.time} to {args.output} (query {elapsed:.3f}s)")
+        else:
+            store = SnapshotStore(args.store)
+            first_time, last_time = store.time_range()
+            print(f"Events: {store.total_rows()} from {first_time} to {last_time}")
+            print(f"Segments: {len(store.segments)}, checkpoints: {len(store.checkpoints)}, "
+                  f"checkpoint interval: {store.checkpoint_interval}")
+    except ValueError as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
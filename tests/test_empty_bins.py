@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from empty_bins import EmptyBinIndex, cell_position
+
+AISLES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def random_location(rng):
+    return (f"R{rng.randint(1, 2)}{rng.choice(AISLES[:rng.choice([3, 26])])}{rng.randint(1, 90):02d}"
+            f"-{rng.choice('NS')}-{rng.choice(['AD1', 'BD2', 'CT1'])}")
+
+
+def brute_force(empty, query, k):
+    level, aisle, row = cell_position((query[1:3], query[3:5]))
+    distances = []
+    for location in empty:
+        bin_level, bin_aisle, bin_row = cell_position((location[1:3], location[3:5]))
+        if bin_level == level:
+            distances.append(((bin_aisle - aisle) ** 2 + (bin_row - row) ** 2, location))
+    return [location for _, location in sorted(distances)[:k]]
+
+
+@pytest.mark.parametrize("bucket_size", [1, 3, 8, 64])
+def test_nearest_matches_brute_force(bucket_size):
+    rng = random.Random(bucket_size)
+    empty = set()
+    index = EmptyBinIndex(bucket_size=bucket_size)
+    for step in range(1500):
+        location = random_location(rng)
+        # Bins fill and empty as scans arrive
+        if rng.random() < 0.3 and empty:
+            location = rng.choice(sorted(empty))
+            index.discard(location)
+            empty.discard(location)
+        else:
+            index.add(location)
+            empty.add(location)
+
+        if step % 15 == 0:
+            query = random_location(rng)
+            k = rng.choice([0, 1, 5, 20, 500])
+            assert [location for _, location in index.nearest(query, k)] == brute_force(empty, query, k)
+            assert len(index) == len(empty)
+
+
+def test_distances_are_in_grid_cells():
+    index = EmptyBinIndex(["R2E59-N-AD1", "R2E59-S-AD1", "R2H55-N-AD1", "R1E59-N-AD1"])
+    assert index.nearest("2E59", 3) == [(0.0, "R2E59-N-AD1"), (0.0, "R2E59-S-AD1"), (5.0, "R2H55-N-AD1")]
+    assert index.nearest("R3E59-N-AD1") == []
+    with pytest.raises(ValueError):
+        index.nearest("E59")
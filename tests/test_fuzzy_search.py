@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from fuzzy_search import FuzzySkuIndex, levenshtein, query_pieces
+from sku_lookup import SkuIndex
+
+
+def reference_distance(word, other):
+    """Textbook dynamic-programming edit distance"""
+    previous = list(range(len(other) + 1))
+    for row, char in enumerate(word, 1):
+        current = [row]
+        for column, other_char in enumerate(other, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (char != other_char)))
+        previous = current
+    return previous[-1]
+
+
+def mutate(rng, word, edits, alphabet):
+    for _ in range(edits):
+        position = rng.randrange(len(word) + 1)
+        kind = rng.choice("isd") if word else "i"
+        if kind == "i":
+            word = word[:position] + rng.choice(alphabet) + word[position:]
+        elif position < len(word):
+            word = word[:position] + (rng.choice(alphabet) if kind == "s" else "") + word[position + 1:]
+    return word
+
+
+def test_levenshtein_matches_the_reference():
+    rng = random.Random(2)
+    pairs = [("", ""), ("", "ABC"), ("ABC", ""), ("KITTEN", "SITTING"), ("A" * 70, "A" * 68 + "B")]
+    for _ in range(1000):
+        word = "".join(rng.choice("AB01X") for _ in range(rng.randint(0, 12)))
+        pairs.append((word, mutate(rng, word, rng.randint(0, 4), "AB01XZ")))
+    for word, other in pairs:
+        assert levenshtein(word, other) == reference_distance(word, other), (word, other)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_every_near_word_contains_a_query_piece(max_distance):
+    rng = random.Random(max_distance)
+    for _ in range(500):
+        word = "".join(rng.choice("ABCDEF0123") for _ in range(rng.randint(max_distance + 1, 12)))
+        other = mutate(rng, word, max_distance, "ABCDEFXYZ")
+        if reference_distance(word, other) <= max_distance:
+            assert any(piece in other for piece in query_pieces(word, max_distance)), (word, other)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_search_matches_brute_force(max_distance):
+    rng = random.Random(10 + max_distance)
+    alphabet = "ALSTVXY0159"
+    skus = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10))) for _ in range(250)]
+    skus += [mutate(rng, sku, rng.randint(1, 3), alphabet) or "Q" for sku in skus[:120]]
+    index = FuzzySkuIndex(SkuIndex((sku, f"R2E{number % 90:02d}-N-AD1") for number, sku in enumerate(skus)))
+
+    for _ in range(50):
+        query = mutate(rng, rng.choice(skus), rng.randint(0, 3), alphabet)
+        distances = ((reference_distance(query, sku), sku) for sku in set(skus))
+        expected = sorted(match for match in distances if match[0] <= max_distance)
+        assert index.nearest(query, max_distance) == expected, query
@@ -0,0 +1,41 @@
+from grid_replay import GridReplay
+
+
+def test_unpadded_hours_sort_by_time():
+    events = [
+        ("2025-04-04 23:59:10", "SKU-C", "R2E61-N-CD1"),
+        ("2025-04-04 9:05:38", "SKU-A", "R2E61-N-CD1"),
+        ("2025-04-04 10:00:02", "SKU-B", "R2E61-N-CD1"),
+        ("2025-04-04 9:05:59", "SKU-D", "R2E62-N-CD1"),
+    ]
+    replay = GridReplay(events)
+
+    assert [replay.label(position) for position in range(len(replay) + 1)] == [
+        "Start", "2025-04-04 09:05", "2025-04-04 10:00", "2025-04-04 23:59"]
+
+    replay.seek(1)
+    assert replay.bin_state == {"R2E61-N-CD1": "SKU-A", "R2E62-N-CD1": "SKU-D"}
+    replay.seek(len(replay))
+    assert replay.bin_state["R2E61-N-CD1"] == "SKU-C"
+
+
+def test_scans_without_a_timestamp_are_skipped():
+    replay = GridReplay([("", "SKU-A", "R2E61-N-CD1"), ("not a time", "SKU-B", "R2E61-N-CD1"),
+                         ("2025-04-04 17:15:42", "SKU-C", "R2E61-N-CD1")])
+    assert len(replay) == 1
+    assert replay.label(1) == "2025-04-04 17:15"
+
+
+def test_seek_back_and_forth_matches_a_fresh_replay():
+    events = [(f"2025-04-04 {hour}:{minute:02d}:00", f"SKU-{hour}-{minute % 3}", f"R2E{60 + minute % 4}-N-CD1")
+              for hour in range(8, 12) for minute in range(0, 60, 7)]
+    replay = GridReplay(events)
+    for position in [len(replay), 3, 9, 0, 5, len(replay) // 2]:
+        replay.seek(position)
+        fresh = GridReplay(events)
+        fresh.seek(position)
+        assert replay.bin_state == fresh.bin_state
+        assert {column: {row: sorted(entries) for row, entries in rows.items()}
+                for column, rows in replay.grid_data.items()} == \
+               {column: {row: sorted(entries) for row, entries in rows.items()}
+                for column, rows in fresh.grid_data.items()}
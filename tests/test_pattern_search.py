@@ -0,0 +1,46 @@
+import fnmatch
+import random
+import re
+
+from pattern_search import REGEX, SUBSTRING, WILDCARD, PatternIndex, QueryCache
+
+PAIRS = [
+    ("YTVTL90XS", "R2E59"),
+    ("XYTVTL90XS", "R2E70-N-BD1"),
+    ("YTVTL90XL", "R2E61-N-CD1"),
+    ("ALLS1O00M", "R2F05-S-AD1"),
+    ("ALLS1O00S", "R3A15-N-DT2"),
+]
+
+
+def brute_force(pairs, field, matches):
+    return frozenset((location[1:3], location[3:5]) for sku, location in pairs
+                     if matches(sku if field == 'sku' else location))
+
+
+def test_wildcards_match_the_whole_value():
+    index = PatternIndex(PAIRS, QueryCache())
+    assert index.search_cells('location', "*5", WILDCARD) == frozenset()
+    assert index.search_cells('location', "*59", WILDCARD) == {("2E", "59")}
+    assert index.search_cells('location', "2E59", WILDCARD) == frozenset()
+    assert index.search_cells('sku', "YTVTL9?X*", WILDCARD) == {("2E", "59"), ("2E", "61")}
+
+
+def test_searches_match_brute_force():
+    rng = random.Random(1)
+    alphabet = "ALSTVXY019"
+    pairs = [("".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))),
+              f"R{rng.randint(1, 3)}{rng.choice('ABCDEF')}{rng.randint(1, 90):02d}-{rng.choice('NS')}-AD1")
+             for _ in range(300)]
+    index = PatternIndex(pairs, QueryCache())
+
+    for _ in range(300):
+        query = "".join(rng.choice(alphabet + "*?") for _ in range(rng.randint(1, 4)))
+        assert index.search_cells('sku', query, WILDCARD) == \
+            brute_force(pairs, 'sku', lambda value: fnmatch.fnmatchcase(value.upper(), query.upper()))
+
+        text = query.replace("*", "").replace("?", "") or "A"
+        assert index.search_cells('sku', text.lower(), SUBSTRING) == \
+            brute_force(pairs, 'sku', lambda value: text in value)
+        assert index.search_cells('location', f"^R{text[-1]}", REGEX) == \
+            brute_force(pairs, 'location', lambda value: re.match(f"R{text[-1]}", value))
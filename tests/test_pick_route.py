@@ -0,0 +1,98 @@
+import heapq
+import random
+
+import pytest
+
+from pick_route import AisleLayout, PickRoute, nearest_neighbor_tour, tour_length, two_opt
+
+COLUMNS = ["1A", "1B", "1C", "2A", "2B", "2C", "2D", "3B"]
+ROWS = [f"{row:02d}" for row in range(1, 13)]
+
+
+def walking_distances(layout, source):
+    """Dijkstra over the aisle graph: along aisles, across at cross aisles, between levels at the lift"""
+    levels = {point[0] for point in layout.points.values()}
+    aisles = len(layout.aisle_gap)
+    rows = len(layout.via)
+    pitch = layout.aisle_gap[0][1] if aisles > 1 else 1
+
+    def neighbors(node):
+        level, aisle, row = node
+        for other_row in (row - 1, row + 1):
+            if 0 <= other_row < rows:
+                yield (level, aisle, other_row), 1
+        if row in layout.cross_aisles:
+            for other_aisle in (aisle - 1, aisle + 1):
+                if 0 <= other_aisle < aisles:
+                    yield (level, other_aisle, row), pitch
+        if (aisle, row) == (layout.lift_aisle, layout.lift_row):
+            for other_level in levels - {level}:
+                yield (other_level, aisle, row), layout.level_change * abs(int(level) - int(other_level))
+
+    distances = {source: 0}
+    queue = [(0, source)]
+    while queue:
+        distance, node = heapq.heappop(queue)
+        if distance > distances[node]:
+            continue
+        for other, cost in neighbors(node):
+            if distance + cost < distances.get(other, float("inf")):
+                distances[other] = distance + cost
+                heapq.heappush(queue, (distance + cost, other))
+    return distances
+
+
+@pytest.mark.parametrize("cross_aisles", [None, (0, 6, 13), (4,)])
+def test_distances_match_shortest_walks(cross_aisles):
+    layout = AisleLayout(COLUMNS, ROWS, cross_aisles)
+    points = sorted(layout.points.values())
+    matrix = layout.matrix(points)
+    for i, point in enumerate(points):
+        walks = walking_distances(layout, point)
+        for j, other in enumerate(points):
+            assert layout.distance(point, other) == walks[other] == matrix[i][j], (point, other)
+
+            # The path's corners are joined by straight walks that add up to the distance
+            path = layout.path(point, other)
+            assert path[0] == point and path[-1] == other
+            assert sum(layout.distance(start, end) for start, end in zip(path, path[1:])) == walks[other]
+
+
+def improving_move(matrix, tour):
+    size = len(tour)
+    for i in range(size - 1):
+        for j in range(i + 2, size):
+            if i == 0 and j == size - 1:
+                continue
+            a, b, c, d = tour[i], tour[i + 1], tour[j], tour[(j + 1) % size]
+            if matrix[a][c] + matrix[b][d] < matrix[a][b] + matrix[c][d]:
+                return i, j
+    return None
+
+
+def test_two_opt_leaves_no_improving_move():
+    rng = random.Random(4)
+    for _ in range(500):
+        size = rng.randint(1, 25)
+        points = [(rng.randint(0, 20), rng.randint(0, 20)) for _ in range(size)]
+        matrix = [[abs(x - other_x) + abs(y - other_y) for other_x, other_y in points] for x, y in points]
+        tour = nearest_neighbor_tour(matrix)
+        initial = tour_length(matrix, tour)
+
+        two_opt(matrix, tour, neighbors=size)
+        assert tour[0] == 0 and sorted(tour) == list(range(size))
+        assert tour_length(matrix, tour) <= initial
+        if size >= 4:
+            assert improving_move(matrix, tour) is None
+
+
+def test_route_visits_every_placed_cell_once():
+    rng = random.Random(6)
+    layout = AisleLayout(COLUMNS, ROWS)
+    cells = rng.sample(sorted(layout.points), 40) + [("9Z", "01")]
+    route = PickRoute(layout, cells)
+    assert sorted(route.cells) == sorted(cell for cell in cells if cell in layout.points)
+    stops = [route.start] + [layout.point(cell) for cell in route.cells]
+    assert route.length == sum(layout.distance(stops[i - 1], stops[i]) for i in range(len(stops)))
+    assert route.length <= route.initial_length
+    assert route.path()[0] == route.path()[-1] == route.start
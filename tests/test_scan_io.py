@@ -0,0 +1,31 @@
+import pytest
+
+from scan_io import read_columnar_rows, write_table
+
+pytest.importorskip("pyarrow")
+
+HEADERS = ["match_date_time", "garment_sku", "location_id"]
+
+
+def round_trip(tmp_path, extension, timestamps):
+    path = str(tmp_path / f"scans{extension}")
+    write_table(path, HEADERS, [(timestamp, "YTVTL90XS", "R2E61-N-CD1") for timestamp in timestamps])
+    rows = list(read_columnar_rows(path))
+    assert rows[0] == HEADERS
+    return [row[0] for row in rows[1:]]
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_timestamps_survive_a_columnar_round_trip(tmp_path, extension):
+    assert round_trip(tmp_path, extension, ["2025-04-04 17:15:42", ""]) == ["2025-04-04 17:15:42", ""]
+    assert round_trip(tmp_path, extension, ["2025-04-04 9:05:38"]) == ["2025-04-04 09:05:38"]
+    assert round_trip(tmp_path, extension, ["2025-04-04T17:15:42", "2025-04-04 17:15:43.250"]) == \
+        ["2025-04-04 17:15:42.000000", "2025-04-04 17:15:43.250000"]
+
+
+@pytest.mark.parametrize("timestamps", [
+    ["04/05/2025 10:00:00", "03/04/2025 11:00:00"],
+    ["2025-04-04 17:15:42", "soon"],
+])
+def test_unparsed_timestamps_are_kept_as_text(tmp_path, timestamps):
+    assert round_trip(tmp_path, ".parquet", timestamps) == timestamps
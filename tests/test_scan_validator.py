@@ -0,0 +1,67 @@
+import csv
+import random
+import re
+
+import pytest
+
+from scan_validator import HyperLogLog, count_distinct_pairs_exact, validate_scan_file
+
+
+def random_pairs(count, distinct, seed):
+    rng = random.Random(seed)
+    pool = [(f"SKU{idx:07d}", f"R{rng.randint(1, 3)}E{rng.randint(1, 90):02d}-N-AD1") for idx in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+@pytest.mark.parametrize("partitions", [1, 7, 64])
+def test_exact_spill_matches_a_set(tmp_path, partitions):
+    pairs = random_pairs(5000, 1500, seed=partitions)
+    # Values that need quoting must survive the spill files
+    pairs += [('A,"B"', "R2E59-N-AD1"), ("A\nB", "R2E59-N-AD1"), ("É", ""), ('A,"B"', "R2E59-N-AD1")]
+    assert count_distinct_pairs_exact(iter(pairs), spill_dir=str(tmp_path), partitions=partitions) == \
+        len(set(pairs))
+
+
+@pytest.mark.parametrize("distinct", [0, 1, 100, 5000, 60000])
+def test_hyperloglog_estimate_is_close_to_the_exact_count(distinct):
+    sketch = HyperLogLog(precision=14)
+    for value in range(distinct):
+        sketch.add(f"value-{value}")
+        sketch.add(f"value-{value}")
+    # Standard error is 1.04 / sqrt(2 ** 14), under 1%; small counts use linear counting
+    assert abs(sketch.count() - distinct) <= max(2, 0.04 * distinct)
+
+
+def test_merged_sketches_equal_one_sketch_of_everything():
+    left, right, both = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    for value in range(3000):
+        (left if value % 3 else right).add(str(value))
+        both.add(str(value))
+    left.merge(right)
+    assert left.registers == both.registers
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(11))
+
+
+def test_report_matches_brute_force(tmp_path):
+    rng = random.Random(5)
+    rows = random_pairs(3000, 800, seed=5)
+    rows += [("", "R2E59-N-AD1"), ("empty", "X1"), ("YTVTL90XS", "R2E5"), ("YTVTL90XS", "R2E59-Q-AD1")]
+    rng.shuffle(rows)
+    path = tmp_path / "scans.csv"
+    with open(path, "w", newline="") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(["Garment_SKU", "location_id"])
+        writer.writerows(rows)
+        writer.writerow(["SHORT"])
+
+    report = validate_scan_file(str(path), exact=True, spill_dir=str(tmp_path))
+    assert report["rows"] == len(rows) + 1
+    assert report["short_rows"] == 1
+    assert report["empty_skus"] == sum(not sku.strip() or sku.upper() == "EMPTY" for sku, _ in rows)
+    assert report["unplaceable_locations"] == sum(not (len(location) >= 5 and location[0] == "R")
+                                                  for _, location in rows)
+    assert report["malformed_locations"] == sum(not re.fullmatch(r"R\d[A-Z]\d\d-(N|S|NS)-([A-Z]{1,2}\d|FULL)",
+                                                                 location) for _, location in rows)
+    assert report["exact_distinct_pairs"] == len(set(rows))
+    assert abs(report["approx_distinct_pairs"] - len(set(rows))) <= 0.04 * len(set(rows))
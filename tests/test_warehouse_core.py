@@ -0,0 +1,92 @@
+import random
+
+from grid_replay import GridReplay
+from sku_styles import StyleIndex
+from warehouse_core import WarehouseData
+
+HEADERS = ["match_date_time", "garment_sku", "location_id"]
+
+
+def random_scans(rng, count):
+    skus = [f"STY{style:04d}{size}" for style in range(12) for size in ("XS", "0L", "XL")]
+    skus += ["EMPTY", "", " ", "SHORT", "empty"]
+    locations = [f"R{level}{aisle}{row:02d}-{side}-AD1" for level in (1, 2) for aisle in "AB"
+                 for row in range(1, 6) for side in "NS"]
+    locations += ["X1", "R2B0"]
+    scans = []
+    for idx in range(count):
+        seconds = idx * 37
+        timestamp = f"2025-04-04 {8 + seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        scans.append((timestamp, rng.choice(skus), rng.choice(locations)))
+    return scans
+
+
+def load(scans):
+    data = WarehouseData()
+    data.add_scan_rows("scans", iter([HEADERS] + [list(scan) for scan in scans]))
+    data.analyze()
+    return data
+
+
+def grid_items(data):
+    return {(column, row): sorted(items) for column, rows in data.grid_data.items()
+            for row, items in rows.items() if items}
+
+
+def empty_bins(data):
+    return sorted(location for buckets in data.empty_bin_index.levels.values() for bucket in buckets.values()
+                  for locations in bucket.values() for location in locations)
+
+
+def styles(index):
+    return {style: {size: sorted(locations) for size, locations in sizes.items()}
+            for style, sizes in index.styles.items()}
+
+
+def assert_same_analysis(data, rows):
+    """Compare the incrementally updated analysis with one built from scratch for rows"""
+    fresh = load([("", sku, location) for sku, location in rows])
+    assert sorted(data.csv_data) == sorted(fresh.csv_data)
+    assert data.bin_rows == {location: idx for idx, (_, location) in enumerate(data.csv_data)}
+    assert grid_items(data) == grid_items(fresh)
+    assert data.duplicate_skus == fresh.duplicate_skus
+    assert data.empty_bins_locations == fresh.empty_bins_locations
+    assert empty_bins(data) == empty_bins(fresh)
+    assert len(data.empty_bin_index) == len(fresh.empty_bin_index)
+    assert styles(data.style_index()) == styles(StyleIndex(fresh.csv_data))
+    assert data.duplicate_cells() == fresh.duplicate_cells()
+    assert data.empty_cells() == fresh.empty_cells()
+
+
+def test_live_scans_match_a_fresh_analysis():
+    rng = random.Random(8)
+    initial = random_scans(rng, 300)
+    data = load(initial)
+    data.style_index()
+
+    latest = {location: sku for _, sku, location in initial}
+    for _ in range(40):
+        events = random_scans(rng, rng.randint(1, 15))
+        changed = data.apply_scans(events)
+        before = dict(latest)
+        for _, sku, location in events:
+            latest[location] = sku
+        assert changed <= {(location[1:3], location[3:5]) for location, sku in latest.items()
+                           if before.get(location) != sku and len(location) >= 5}
+        assert_same_analysis(data, [(sku, location) for location, sku in latest.items()])
+
+
+def test_replay_seeks_match_a_fresh_analysis():
+    rng = random.Random(9)
+    scans = random_scans(rng, 600)
+    data = load(scans)
+    replay = GridReplay(data.scan_events)
+    data.start_replay(replay)
+    data.style_index()
+    assert_same_analysis(data, replay.current_rows())
+
+    for position in [0, len(replay)] + [rng.randint(0, len(replay)) for _ in range(30)]:
+        data.seek_replay(replay, position)
+        expected = GridReplay(scans)
+        expected.seek(position)
+        assert_same_analysis(data, expected.current_rows())
@@ -0,0 +1,450 @@
+from collections import Counter, defaultdict
+
+from bins import grid_cell, is_empty_sku
+from consolidation import ConsolidationPlan
+from empty_bins import EmptyBinIndex
+from fuzzy_search import FuzzySkuIndex
+from location_index import LocationIndex, is_index_query
+from memory_report import MemoryLedger, event_bytes, grid_container_bytes
+from pattern_search import SUBSTRING, PatternIndex
+from perf_stats import PerfStats
+from scan_io import iter_scan_readers
+from sku_lookup import SkuIndex
+from sku_styles import SKU_LENGTH, StyleIndex
+from snapshot_store import SnapshotStore
+
+DUPLICATE_HEADERS = ["SKU", "Bin Locations"]
+EMPTY_BINS_HEADERS = ["Grid Location", "Bin Locations"]
+
+
+class WarehouseData:
+    """One loaded dataset, shared by the Tk and Streamlit front ends
+
+    Holds the scan rows, the grid built from them, the analysis (duplicate
+    SKUs, empty bins, styles) and the search indexes, which are built on
+    first use and rebuilt whenever csv_data is replaced. It has no UI code,
+    so both front ends load, analyze, search and export the same way.
+    Parsing, analysis, index builds and searches are timed through perf,
+    and while tracemalloc is tracing, memory records the bytes each part holds.
+    """
+
+    def __init__(self, perf=None):
+        self.perf = perf or PerfStats()
+        self.memory = MemoryLedger()
+        self.reset()
+
+    def reset(self):
+        """Drop all rows; new containers, so caches keyed on them go stale"""
+        self.csv_data = []
+        self.scan_events = []
+        self.grid_data = defaultdict(lambda: defaultdict(list))
+
+        self.duplicate_skus = set()
+        self.empty_bins_locations = set()
+        self.empty_bin_index = EmptyBinIndex()
+
+        # index name -> (csv_data it was built from, index)
+        self.indexes = {}
+        self.memory.clear()
+
+        # Live scan state, built by the first apply_scans: each bin's row in
+        # csv_data, and the counts the analysis is updated from
+        self.bin_rows = None
+        self.sku_counts = Counter()
+        self.empty_counts = Counter()
+
+    def load(self, source):
+        """Load a scan file, archive or columnar file and analyze it"""
+        self.reset()
+
+        # Stream every scan file in the source (plain, compressed, zipped or
+        # columnar), decompressing while parsing
+        with self.perf.span("parse"), self.memory.track("raw rows"):
+            for file_name, reader in iter_scan_readers(source):
+                self.add_scan_rows(file_name, reader)
+        self.measure_parsed()
+        self.analyze()
+        return self
+
+    def load_snapshot(self, store_dir, as_of):
+        """Load the grid state at a point in time from a snapshot store and analyze it"""
+        with self.perf.span("parse"):
+            headers, rows = SnapshotStore(store_dir).rows_as_of(as_of)
+            self.reset()
+            with self.memory.track("raw rows"):
+                self.add_scan_rows(store_dir, iter([headers] + rows))
+        self.measure_parsed()
+        self.analyze()
+        return self
+
+    def add_scan_rows(self, file_name, reader):
+        """Add scan rows (header row first) to csv_data, scan_events and grid_data"""
+        # Read the header row to find column indices
+        headers = next(reader, None)
+        if headers is None:
+            return
+
+        # Find the indices of garment_sku, location_id and the optional
+        # match_date_time columns (case insensitive)
+        sku_idx = None
+        location_idx = None
+        time_idx = None
+
+        for idx, header in enumerate(headers):
+            if header.lower() == "garment_sku":
+                sku_idx = idx
+            elif header.lower() == "location_id":
+                location_idx = idx
+            elif header.lower() == "match_date_time":
+                time_idx = idx
+
+        # Verify we found the required columns
+        if sku_idx is None or location_idx is None:
+            raise ValueError(f"{file_name} must contain 'garment_sku' and 'location_id' columns")
+
+        for row in reader:
+            # Skip rows that don't have enough columns
+            if len(row) <= max(sku_idx, location_idx):
+                continue
+
+            sku = row[sku_idx]
+            location = row[location_idx]
+            self.csv_data.append((sku, location))
+
+            # Keep timestamped scans for the replay slider
+            if time_idx is not None and time_idx < len(row):
+                self.scan_events.append((row[time_idx], sku, location))
+
+            # R1S32-N-AT1 goes to grid column 1S (level + aisle), row 32
+            cell = grid_cell(location)
+            if cell:
+                self.grid_data[cell[0]][cell[1]].append((sku, location))
+
+    def measure_parsed(self):
+        """Move the grid's and the scan events' shares of the traced raw rows bytes to their own parts
+
+        The events become the "replay" part, which the front ends add the
+        replay built from them to.
+        """
+        if "raw rows" in self.memory.parts:
+            self.memory.split("raw rows", "grid index", grid_container_bytes(self.grid_data))
+            self.memory.split("raw rows", "replay", event_bytes(self.scan_events))
+
+    def analyze(self):
+        """Find duplicate SKUs and empty bins, and index empty bin positions"""
+        with self.perf.span("analyze"), self.memory.track("analysis"):
+            sku_locations = defaultdict(list)
+            # The empty test runs once per distinct SKU rather than per row
+            empty_skus = {}
+            self.duplicate_skus = set()
+            self.empty_bins_locations = set()
+            self.empty_bin_index = EmptyBinIndex()
+
+            for column in self.grid_data:
+                for row in self.grid_data[column]:
+                    for sku, bin_location in self.grid_data[column][row]:
+                        sku_locations[sku].append((column, row))
+
+                        # Empty bins are "EMPTY" SKUs and blank SKU fields
+                        empty = empty_skus.get(sku)
+                        if empty is None:
+                            empty = empty_skus[sku] = is_empty_sku(sku)
+                        if empty:
+                            self.empty_bins_locations.add((column, row))
+                            self.empty_bin_index.add(bin_location)
+
+            # Duplicates are style SKUs found in more than one place
+            for sku, locations in sku_locations.items():
+                if len(locations) > 1 and not is_empty_sku(sku) and len(sku) == SKU_LENGTH:
+                    self.duplicate_skus.add(sku)
+
+            # Free the temporaries before the memory track ends
+            del sku_locations, empty_skus
+
+    def start_live(self):
+        """Keep only the latest row of each bin and count what apply_scans keeps up to date"""
+        latest = {}
+        for sku, location in self.csv_data:
+            latest[location] = sku
+        self.csv_data = [(sku, location) for location, sku in latest.items()]
+
+        self.grid_data = defaultdict(lambda: defaultdict(list))
+        for sku, location in self.csv_data:
+            cell = grid_cell(location)
+            if cell:
+                self.grid_data[cell[0]][cell[1]].append((sku, location))
+        self.count_bins()
+
+    def start_replay(self, replay):
+        """Show a replay's grid from its last position on; seek_replay then keeps the rows and analysis in step"""
+        replay.seek(len(replay))
+        self.csv_data = replay.current_rows()
+        self.grid_data = replay.grid_data
+        self.count_bins()
+
+    def count_bins(self):
+        """Analyze one row per bin and count what apply_scans and seek_replay keep up to date"""
+        self.bin_rows = {location: idx for idx, (_, location) in enumerate(self.csv_data)}
+        self.analyze()
+
+        self.sku_counts = Counter()
+        self.empty_counts = Counter()
+        for column in self.grid_data:
+            for row in self.grid_data[column]:
+                for sku, _ in self.grid_data[column][row]:
+                    self.sku_counts[sku] += 1
+                    if is_empty_sku(sku):
+                        self.empty_counts[(column, row)] += 1
+
+    def apply_scans(self, events):
+        """Apply (timestamp, sku, location) scans as they arrive and return the grid cells that changed
+
+        A scan replaces what its bin holds, as in the replay and the snapshot
+        store, so the first call keeps only the latest row of each bin.
+        Duplicates, empty bins and styles are then updated for the changed
+        bins only; the search indexes are dropped and rebuilt on next use.
+        """
+        with self.perf.span("apply_scans"):
+            if self.bin_rows is None:
+                self.start_live()
+
+            changed_rows = 0
+            changed_cells = set()
+            for _, sku, location in events:
+                idx = self.bin_rows.get(location)
+                if idx is None:
+                    old_sku = None
+                    self.bin_rows[location] = len(self.csv_data)
+                    self.csv_data.append((sku, location))
+                elif self.csv_data[idx][0] == sku:
+                    continue
+                else:
+                    old_sku = self.csv_data[idx][0]
+                    self.csv_data[idx] = (sku, location)
+                changed_rows += 1
+
+                cell = grid_cell(location)
+                if cell is None:
+                    continue
+                items = self.grid_data[cell[0]][cell[1]]
+                if old_sku is not None:
+                    items.remove((old_sku, location))
+                    self.count_item(old_sku, location, cell, -1)
+                items.append((sku, location))
+                self.count_item(sku, location, cell, 1)
+                changed_cells.add(cell)
+
+            # csv_data changed in place, so the indexes cached on it are stale,
+            # except the style index, which count_item kept up to date
+            if changed_rows:
+                self.drop_indexes(keep=('style',))
+            return changed_cells
+
+    def seek_replay(self, replay, position):
+        """Move a replay started with start_replay to a slider position and return the grid cells that changed
+
+        The replay updates grid_data itself; the rows, duplicates, empty bins
+        and styles are updated for the changed bins only.
+        """
+        changed_cells = replay.seek(position)
+        for location, old_sku, new_sku in replay.changed_bins:
+            self.set_bin_row(location, new_sku)
+            cell = grid_cell(location)
+            if cell is None:
+                continue
+            if old_sku is not None:
+                self.count_item(old_sku, location, cell, -1)
+            if new_sku is not None:
+                self.count_item(new_sku, location, cell, 1)
+        if replay.changed_bins:
+            self.drop_indexes(keep=('style',))
+        return changed_cells
+
+    def set_bin_row(self, location, sku):
+        """Replace the row of a bin in csv_data, adding it or (sku None) removing it"""
+        idx = self.bin_rows.get(location)
+        if sku is None:
+            if idx is None:
+                return
+            # Move the last row into the gap, so removing is constant time
+            del self.bin_rows[location]
+            last = self.csv_data.pop()
+            if idx < len(self.csv_data):
+                self.csv_data[idx] = last
+                self.bin_rows[last[1]] = idx
+        elif idx is None:
+            self.bin_rows[location] = len(self.csv_data)
+            self.csv_data.append((sku, location))
+        else:
+            self.csv_data[idx] = (sku, location)
+
+    def count_item(self, sku, location, cell, step):
+        """Add (step 1) or remove (step -1) one grid item in the duplicate, empty bin and style analysis"""
+        count = self.sku_counts[sku] + step
+        if count:
+            self.sku_counts[sku] = count
+        else:
+            del self.sku_counts[sku]
+        if count > 1 and not is_empty_sku(sku) and len(sku) == SKU_LENGTH:
+            self.duplicate_skus.add(sku)
+        else:
+            self.duplicate_skus.discard(sku)
+
+        if is_empty_sku(sku):
+            empty = self.empty_counts[cell] + step
+            if empty:
+                self.empty_counts[cell] = empty
+                self.empty_bins_locations.add(cell)
+            else:
+                del self.empty_counts[cell]
+                self.empty_bins_locations.discard(cell)
+            if step > 0:
+                self.empty_bin_index.add(location)
+            else:
+                self.empty_bin_index.discard(location)
+        elif self.has_index('style'):
+            if step > 0:
+                self.style_index().add(sku, location)
+            else:
+                self.style_index().discard(sku, location)
+
+    def cached(self, name, build):
+        """Return a named index for the current csv_data, building it on first use"""
+        data, index = self.indexes.get(name, (None, None))
+        if data is not self.csv_data:
+            # Drop the stale index first, so the memory track sees only the new one
+            self.indexes.pop(name, None)
+            index = None
+            with self.perf.span(f"index:{name}"), self.memory.track(f"index: {name}"):
+                index = build()
+                self.indexes[name] = (self.csv_data, index)
+        return index
+
+    def drop_indexes(self, keep=()):
+        """Drop the cached indexes not named in keep, with their measured memory; they are rebuilt on next use"""
+        for name in list(self.indexes):
+            if name not in keep:
+                del self.indexes[name]
+                self.memory.parts.pop(f"index: {name}", None)
+
+    def has_index(self, name):
+        """Check whether a named index is already built for the current csv_data"""
+        return name in self.indexes and self.indexes[name][0] is self.csv_data
+
+    def sku_index(self):
+        """Return the SKU hash index used by pick lists and fuzzy search"""
+        return self.cached('sku', lambda: SkuIndex(self.csv_data))
+
+    def fuzzy_index(self):
+        """Return the edit-distance index over distinct SKUs"""
+        return self.cached('fuzzy', lambda: FuzzySkuIndex(self.sku_index()))
+
+    def pattern_index(self):
+        """Return the distinct SKU/location dictionaries for wildcard and regex searches"""
+        return self.cached('pattern', lambda: PatternIndex(self.csv_data))
+
+    def style_index(self):
+        """Return the style -> size -> bins index, built on the first style lookup, filter or report"""
+        return self.cached('style', lambda: StyleIndex(self.csv_data))
+
+    def location_index(self):
+        """Return the location prefix/component index"""
+        return self.cached('location', lambda: LocationIndex(location for _, location in self.csv_data))
+
+    def consolidation_plan(self, layout):
+        """Return the duplicate-SKU consolidation moves over an aisle layout"""
+        return self.cached('consolidation', lambda: ConsolidationPlan(self.sku_index(), layout))
+
+    def search(self, sku_query, loc_query, mode=SUBSTRING, fuzzy_distance=None):
+        """Return (matching grid cells, fuzzy matches or None) for a SKU and/or location query
+
+        Substring location queries that look like a prefix or component query
+        go through the location index, fuzzy_distance switches the SKU query
+        to nearest-SKU search, and wildcard/regex queries are matched against
+        distinct values. Raises ValueError for an unknown location component
+        and re.error for an invalid regular expression.
+        """
+        with self.perf.span("search"):
+            sku_query = sku_query.strip()
+            loc_query = loc_query.strip()
+            cells = set()
+
+            if loc_query and mode == SUBSTRING and is_index_query(loc_query):
+                cells |= self.location_index().query_cells(loc_query)
+                loc_query = ""
+
+            fuzzy_matches = None
+            if sku_query and fuzzy_distance:
+                fuzzy_matches, fuzzy_cells = self.fuzzy_index().search_cells(sku_query, max_distance=fuzzy_distance)
+                cells |= fuzzy_cells
+                sku_query = ""
+
+            # Patterns use the text as typed, since upper-casing would change escapes like \d
+            if mode != SUBSTRING and (sku_query or loc_query):
+                pattern_index = self.pattern_index()
+                if sku_query:
+                    cells |= pattern_index.search_cells('sku', sku_query, mode)
+                if loc_query:
+                    cells |= pattern_index.search_cells('location', loc_query, mode)
+                sku_query = loc_query = ""
+
+            sku_query = sku_query.upper()
+            loc_query = loc_query.upper()
+            for sku, location in self.csv_data if sku_query or loc_query else ():
+                cell = grid_cell(location)
+                if cell and ((sku_query and sku_query in sku.upper())
+                             or (loc_query and loc_query in location.upper())):
+                    cells.add(cell)
+            return cells, fuzzy_matches
+
+    def duplicate_cells(self):
+        """Return the grid cells holding a style SKU that appears in more than one row"""
+        with self.perf.span("filter:duplicates"):
+            sku_cells = defaultdict(list)
+            for sku, location in self.csv_data:
+                cell = grid_cell(location)
+                if cell and not is_empty_sku(sku) and len(sku) == SKU_LENGTH:
+                    sku_cells[sku].append(cell)
+
+            duplicate_locations = set()
+            for cells in sku_cells.values():
+                if len(cells) > 1:
+                    duplicate_locations.update(cells)
+            return duplicate_locations
+
+    def empty_cells(self):
+        """Return the grid cells holding an empty bin"""
+        with self.perf.span("filter:empty"):
+            return {cell for cell in (grid_cell(location) for sku, location in self.csv_data if is_empty_sku(sku))
+                    if cell}
+
+    def cell_items(self, column, row):
+        """Return the (sku, bin location) items of a grid cell without adding it to grid_data"""
+        return self.grid_data.get(column, {}).get(row, [])
+
+    def occupied_count(self, columns, rows):
+        """Return how many of the given cells hold at least one item"""
+        return sum(1 for column in columns for row in rows
+                   if column in self.grid_data and row in self.grid_data[column])
+
+    def duplicate_skus_rows(self):
+        """Return rows for DUPLICATE_HEADERS: each duplicate SKU with its sorted bin locations"""
+        with self.perf.span("export:duplicates"):
+            sku_locations = defaultdict(list)
+            for sku, location in self.csv_data:
+                if grid_cell(location) and not is_empty_sku(sku) and len(sku) == SKU_LENGTH:
+                    sku_locations[sku].append(location)
+
+            return sorted((sku, ", ".join(sorted(locations)))
+                          for sku, locations in sku_locations.items() if len(locations) > 1)
+
+    def empty_bins_rows(self):
+        """Return rows for EMPTY_BINS_HEADERS: each grid cell with its sorted empty bin locations"""
+        with self.perf.span("export:empty_bins"):
+            cell_locations = defaultdict(list)
+            for sku, location in self.csv_data:
+                cell = grid_cell(location)
+                if cell and is_empty_sku(sku):
+                    cell_locations["".join(cell)].append(location)
+
+            return sorted((cell, ", ".join(sorted(locations))) for cell, locations in cell_locations.items())
@@ -1,11 +1,47 @@
 import streamlit as st
-import pandas as pd
 import csv
 import io
-import base64
-from collections import defaultdict
-import plotly.graph_objects as go
-import numpy as np
+import re
+
+from scan_io import table_to_bytes
+from grid_replay import GridReplay
+from bins import is_empty_sku
+from snapshot_diff import CATEGORY_COLORS, CATEGORY_LABELS, CATEGORIES, EXPORT_HEADERS, \
+    SnapshotDiff, load_scan_pairs
+from fuzzy_search import describe_matches
+from empty_bins import describe_nearest
+from consolidation import EXPORT_HEADERS as MOVE_HEADERS
+from pick_route import AisleLayout, PickRoute
+from cell_masks import COMBINE_OPS, REPLACE, CellSpace, combine
+from pattern_search import SEARCH_MODES, SUBSTRING
+from sku_styles import EXPORT_HEADERS as STYLE_DUPLICATE_HEADERS
+from sku_lookup import EXPORT_HEADERS as PICK_LIST_HEADERS, parse_sku_list, read_sku_list
+from warehouse_core import DUPLICATE_HEADERS, EMPTY_BINS_HEADERS, WarehouseData
+from perf_stats import SUMMARY_HEADERS, PerfStats
+from memory_report import REPORT_HEADERS, start_tracing, start_tracing_from_env
+from live_scans import DEFAULT_ADDRESS, ScanListener
+from dataset_cache import DatasetCache
+
+# pandas and plotly are imported where they are first used, so the upload
+# page shows without waiting for them
+
+# Download formats offered by the export buttons: (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow (Feather)": ("feather", "application/vnd.apache.arrow.file"),
+}
+
+# Heatmap colors by cell value: empty, occupied, highlighted, then one per diff category
+CELL_COLORS = ['#303030', '#50C878', '#FF8C00'] + [CATEGORY_COLORS[category] for category in CATEGORIES]
+
+# Live scans are applied and the grid redrawn at most once a second, since
+# sending a new figure costs far more than a canvas recolor
+LIVE_REFRESH_SECONDS = 1
+
+# Session state kept per loaded dataset and restored when switching back to it
+DATASET_STATE = ('highlight_mask', 'current_filter', 'diff', 'cell_overlay', 'replay', 'replay_active',
+                 'replay_position', 'grid_matrix', 'pick_list_result', 'pick_route', 'nearest_empty')
 
 class WarehouseGridVisualizerStreamlit:
     def __init__(self):
@@ -22,21 +58,32 @@ class WarehouseGridVisualizerStreamlit:
         self.rows = [str(i).zfill(2) for i in range(1, 91)]  # 01-90, zero-padded in reverse order
         self.rows.reverse()  # Now ordered from 90 to 01
         
-        # State variables
-        if 'csv_data' not in st.session_state:
-            st.session_state['csv_data'] = []
+        # Timing spans for the Performance panel, on from the start with
+        # WH_PERF_STATS or WH_PERF_TRACE
+        if 'perf' not in st.session_state:
+            st.session_state['perf'] = PerfStats.from_env()
+        self.perf = st.session_state['perf']
         
-        if 'grid_data' not in st.session_state:
-            st.session_state['grid_data'] = defaultdict(lambda: defaultdict(list))
+        # Allocation tracing for the memory report, on from the start with WH_MEMORY_TRACE
+        start_tracing_from_env()
         
-        if 'duplicate_skus' not in st.session_state:
-            st.session_state['duplicate_skus'] = set()
-            
-        if 'empty_bins_locations' not in st.session_state:
-            st.session_state['empty_bins_locations'] = set()
+        # Loaded dataset with its analysis and search indexes, and the other
+        # datasets loaded this session for switching back to
+        if 'data' not in st.session_state:
+            st.session_state['data'] = WarehouseData(self.perf)
+        
+        if 'datasets' not in st.session_state:
+            st.session_state['datasets'] = DatasetCache.from_env()
+            st.session_state['dataset_name'] = None
+        
+        # Last nearest-empty query result
+        if 'nearest_empty' not in st.session_state:
+            st.session_state['nearest_empty'] = None
             
-        if 'highlighted_cells' not in st.session_state:
-            st.session_state['highlighted_cells'] = set()
+        # Highlighted cells as a bitset over cell ids, so filter results can be
+        # combined with AND/OR/NOT; the heatmap reads the bits directly
+        if 'highlight_mask' not in st.session_state:
+            st.session_state['highlight_mask'] = 0
             
         if 'current_filter' not in st.session_state:
             st.session_state['current_filter'] = None
@@ -44,25 +91,105 @@ class WarehouseGridVisualizerStreamlit:
         # Grid visualization settings
         if 'zoom_level' not in st.session_state:
             st.session_state['zoom_level'] = 1.0  # Default zoom level
+        
+        # Time-slider replay of the loaded scans and the cached heatmap matrix
+        if 'replay' not in st.session_state:
+            st.session_state['replay'] = None
+        
+        if 'grid_matrix' not in st.session_state:
+            st.session_state['grid_matrix'] = None
+        
+        if 'pick_list_result' not in st.session_state:
+            st.session_state['pick_list_result'] = None
+        
+        # Walking distance tables for the fixed layout (built by route_layout()
+        # on first use), and the last planned pick route
+        if 'route_layout' not in st.session_state:
+            st.session_state['route_layout'] = None
+        if 'pick_route' not in st.session_state:
+            st.session_state['pick_route'] = None
+        
+        # Diff against an older scan: (column, row) -> diff category
+        if 'diff' not in st.session_state:
+            st.session_state['diff'] = None
+        
+        if 'cell_overlay' not in st.session_state:
+            st.session_state['cell_overlay'] = {}
+        
+        # Scanner events received on a local socket while listening
+        if 'live_listener' not in st.session_state:
+            st.session_state['live_listener'] = None
+        
+        # Lookup tables from names to heatmap matrix positions
+        self.column_index = {name: idx for idx, name in enumerate(self.columns)}
+        self.row_index = {name: idx for idx, name in enumerate(self.rows)}
+        self.cell_space = CellSpace(self.columns, self.rows)
             
     def run(self):
         st.title("Warehouse Grid Visualizer")
         
+        # The checkbox value is known before the widget is drawn at the bottom of the sidebar
+        self.perf.enabled = st.session_state.get('perf_enabled', self.perf.enabled)
+        
         # Create sidebar for controls
         with st.sidebar:
             st.header("Controls")
             
             # File upload section
             st.subheader("Upload Data")
-            uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+            uploaded_file = st.file_uploader("Choose a CSV file",
+                                             type=["csv", "gz", "bz2", "xz", "zip",
+                                                   "parquet", "feather", "arrow"])
             
-            if uploaded_file is not None:
+            # Only parse an upload once; reruns reuse the loaded session state
+            if uploaded_file is not None and st.session_state.get('loaded_file_id') != uploaded_file.file_id:
                 try:
                     self.load_data_from_file(uploaded_file)
+                    st.session_state['loaded_file_id'] = uploaded_file.file_id
                     st.success(f"Data loaded successfully!")
                 except Exception as e:
                     st.error(f"Failed to load file: {str(e)}")
             
+            # Datasets loaded this session; picking one switches without reloading
+            datasets = st.session_state['datasets']
+            if len(datasets) > 1:
+                # Show the current dataset, which a load may have changed since the last pick
+                st.session_state['dataset_choice'] = st.session_state['dataset_name']
+                st.selectbox("Loaded datasets", datasets.names(), key="dataset_choice",
+                             on_change=lambda: self.switch_dataset(st.session_state['dataset_choice']))
+                st.caption(datasets.describe())
+            
+            # History section: load the grid as it was at a point in time
+            with st.expander("History"):
+                store_dir = st.text_input("Snapshot store folder:", key="history_store")
+                as_of = st.text_input("As of (YYYY-MM-DD HH:MM:SS):", key="history_as_of")
+                if st.button("Load As Of", disabled=not (store_dir and as_of)):
+                    try:
+                        self.load_snapshot_as_of(store_dir.strip(), as_of.strip())
+                        st.success(f"Loaded grid as of {as_of}")
+                    except Exception as e:
+                        st.error(f"Failed to load history: {str(e)}")
+            
+            # Compare section: overlay what changed since an older scan
+            with st.expander("Compare"):
+                compare_file = st.file_uploader("Older scan to compare with",
+                                                type=["csv", "gz", "bz2", "xz", "zip",
+                                                      "parquet", "feather", "arrow"],
+                                                key="compare_upload")
+                if (compare_file is not None and st.session_state['data'].csv_data
+                        and st.session_state.get('compared_file_id') != compare_file.file_id):
+                    try:
+                        self.show_diff(compare_file)
+                        st.session_state['compared_file_id'] = compare_file.file_id
+                    except Exception as e:
+                        st.error(f"Failed to compare files: {str(e)}")
+                
+                diff = st.session_state['diff']
+                if diff:
+                    counts = diff.summary()
+                    for category in CATEGORIES:
+                        st.caption(f":{CATEGORY_COLORS[category]}[■] {CATEGORY_LABELS[category]}: {counts[category]}")
+            
             # Zoom controls section
             st.subheader("Zoom")
             zoom_col1, zoom_col2, zoom_col3 = st.columns([1, 1, 2])
@@ -83,23 +210,74 @@ class WarehouseGridVisualizerStreamlit:
             st.subheader("Search")
             sku_query = st.text_input("SKU:", key="sku_search")
             loc_query = st.text_input("Location:", key="loc_search")
+            search_mode = st.radio("Match", SEARCH_MODES, horizontal=True, key="search_mode",
+                                   help="Wildcard: YTVTL9?X*  Regex: ^R[12]E")
+            fuzzy_col1, fuzzy_col2 = st.columns(2)
+            with fuzzy_col1:
+                fuzzy = st.checkbox("Fuzzy SKU", key="fuzzy_search")
+            with fuzzy_col2:
+                fuzzy_distance = st.number_input("Max edits", min_value=1, max_value=3, value=1,
+                                                 key="fuzzy_distance", disabled=not fuzzy)
             
             search_col1, search_col2 = st.columns(2)
             with search_col1:
                 if st.button("Search"):
-                    self.search_grid(sku_query, loc_query)
+                    self.search_grid(sku_query, loc_query, fuzzy_distance if fuzzy else None, search_mode)
             with search_col2:
                 if st.button("Clear Search"):
-                    st.session_state['highlighted_cells'] = set()
+                    st.session_state['highlight_mask'] = 0
+                    st.session_state['pick_route'] = None
                     st.session_state['current_filter'] = None
                     # Reset search fields
                     st.session_state['sku_search'] = ""
                     st.session_state['loc_search'] = ""
                     st.rerun()
             
+            # Style lookup: every bin holding any size of a style
+            style_query = st.text_input("Style:", key="style_search", help="e.g. YTVTL90, or any SKU of the style")
+            if st.button("Show Style", disabled=not style_query):
+                self.show_style(style_query)
+            
+            # Pick list section: look up a whole list of SKUs at once
+            with st.expander("Pick List"):
+                pick_list_text = st.text_area("Paste SKUs (one per line):", key="pick_list_text")
+                pick_list_file = st.file_uploader("Or upload a pick list", type=["txt", "csv", "gz"],
+                                                  key="pick_list_upload")
+                if st.button("Look Up", disabled=not st.session_state['data'].csv_data):
+                    try:
+                        skus = parse_sku_list(pick_list_text)
+                        if pick_list_file is not None:
+                            pick_list_file.seek(0)
+                            skus += read_sku_list(pick_list_file)
+                        self.look_up_pick_list(skus)
+                    except Exception as e:
+                        st.error(f"Failed to read pick list: {str(e)}")
+                
+                result = st.session_state['pick_list_result']
+                if result:
+                    st.caption(result.summary())
+                    if result.not_found:
+                        st.text_area("Not found:", "\n".join(result.not_found), disabled=True)
+                    
+                    # Walking order through the found cells, drawn on the grid
+                    if st.button("Plan Route", disabled=not result.cells):
+                        with self.perf.span("pick_route"):
+                            st.session_state['pick_route'] = PickRoute(self.route_layout(), result.cells)
+                    route = st.session_state['pick_route']
+                    if route:
+                        st.caption(route.summary())
+                        st.text_area("Walking order:", "\n".join(f"{stop}. {''.join(cell)}"
+                                                                   for stop, cell in enumerate(route.cells, 1)),
+                                     disabled=True)
+            
             # Filter section
             st.subheader("Filter Options")
             
+            # How the next filter combines with the current highlight, and NOT
+            st.radio("Combine with highlight", COMBINE_OPS, horizontal=True, key="combine_op")
+            if st.button("Invert Highlight", use_container_width=True):
+                self.invert_highlight()
+            
             # Filter buttons in uniform size
             filter_col1, filter_col2 = st.columns(2)
             with filter_col1:
@@ -109,59 +287,159 @@ class WarehouseGridVisualizerStreamlit:
                 if st.button("Empty Bins", use_container_width=True):
                     self.show_empty_bins()
             
+            if st.button("Style Duplicates", use_container_width=True):
+                self.show_style_duplicates()
+            
+            if st.button("Consolidation Moves", use_container_width=True, disabled=not st.session_state['data'].csv_data):
+                self.show_consolidation_moves()
+            
+            # Empty bins nearest a location on the same level
+            nearest_query = st.text_input("Nearest empty to:", key="nearest_empty_query",
+                                          help="A bin location or grid cell, e.g. R2E59-N-BD1 or 2E59")
+            if st.button("Find Nearest Empty", use_container_width=True, disabled=not nearest_query):
+                self.show_nearest_empty(nearest_query)
+            
             # Clear filter button with full width
             if st.button("Clear Filter", use_container_width=True):
-                st.session_state['highlighted_cells'] = set()
+                st.session_state['highlight_mask'] = 0
+                st.session_state['nearest_empty'] = None
+                st.session_state['pick_route'] = None
+                st.session_state['cell_overlay'] = {}
                 st.session_state['current_filter'] = None
                 st.rerun()
             
             # Export section (separate from filter)
             st.subheader("Export Options")
+            export_format = st.selectbox("Export format", list(EXPORT_FORMATS.keys()))
+            extension, mime = EXPORT_FORMATS[export_format]
             export_col1, export_col2 = st.columns(2)
             with export_col1:
-                csv_data = self.prepare_duplicate_skus_export()
+                csv_data = st.session_state['data'].duplicate_skus_rows()
                 if csv_data:
                     st.download_button(
                         label="Export Duplicates",
-                        data=self.convert_to_csv(csv_data, ["SKU", "Bin Locations"]),
-                        file_name="duplicate_skus.csv",
-                        mime="text/csv",
+                        data=table_to_bytes(DUPLICATE_HEADERS, csv_data, extension),
+                        file_name=f"duplicate_skus.{extension}",
+                        mime=mime,
                         use_container_width=True
                     )
                 else:
                     st.button("Export Duplicates", disabled=True, use_container_width=True)
             
             with export_col2:
-                csv_data = self.prepare_empty_bins_export()
+                csv_data = st.session_state['data'].empty_bins_rows()
                 if csv_data:
                     st.download_button(
                         label="Export Empty",
-                        data=self.convert_to_csv(csv_data, ["Grid Location", "Bin Locations"]),
-                        file_name="empty_bins.csv",
-                        mime="text/csv",
+                        data=table_to_bytes(EMPTY_BINS_HEADERS, csv_data, extension),
+                        file_name=f"empty_bins.{extension}",
+                        mime=mime,
                         use_container_width=True
                     )
                 else:
                     st.button("Export Empty", disabled=True, use_container_width=True)
+            
+            # Built when clicked, so the style index is not built on every run
+            data = st.session_state['data']
+            st.download_button(
+                label="Export Style Duplicates",
+                data=lambda: table_to_bytes(STYLE_DUPLICATE_HEADERS, data.style_index().export_duplicate_rows(),
+                                            extension),
+                file_name=f"style_duplicates.{extension}",
+                mime=mime,
+                use_container_width=True
+            )
+            
+            plan = self.current_consolidation_plan()
+            if plan and len(plan):
+                st.download_button(
+                    label="Export Moves",
+                    data=table_to_bytes(MOVE_HEADERS, plan.export_rows(), extension),
+                    file_name=f"consolidation_moves.{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
+            
+            if st.session_state['pick_list_result']:
+                st.download_button(
+                    label="Export Pick List",
+                    data=table_to_bytes(PICK_LIST_HEADERS, st.session_state['pick_list_result'].export_rows(),
+                                        extension),
+                    file_name=f"pick_list.{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
+            
+            if st.session_state['diff']:
+                st.download_button(
+                    label="Export Diff",
+                    data=table_to_bytes(EXPORT_HEADERS, st.session_state['diff'].export_rows(), extension),
+                    file_name=f"scan_diff.{extension}",
+                    mime=mime,
+                    use_container_width=True
+                )
+            
+            # Live section: scanner events pushed over a local socket
+            with st.expander("Live Scans"):
+                listener = st.session_state['live_listener']
+                if listener is None:
+                    address = st.text_input("Listen on:", value=DEFAULT_ADDRESS, key="live_address")
+                    if st.button("Start Listening"):
+                        try:
+                            self.start_live_scans(address.strip())
+                        except (ValueError, OSError) as e:
+                            st.error(f"Cannot listen on {address}: {str(e)}")
+                else:
+                    st.caption(listener.describe())
+                    if st.button("Stop Listening"):
+                        self.stop_live_scans()
+                        st.rerun()
+            
+            # Timing of the operations in the last reruns, filled in after the grid is drawn
+            with st.expander("Performance"):
+                st.checkbox("Time operations", value=self.perf.enabled, key="perf_enabled")
+                stats_placeholder = st.empty()
+            
+            # Bytes held by the loaded dataset, its indexes and the grid figure
+            with st.expander("Memory"):
+                memory_placeholder = st.empty()
+        
+        if st.session_state['live_listener']:
+            self.poll_live_scans()
         
-        # Main content area
-        if st.session_state['csv_data']:
+        # Main content area; a replay at its start has no rows but keeps its slider
+        if st.session_state['data'].csv_data or st.session_state['replay_active']:
             # Display the grid visualization
             st.subheader("Warehouse Grid")
             
+            # Replay slider: scrub through the loaded scans minute by minute
+            replay = st.session_state['replay']
+            if replay and len(replay):
+                # reset_replay parks the slider at the end; Streamlit drops the key
+                # while the slider is not shown, so park it again in that case
+                if 'replay_position' not in st.session_state:
+                    st.session_state['replay_position'] = len(replay)
+                position = st.slider("Replay", 0, len(replay), key="replay_position")
+                st.caption(f"Showing scans up to {replay.label(position)}")
+                if position != replay.position or not st.session_state.get('replay_active'):
+                    self.seek_replay(position)
+            
             # Display statistics above the grid
-            occupied_count = sum(1 for c in self.columns for r in self.rows 
-                              if c in st.session_state['grid_data'] and r in st.session_state['grid_data'][c])
+            occupied_count = st.session_state['data'].occupied_count(self.columns, self.rows)
             total_cells = len(self.columns) * len(self.rows)
             st.caption(f"Grid: {len(self.columns)}x{len(self.rows)} = {total_cells} cells, Occupied: {occupied_count}")
             
             # Create the grid visualization
-            fig = self.create_grid_visualization()
+            with self.perf.span("figure"), st.session_state['data'].memory.track("figure"):
+                fig = self.create_grid_visualization()
             
             # Display the Plotly figure with fixed ratio
             container = st.container()
-            with container:
+            with container, self.perf.span("render"):
                 clicked_point = plotly_chart = st.plotly_chart(fig, use_container_width=True, key="grid_chart")
+            if self.perf.enabled:
+                self.perf.set_gauges(figure_traces=len(fig.data), figure_shapes=len(fig.layout.shapes),
+                                     rows=len(st.session_state['data'].csv_data), cells=occupied_count)
             
             # Add cell selection interface below the grid
             st.subheader("Cell Details")
@@ -171,124 +449,196 @@ class WarehouseGridVisualizerStreamlit:
             with col2:
                 selected_row = st.selectbox("Row", self.rows)
             
-            if st.button("View Cell Details"):
+            details_col, nearest_col = st.columns(2)
+            with details_col:
+                view_details = st.button("View Cell Details")
+            with nearest_col:
+                if st.button("Nearest Empty Bins"):
+                    self.show_nearest_empty((selected_column, selected_row))
+            
+            nearest = st.session_state['nearest_empty']
+            if nearest:
+                import pandas as pd
+                st.dataframe(pd.DataFrame([{"Bin Location": location, "Distance (cells)": round(distance, 1)}
+                                           for distance, location in nearest]), hide_index=True)
+            
+            if view_details:
                 self.show_grid_details(selected_column, selected_row)
         else:
             st.info("Upload a CSV file to visualize the warehouse grid.")
+        
+        self.show_perf_stats(stats_placeholder)
+        self.show_memory_report(memory_placeholder)
+    
+    def show_perf_stats(self, placeholder):
+        """Show last/p50/p95 timings per operation with the figure and data sizes"""
+        with placeholder.container():
+            rows = self.perf.summary_rows()
+            if rows:
+                import pandas as pd
+                st.dataframe(pd.DataFrame(rows, columns=SUMMARY_HEADERS), hide_index=True)
+            elif not self.perf.enabled:
+                st.caption("Tick \"Time operations\" to time loading, analysis, searches and drawing.")
+            gauges = self.perf.describe_gauges()
+            if self.perf.trace_path:
+                gauges += f" - tracing to {self.perf.trace_path}"
+            if gauges:
+                st.caption(gauges)
+            if rows and st.button("Reset Timings"):
+                self.perf.clear()
+                st.rerun()
+            
+    def show_memory_report(self, placeholder):
+        """Show the bytes held by each part of the loaded dataset, or offer to start tracing"""
+        with placeholder.container():
+            rows = st.session_state['data'].memory.report_rows()
+            if rows:
+                import pandas as pd
+                st.dataframe(pd.DataFrame(rows, columns=REPORT_HEADERS), hide_index=True)
+            else:
+                st.caption("Memory is only measured while allocations are traced, which slows loading down. "
+                           "Starting reloads the current upload to measure it.")
+                if st.button("Start Memory Tracing"):
+                    start_tracing()
+                    st.session_state.pop('loaded_file_id', None)
+                    st.rerun()
             
     def load_data_from_file(self, uploaded_file):
-        # Clear existing data
-        st.session_state['csv_data'] = []
-        st.session_state['grid_data'] = defaultdict(lambda: defaultdict(list))
-        st.session_state['highlighted_cells'] = set()
-        st.session_state['current_filter'] = None
+        # Load and analyze the upload, streaming compressed uploads and zip
+        # archives through the decompressor; Parquet and Arrow uploads are
+        # read column-wise through pandas
+        self.add_dataset(uploaded_file.name, WarehouseData(self.perf).load(uploaded_file))
         
-        # Load CSV data
-        # Convert BytesIO to StringIO for proper CSV parsing
-        stringio = io.StringIO(uploaded_file.getvalue().decode("utf-8"))
-        reader = csv.reader(stringio)
+        # Log what the dataset holds when allocations are traced
+        if st.session_state['data'].memory.parts:
+            print(f"Loaded {uploaded_file.name}. {st.session_state['data'].memory.describe()}")
+    
+    def load_snapshot_as_of(self, store_dir, as_of):
+        """Load the grid state at a point in time from a snapshot store"""
+        self.add_dataset(f"{store_dir} as of {as_of}", WarehouseData(self.perf).load_snapshot(store_dir, as_of))
+    
+    def stash_dataset(self):
+        """Keep the current session state with the current dataset before another is shown"""
+        datasets = st.session_state['datasets']
+        if st.session_state['dataset_name'] in datasets:
+            datasets.entries[st.session_state['dataset_name']].state = {
+                key: st.session_state.get(key) for key in DATASET_STATE}
+            # The memory budget does not count search indexes, so only the shown dataset keeps them
+            st.session_state['data'].drop_indexes()
+    
+    def add_dataset(self, name, data):
+        """Show a newly loaded dataset with a clean view and keep it for switching back to"""
+        self.stash_dataset()
+        self.clear_loaded_state()
+        st.session_state['grid_matrix'] = None
+        st.session_state['data'] = data
+        st.session_state['dataset_name'] = name
+        self.reset_replay()
         
-        # Read the header row to find column indices
-        headers = next(reader)
+        datasets = st.session_state['datasets']
+        evicted = datasets.add(name, data, {key: st.session_state.get(key) for key in DATASET_STATE})
+        if evicted:
+            st.info(f"Closed {', '.join(evicted)} to stay within the memory budget ({datasets.describe()})")
+    
+    def switch_dataset(self, name):
+        """Show an already loaded dataset with the highlights and filter it had"""
+        if st.session_state['live_listener']:
+            self.stop_live_scans()
+        self.stash_dataset()
         
-        # Find the indices of garment_sku and location_id columns (case insensitive)
-        sku_idx = None
-        location_idx = None
+        entry = st.session_state['datasets'].get(name)
+        st.session_state['data'] = entry.data
+        st.session_state['dataset_name'] = name
+        for key in DATASET_STATE:
+            st.session_state[key] = entry.state[key]
+    
+    def clear_loaded_state(self):
+        """Clear highlights, comparisons and results that belong to the previous data"""
+        if st.session_state['live_listener']:
+            self.stop_live_scans()
+        st.session_state['highlight_mask'] = 0
+        st.session_state['current_filter'] = None
+        st.session_state['diff'] = None
+        st.session_state['cell_overlay'] = {}
+        st.session_state['pick_list_result'] = None
+        st.session_state['pick_route'] = None
+        st.session_state['nearest_empty'] = None
+    
+    def show_diff(self, old_file):
+        """Diff an older scan against the loaded data and overlay the changed cells"""
+        with self.perf.span("diff"):
+            diff = SnapshotDiff(load_scan_pairs(old_file), st.session_state['data'].csv_data)
+        st.session_state['diff'] = diff
+        st.session_state['cell_overlay'] = diff.cell_categories()
+        st.session_state['highlight_mask'] = 0
+        st.session_state['current_filter'] = "diff"
+    
+    def reset_replay(self):
+        """Build the replay for newly loaded data and park the slider at the end"""
+        data = st.session_state['data']
         
-        for idx, header in enumerate(headers):
-            if header.lower() == "garment_sku":
-                sku_idx = idx
-            elif header.lower() == "location_id":
-                location_idx = idx
+        # The old replay is dropped first, so the memory track sees only the new one
+        st.session_state['replay'] = None
+        with data.memory.track("replay", accumulate=True):
+            st.session_state['replay'] = GridReplay(data.scan_events) if data.scan_events else None
+            data.scan_events = []
+        st.session_state['replay_active'] = False
+        if st.session_state['replay']:
+            st.session_state['replay_position'] = len(st.session_state['replay'])
+    
+    def seek_replay(self, position):
+        """Apply only the per-minute deltas between the old and new slider positions"""
+        replay = st.session_state['replay']
         
-        # Verify we found the required columns
-        if sku_idx is None or location_idx is None:
-            raise ValueError("CSV file must contain 'garment_sku' and 'location_id' columns")
+        # The first move switches the grid over to the replay's own state,
+        # which holds the latest scan of each bin
+        if not st.session_state.get('replay_active'):
+            if position == len(replay):
+                return
+            st.session_state['data'].start_replay(replay)
+            st.session_state['replay_active'] = True
         
-        # Process data rows
-        for row in reader:
-            # Skip rows that don't have enough columns
-            if len(row) <= max(sku_idx, location_idx):
-                continue
-            
-            # Extract sku and location values
-            sku = row[sku_idx]
-            location = row[location_idx]
-            
-            # Save data for search functionality
-            st.session_state['csv_data'].append((sku, location))
-            
-            # Extract grid location from bin location
-            if len(location) >= 5 and location.startswith('R'):
-                level = location[1:2]  # e.g., 1 from R1S32-N-AT1
-                column_letter = location[2:3]  # e.g., S from R1S32-N-AT1
-                row_num = location[3:5]  # e.g., 32 from R1S32-N-AT1
-                
-                column = level + column_letter  # e.g., 1S
-                bin_code = location  # Full bin location
-                
-                # Add SKU to the grid's bin list
-                st.session_state['grid_data'][column][row_num].append((sku, bin_code))
-        
-        # Analyze the data for duplicates and empty bins
-        self.analyze_data()
-    
-    def analyze_data(self):
-        sku_locations = defaultdict(list)
-        st.session_state['duplicate_skus'] = set()
-        st.session_state['empty_bins_locations'] = set()
-        
-        # Find duplicate SKUs and empty bins
-        for column in st.session_state['grid_data']:
-            for row in st.session_state['grid_data'][column]:
-                for sku, bin_location in st.session_state['grid_data'][column][row]:
-                    # Track locations for each SKU
-                    sku_locations[sku].append((column, row))
-                    
-                    # Check for empty bins - including both "EMPTY" SKUs and empty SKU fields
-                    if sku.upper() == "EMPTY" or not sku:
-                        st.session_state['empty_bins_locations'].add((column, row))
+        # Search data and analysis follow the changed bins only
+        with self.perf.span("replay_seek"):
+            changed_cells = st.session_state['data'].seek_replay(replay, position)
+            self.patch_grid_matrix(changed_cells)
+        st.session_state['nearest_empty'] = None
+    
+    def start_live_scans(self, address):
+        """Listen for scanner events; the grid switches to the latest scan of each bin
+
+        Raises ValueError for a malformed address and OSError when it cannot be used.
+        """
+        st.session_state['live_listener'] = ScanListener(address).start()
         
-        # Find which SKUs appear in multiple locations
-        for sku, locations in sku_locations.items():
-            # Only consider non-empty SKUs for duplicates
-            if len(locations) > 1 and sku.upper() != "EMPTY" and sku.strip() and len(sku) == 9:
-                st.session_state['duplicate_skus'].add(sku)
+        # Live scans take over from the replay, each scan replacing what its bin holds
+        st.session_state['replay'] = None
+        st.session_state['replay_active'] = False
+        st.session_state['data'].start_live()
+        st.session_state['nearest_empty'] = None
+    
+    def stop_live_scans(self):
+        """Stop listening; the grid keeps the scans applied so far"""
+        st.session_state['live_listener'].stop()
+        st.session_state['live_listener'] = None
+    
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def poll_live_scans(self):
+        """Apply the scans received since the last poll to the changed cells, then redraw the app"""
+        listener = st.session_state['live_listener']
+        events = listener.drain() if listener else []
+        if events:
+            changed_cells = st.session_state['data'].apply_scans(events)
+            self.patch_grid_matrix(changed_cells)
+            st.session_state['nearest_empty'] = None
+            st.rerun()
     
     def create_grid_visualization(self):
         """Create grid visualization using Plotly with labeled axes, bordered cells, and click events"""
-        # Create a matrix for the heatmap (this is the standard approach)
-        grid_values = []
-        hover_texts = []
-        
-        # Populate the grid: 0 = empty, 1 = occupied, 2 = highlighted
-        for col_idx, col_name in enumerate(self.columns):
-            row_values = []
-            hover_row = []
-            for row_idx, row_name in enumerate(self.rows):
-                # Check if cell has items
-                has_items = col_name in st.session_state['grid_data'] and row_name in st.session_state['grid_data'][col_name]
-                
-                # Check if cell is highlighted
-                is_highlighted = (col_name, row_name) in st.session_state['highlighted_cells']
-                
-                # Set cell value based on state
-                if is_highlighted:
-                    row_values.append(2)  # Highlighted
-                elif has_items:
-                    row_values.append(1)  # Occupied
-                else:
-                    row_values.append(0)  # Empty
-                
-                # Create hover text
-                if has_items:
-                    items_count = len(st.session_state['grid_data'][col_name][row_name])
-                    hover_row.append(f"Location: {col_name}{row_name}<br>Items: {items_count}")
-                else:
-                    hover_row.append(f"Location: {col_name}{row_name}<br>Empty")
-            
-            grid_values.append(row_values)
-            hover_texts.append(hover_row)
+        import plotly.graph_objects as go
+        
+        # Reuse the cached heatmap matrix unless data or highlights changed
+        grid_values, hover_texts = self.get_grid_matrix()
         
         # Apply current zoom level to figure dimensions
         base_height = 800
@@ -304,7 +654,11 @@ class WarehouseGridVisualizerStreamlit:
             z=grid_values,
             x=self.rows,
             y=self.columns,
-            colorscale=[[0, '#303030'], [0.5, '#50C878'], [1, '#FF8C00']],  # Darker empty cells, vibrant green and orange
+            # One flat color band per cell value
+            colorscale=[[(value + edge) / len(CELL_COLORS), color]
+                        for value, color in enumerate(CELL_COLORS) for edge in (0, 1)],
+            zmin=-0.5,
+            zmax=len(CELL_COLORS) - 0.5,
             showscale=False,
             hoverinfo='text',
             text=hover_texts
@@ -396,20 +750,108 @@ class WarehouseGridVisualizerStreamlit:
                 )
             )
         
+        # Planned pick route as one path; cross aisles sit just off the grid edges
+        route = st.session_state['pick_route']
+        if route:
+            path = " L ".join(f"{x} {y}" for x, y in map(self.route_position, route.path()))
+            shapes.append(dict(type='path', path=f"M {path}", xref='x', yref='y',
+                               line=dict(color='blue', width=3)))
+            fig.add_trace(go.Scatter(
+                x=[row for _, row in route.cells],
+                y=[column for column, _ in route.cells],
+                mode='text',
+                text=[str(stop) for stop in range(1, len(route.cells) + 1)],
+                textfont=dict(color='blue', size=10),
+                hoverinfo='skip',
+                showlegend=False
+            ))
+        
         fig.update_layout(shapes=shapes)
         
         return fig
     
+    def route_position(self, point):
+        """Return the heatmap (x, y) position of a route point; rows run from 90 down to 01"""
+        level, aisle, row = point
+        row = min(max(row, 0.5), len(self.rows) + 0.5)
+        return len(self.rows) - row, self.columns.index(f"{level}{chr(ord('A') + aisle)}")
+    
+    def grid_cell_value(self, col_name, row_name):
+        """Return the heatmap value of a cell: 0 = empty, 1 = occupied, 2 = highlighted, 3+ = diff"""
+        if self.cell_space.contains(st.session_state['highlight_mask'], (col_name, row_name)):
+            return 2  # Highlighted
+        category = st.session_state['cell_overlay'].get((col_name, row_name))
+        if category:
+            return 3 + CATEGORIES.index(category)  # Changed since the compared scan
+        grid_data = st.session_state['data'].grid_data
+        if col_name in grid_data and row_name in grid_data[col_name]:
+            return 1  # Occupied
+        return 0  # Empty
+    
+    def grid_cell_hover(self, col_name, row_name):
+        """Return the hover text of a cell"""
+        grid_data = st.session_state['data'].grid_data
+        if col_name in grid_data and row_name in grid_data[col_name]:
+            items_count = len(grid_data[col_name][row_name])
+            return f"Location: {col_name}{row_name}<br>Items: {items_count}"
+        return f"Location: {col_name}{row_name}<br>Empty"
+    
+    def get_grid_matrix(self):
+        """Return the heatmap values and hover texts, rebuilding them only when stale
+        
+        The cache is tied to the grid_data and cell_overlay objects, which are
+        replaced whenever data is loaded, and to the value of the highlight mask.
+        """
+        cache = st.session_state['grid_matrix']
+        grid_data = st.session_state['data'].grid_data
+        if (cache and cache['grid_data'] is grid_data
+                and cache['highlight_mask'] == st.session_state['highlight_mask']
+                and cache['overlay'] is st.session_state['cell_overlay']):
+            return cache['values'], cache['hover']
+        
+        # Drop the stale matrix first, so the memory track sees only the new one
+        st.session_state['grid_matrix'] = cache = None
+        with self.perf.span("grid_matrix"), st.session_state['data'].memory.track("heatmap matrix"):
+            grid_values = [[self.grid_cell_value(col_name, row_name) for row_name in self.rows]
+                           for col_name in self.columns]
+            hover_texts = [[self.grid_cell_hover(col_name, row_name) for row_name in self.rows]
+                           for col_name in self.columns]
+        
+        st.session_state['grid_matrix'] = {
+            'grid_data': grid_data,
+            'highlight_mask': st.session_state['highlight_mask'],
+            'overlay': st.session_state['cell_overlay'],
+            'values': grid_values,
+            'hover': hover_texts,
+        }
+        return grid_values, hover_texts
+    
+    def patch_grid_matrix(self, cells):
+        """Update only the given cells in the cached heatmap matrix"""
+        cache = st.session_state['grid_matrix']
+        if not cache or cache['grid_data'] is not st.session_state['data'].grid_data:
+            return  # The next render rebuilds the whole matrix anyway
+        
+        for col_name, row_name in cells:
+            col_idx = self.column_index.get(col_name)
+            row_idx = self.row_index.get(row_name)
+            if col_idx is None or row_idx is None:
+                continue
+            cache['values'][col_idx][row_idx] = self.grid_cell_value(col_name, row_name)
+            cache['hover'][col_idx][row_idx] = self.grid_cell_hover(col_name, row_name)
+    
     def show_grid_details(self, column, row):
         st.subheader(f"Details for Cell {column}{row}")
         
-        if column in st.session_state['grid_data'] and row in st.session_state['grid_data'][column]:
+        data = st.session_state['data']
+        if data.cell_items(column, row):
             # Create a DataFrame to display the items
             items = []
-            for sku, bin_location in st.session_state['grid_data'][column][row]:
+            for sku, bin_location in data.cell_items(column, row):
                 items.append({"SKU": sku, "Bin Location": bin_location})
             
             # Create DataFrame
+            import pandas as pd
             df = pd.DataFrame(items)
             
             # Highlight rows based on current filter
@@ -417,9 +859,9 @@ class WarehouseGridVisualizerStreamlit:
                 sku = row['SKU']
                 style = ''
                 
-                if st.session_state['current_filter'] == 'duplicates' and sku in st.session_state['duplicate_skus']:
+                if st.session_state['current_filter'] == 'duplicates' and sku in data.duplicate_skus:
                     style = 'background-color: lightyellow'
-                elif st.session_state['current_filter'] == 'empty' and (sku.upper() == "EMPTY" or not sku.strip()):
+                elif st.session_state['current_filter'] == 'empty' and is_empty_sku(sku):
                     style = 'background-color: lightyellow'
                 
                 return [style, style]
@@ -442,195 +884,150 @@ class WarehouseGridVisualizerStreamlit:
         else:
             st.info("No items found in this cell.")
     
-    def search_grid(self, sku_query, loc_query):
+    def search_grid(self, sku_query, loc_query, fuzzy_distance=None, mode=SUBSTRING):
         # If no search terms provided, return
         if not sku_query and not loc_query:
             st.warning("Please enter an SKU or location to search.")
             return
         
-        # Clear current highlights
-        st.session_state['highlighted_cells'] = set()
-        st.session_state['current_filter'] = None
-        
-        # Find matching locations
-        matching_locations = set()
-        
-        for sku, location in st.session_state['csv_data']:
-            # Skip if location is too short
-            if len(location) < 5:
-                continue
-                
-            # Extract grid location
-            if location.startswith('R'):
-                level = location[1:2]
-                column_letter = location[2:3]
-                row = location[3:5]
-                column = level + column_letter
-                
-                # Check if SKU or location matches search criteria
-                sku_match = sku_query and sku_query.upper() in sku.upper()
-                loc_match = loc_query and loc_query.upper() in location.upper()
-                
-                if sku_match or loc_match:
-                    matching_locations.add((column, row))
+        # Prefix and component location queries go through the location index,
+        # fuzzy mode finds the nearest SKUs, and wildcard/regex queries are
+        # matched against distinct values
+        data = st.session_state['data']
+        try:
+            matching_locations, fuzzy_matches = data.search(sku_query, loc_query, mode, fuzzy_distance)
+        except re.error as e:
+            st.error(f"Invalid regular expression: {str(e)}")
+            return
+        except ValueError as e:
+            st.error(str(e))
+            return
         
         # Update highlighted cells
-        st.session_state['highlighted_cells'] = matching_locations
+        self.highlight(matching_locations, "search")
         
-        if matching_locations:
+        if matching_locations and fuzzy_matches:
+            st.success(f"Found {len(matching_locations)} matching locations. "
+                       f"Nearest SKUs: {describe_matches(fuzzy_matches)}")
+        elif matching_locations:
             st.success(f"Found {len(matching_locations)} matching locations.")
         else:
             st.warning("No matching locations found.")
     
+    def look_up_pick_list(self, skus):
+        """Resolve a pick list through the SKU index and highlight every cell that holds one"""
+        with self.perf.span("pick_list"):
+            result = st.session_state['data'].sku_index().lookup(skus)
+        st.session_state['pick_list_result'] = result
+        self.highlight(result.cells, "pick_list")
+        
+        if result.not_found:
+            st.warning(result.summary())
+        else:
+            st.success(result.summary())
+    
+    def highlight(self, cells, filter_name):
+        """Combine a filter result with the current highlight using the selected operator"""
+        op = st.session_state.get('combine_op', REPLACE)
+        new_mask = combine(st.session_state['highlight_mask'], self.cell_space.mask(cells), op)
+        st.session_state['highlight_mask'] = new_mask
+        st.session_state['current_filter'] = filter_name if op == REPLACE else "combined"
+        
+        if op != REPLACE:
+            st.info(f"{op} previous highlight: {bin(new_mask).count('1')} locations highlighted.")
+    
+    def invert_highlight(self):
+        """Highlight every cell that is not highlighted now (NOT)"""
+        st.session_state['highlight_mask'] = self.cell_space.invert(st.session_state['highlight_mask'])
+        st.session_state['current_filter'] = "combined"
+    
+    def route_layout(self):
+        """Return the walking distance tables, built the first time a route or plan needs them"""
+        if st.session_state['route_layout'] is None:
+            st.session_state['route_layout'] = AisleLayout(self.columns, self.rows)
+        return st.session_state['route_layout']
+    
+    def current_consolidation_plan(self):
+        """Return the consolidation plan if it was planned for the current data, else None"""
+        data = st.session_state['data']
+        if data.has_index('consolidation'):
+            return data.consolidation_plan(self.route_layout())
+        return None
+    
+    def show_consolidation_moves(self):
+        """Plan moves gathering each duplicate SKU into the fewest bins and highlight their sources"""
+        plan = self.current_consolidation_plan()
+        if plan is None:
+            with st.spinner("Planning consolidation moves..."):
+                plan = st.session_state['data'].consolidation_plan(self.route_layout())
+        
+        self.highlight(plan.source_cells(), "consolidation")
+        st.success(plan.summary())
+    
     def show_duplicate_skus(self):
         # Find all locations with duplicate SKUs
-        duplicate_locations = self.find_duplicate_skus()
+        duplicate_locations = st.session_state['data'].duplicate_cells()
         
         # Update highlighted cells
-        st.session_state['highlighted_cells'] = duplicate_locations
-        st.session_state['current_filter'] = "duplicates"
+        self.highlight(duplicate_locations, "duplicates")
         
         if duplicate_locations:
             st.success(f"Found {len(duplicate_locations)} locations with duplicate SKUs.")
         else:
             st.warning("No duplicate SKUs found.")
     
-    def find_duplicate_skus(self):
-        """Find all SKUs that appear in multiple locations (excluding EMPTY and blank SKUs)"""
-        sku_locations = defaultdict(list)
-        duplicate_locations = set()
+    def show_nearest_empty(self, query):
+        """Highlight the cells of the empty bins nearest a location on the same level"""
+        try:
+            nearest, cells = st.session_state['data'].empty_bin_index.nearest_cells(query)
+        except ValueError as e:
+            st.error(str(e))
+            return
         
-        # First pass: collect all bin locations for each SKU
-        for sku, location in st.session_state['csv_data']:
-            # Skip empty, EMPTY, or SKUs that aren't exactly 9 characters
-            if not sku.strip() or sku.upper() == "EMPTY" or len(sku) != 9:
-                continue
-                
-            if len(location) >= 5 and location.startswith('R'):
-                try:
-                    level = location[1:2]
-                    column_letter = location[2:3]
-                    row_num = location[3:5]
-                    
-                    column = level + column_letter
-                    sku_locations[sku].append((column, row_num))
-                except:
-                    # Skip invalid formats
-                    pass
-        
-        # Now find the SKUs that appear in multiple locations
-        for sku, locations in sku_locations.items():
-            if len(locations) > 1:
-                duplicate_locations.update(locations)
-                
-        return duplicate_locations
+        st.session_state['nearest_empty'] = nearest
+        self.highlight(cells, "nearest_empty")
+        
+        name = "".join(query) if isinstance(query, tuple) else query.strip().upper()
+        if nearest:
+            st.success(f"Nearest empty bins to {name}: {describe_nearest(nearest)}")
+        else:
+            st.warning(f"No empty bins on the level of {name}.")
     
     def show_empty_bins(self):
         # Find all locations with empty bins
-        empty_locations = self.find_empty_bins()
+        empty_locations = st.session_state['data'].empty_cells()
         
         # Update highlighted cells
-        st.session_state['highlighted_cells'] = empty_locations
-        st.session_state['current_filter'] = "empty"
+        self.highlight(empty_locations, "empty")
         
         if empty_locations:
             st.success(f"Found {len(empty_locations)} locations with empty bins.")
         else:
             st.warning("No empty bins found.")
     
-    def find_empty_bins(self):
-        """Find all locations with empty bins in the CSV data"""
-        empty_bins = set()
+    def show_style(self, style):
+        """Highlight every cell holding any size of a style"""
+        style_index = st.session_state['data'].style_index()
+        sizes = style_index.sizes(style)
+        cells = style_index.cells(style)
+        self.highlight(cells, "style")
         
-        for sku, location in st.session_state['csv_data']:
-            # Skip invalid locations
-            if len(location) < 5 or not location.startswith('R'):
-                continue
-                
-            # Check if this is an empty SKU (either 'EMPTY' or a blank string)
-            if sku.upper() == "EMPTY" or not sku.strip():
-                # Extract grid coordinates
-                try:
-                    level = location[1:2]
-                    column_letter = location[2:3]
-                    row_num = location[3:5]
-                    
-                    column = level + column_letter
-                    empty_bins.add((column, row_num))
-                except:
-                    # Skip invalid formats
-                    pass
-                    
-        return empty_bins
+        if sizes:
+            st.success(f"Style {style_index.normalize(style)}: sizes {', '.join(sorted(sizes))} "
+                       f"in {len(cells)} locations.")
+        else:
+            st.warning(f"Style {style_index.normalize(style)} not found.")
     
-    def prepare_duplicate_skus_export(self):
-        """Prepare data for duplicate SKUs export"""
-        # Dictionary to store all locations for each SKU
-        sku_locations = defaultdict(list)
+    def show_style_duplicates(self):
+        """Highlight grid cells holding a style whose sizes are spread over several cells"""
+        duplicate_styles = st.session_state['data'].style_index().duplicate_styles()
+        cells = set().union(*duplicate_styles.values())
+        self.highlight(cells, "style_duplicates")
         
-        # First pass: collect all bin locations for each SKU
-        for sku, location in st.session_state['csv_data']:
-            # Skip empty, EMPTY, or SKUs that aren't exactly 9 characters
-            if not sku.strip() or sku.upper() == "EMPTY" or len(sku) != 9:
-                continue
-                
-            if len(location) >= 5 and location.startswith('R'):
-                sku_locations[sku].append(location)
-        
-        # Second pass: filter to only keep duplicates and format for export
-        export_data = []
-        
-        for sku, locations in sku_locations.items():
-            if len(locations) > 1:  # It's a duplicate
-                # Sort locations for consistency
-                locations.sort()
-                # Join all locations with commas
-                locations_text = ", ".join(locations)
-                export_data.append((sku, locations_text))
-        
-        # Sort by SKU for easier reading
-        export_data.sort(key=lambda x: x[0])
-        
-        return export_data
-    
-    def prepare_empty_bins_export(self):
-        """Prepare data for empty bins export"""
-        # Dictionary to store bin locations for each grid location
-        grid_locations = defaultdict(list)
-        
-        # Find all empty bins
-        for sku, location in st.session_state['csv_data']:
-            # Check if this is an empty bin
-            if sku.upper() == "EMPTY" or not sku.strip():
-                if len(location) >= 5 and location.startswith('R'):
-                    try:
-                        # Extract grid coordinates
-                        level = location[1:2]
-                        column_letter = location[2:3]
-                        row_num = location[3:5]
-                        
-                        grid_loc = f"{level}{column_letter}{row_num}"
-                        
-                        # Add this bin location to the appropriate grid location
-                        grid_locations[grid_loc].append(location)
-                    except:
-                        # Skip invalid formats
-                        continue
-        
-        # Format for export
-        export_data = []
-        
-        for grid_loc, bin_locations in grid_locations.items():
-            # Sort locations for consistency
-            bin_locations.sort()
-            # Join all locations with commas
-            locations_text = ", ".join(bin_locations)
-            export_data.append((grid_loc, locations_text))
-        
-        # Sort by grid location for easier reading
-        export_data.sort(key=lambda x: x[0])
-        
-        return export_data
+        if duplicate_styles:
+            st.success(f"Found {len(duplicate_styles)} styles spread over {len(cells)} locations.")
+        else:
+            st.warning("No styles spread over several locations.")
     
     def convert_to_csv(self, data, headers):
         """Convert data to CSV format for download"""
@@ -647,4 +1044,5 @@ class WarehouseGridVisualizerStreamlit:
 
 if __name__ == "__main__":
     app = WarehouseGridVisualizerStreamlit()
-    app.run() 
\ No newline at end of file
+    with app.perf.span("rerun"):
+        app.run() 
\ No newline at end of file
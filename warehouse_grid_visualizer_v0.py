@@ -1,7 +1,35 @@
-import csv
+import time
+
+# Taken before the other imports, so the startup times include them
+STARTED = time.perf_counter()
+
+import re
 import tkinter as tk
-from tkinter import ttk, StringVar, messagebox, filedialog
-from collections import defaultdict
+from tkinter import ttk, StringVar, messagebox, filedialog, simpledialog
+
+from scan_io import EXPORT_FILETYPES, SCAN_FILETYPES, write_table
+from grid_replay import GridReplay
+from bins import is_empty_sku
+from snapshot_store import SnapshotStore
+from snapshot_diff import CATEGORY_COLORS, CATEGORY_LABELS, CATEGORIES, EXPORT_HEADERS, \
+    SnapshotDiff, load_scan_pairs
+from fuzzy_search import describe_matches
+from empty_bins import describe_nearest
+from consolidation import EXPORT_HEADERS as MOVE_HEADERS
+from pick_route import AisleLayout, PickRoute
+from cell_masks import COMBINE_OPS, REPLACE, CellSpace, combine
+from pattern_search import SEARCH_MODES, SUBSTRING
+from sku_styles import EXPORT_HEADERS as STYLE_DUPLICATE_HEADERS
+from sku_lookup import EXPORT_HEADERS as PICK_LIST_HEADERS, parse_sku_list, read_sku_list
+from warehouse_core import DUPLICATE_HEADERS, EMPTY_BINS_HEADERS, WarehouseData
+from perf_stats import SUMMARY_HEADERS, PerfStats
+from memory_report import start_tracing, start_tracing_from_env
+from live_scans import DEFAULT_ADDRESS, DEFAULT_FRAME_RATE, ScanListener
+from dataset_cache import DatasetCache
+
+# View state kept per loaded dataset and restored when switching back to it
+DATASET_STATE = ("highlight_mask", "current_filter", "diff", "cell_overlay", "replay", "replay_active",
+                 "pick_list_result", "pick_route", "last_clicked")
 
 class WarehouseGridVisualizer:
     def __init__(self, root, csv_file=None):
@@ -24,8 +52,10 @@ class WarehouseGridVisualizer:
         self.header_height = 30
         self.header_width = 40
         
-        # Track highlighted cells
-        self.highlighted_cells = set()
+        # Highlighted cells as a bitset over cell ids, so filter results can be
+        # combined with AND/OR/NOT; cell_color reads the bits directly
+        self.cell_space = CellSpace(self.columns, self.rows)
+        self.highlight_mask = 0
         
         # Track last clicked position
         self.last_clicked = None
@@ -33,134 +63,419 @@ class WarehouseGridVisualizer:
         # Track current filter mode
         self.current_filter = None
         
-        # Initialize data structures
-        self.csv_data = []
-        self.grid_data = defaultdict(lambda: defaultdict(list))
+        # Timing spans for the stats panel, on from the start with WH_PERF_STATS
+        # or WH_PERF_TRACE and otherwise while the panel is open
+        self.perf = PerfStats.from_env()
+        self.perf_always_on = self.perf.enabled
+        self.stats_window = None
+        
+        # Allocation tracing for the memory report, on from the start with WH_MEMORY_TRACE
+        start_tracing_from_env()
+        
+        # Loaded dataset with its analysis and search indexes, and the other
+        # datasets loaded this session for switching back to
+        self.data = WarehouseData(self.perf)
+        self.datasets = DatasetCache.from_env()
+        self.dataset_name = None
         self.cell_objects = {}
         
-        # Track duplicate SKUs and empty bins
-        self.duplicate_skus = set()
-        self.empty_bins_locations = set()
+        # Time-slider replay of the loaded scans (built when timestamps exist)
+        self.replay = None
+        self.replay_active = False
+        
+        # Scanner events received on a local socket, applied once per frame
+        self.live_listener = None
+        self.live_job = None
+        
+        # Last pick list lookup
+        self.pick_list_result = None
+        
+        # Walking distance tables for the fixed layout (built by get_route_layout()
+        # on first use), and the last planned pick route
+        self.route_layout = None
+        self.pick_route = None
+        
+        # Diff against an older scan: (column, row) -> overlay color
+        self.diff = None
+        self.cell_overlay = {}
+        
+        # The window is shown first with an empty canvas; the grid is drawn
+        # once it is mapped and sized, and the file given here loaded after that
+        self.grid_ready = False
+        self.pending_file = csv_file
         
         # Create UI
         self.create_ui()
-        
-        # Load data from CSV if file is provided
-        if csv_file:
-            self.load_data_from_file(csv_file)
     
     def load_data_from_file(self, csv_file):
         """Load CSV data and redraw the grid"""
         try:
-            self.csv_data = []
-            self.grid_data = self.load_csv_data(csv_file)
-            self.current_file_label.config(text=f"Current file: {csv_file}")
-            
-            # Analyze the data for duplicates and empty bins
-            self.analyze_data()
-            
-            self.draw_grid()
-            
-            # Update status bar
-            occupied_count = sum(1 for c in self.columns for r in self.rows 
-                               if c in self.grid_data and r in self.grid_data[c])
-            total_cells = len(self.columns) * len(self.rows)
-            self.status_bar.config(text=f"Grid: {len(self.columns)}x{len(self.rows)} = {total_cells} cells, Occupied: {occupied_count}")
+            data = WarehouseData(self.perf).load(csv_file)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file: {str(e)}")
             self.status_bar.config(text="Error loading file")
+            return
+        self.add_dataset(csv_file, data, f"Current file: {csv_file}")
     
-    def analyze_data(self):
-        """Analyze the data to find duplicate SKUs and empty bins"""
-        sku_locations = defaultdict(list)
-        self.duplicate_skus = set()
-        self.empty_bins_locations = set()
-        
-        # Find duplicate SKUs and empty bins
-        for column in self.grid_data:
-            for row in self.grid_data[column]:
-                for sku, bin_location in self.grid_data[column][row]:
-                    # Track locations for each SKU
-                    sku_locations[sku].append((column, row))
-                    
-                    # Check for empty bins - including both "EMPTY" SKUs and empty SKU fields
-                    if sku.upper() == "EMPTY" or not sku:
-                        self.empty_bins_locations.add((column, row))
+    def load_snapshot_as_of(self, store_dir, as_of):
+        """Load the grid state at a point in time from a snapshot store"""
+        try:
+            data = WarehouseData(self.perf).load_snapshot(store_dir, as_of)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load history: {str(e)}")
+            self.status_bar.config(text="Error loading history")
+            return
+        self.add_dataset(f"{store_dir} as of {as_of}", data, f"History: {store_dir} as of {as_of}")
+    
+    def dataset_state(self):
+        """Return the current view state to keep with the current dataset"""
+        state = {name: getattr(self, name) for name in DATASET_STATE}
+        state["label"] = self.current_file_label.cget("text")
+        return state
+    
+    def stash_dataset(self):
+        """Keep the current view state with the current dataset before another is shown"""
+        if self.dataset_name in self.datasets:
+            self.datasets.entries[self.dataset_name].state = self.dataset_state()
+            # The memory budget does not count search indexes, so only the shown dataset keeps them
+            self.data.drop_indexes()
+    
+    def add_dataset(self, name, data, label_text):
+        """Show a newly loaded dataset with a clean view and keep it for switching back to"""
+        self.stash_dataset()
+        self.data = data
+        self.dataset_name = name
+        self.highlight_mask = 0
+        self.current_filter = None
+        self.cell_overlay = {}
+        self.pick_list_result = None
+        self.last_clicked = None
+        self.show_loaded_data(label_text)
         
-        # Find which SKUs appear in multiple locations
-        for sku, locations in sku_locations.items():
-            # Only consider non-empty SKUs for duplicates
-            if len(locations) > 1 and sku.upper() != "EMPTY" and sku.strip():
-                self.duplicate_skus.add(sku)
+        evicted = self.datasets.add(name, data, self.dataset_state())
+        self.update_dataset_choices()
+        if evicted:
+            self.status_bar.config(text=f"{self.status_bar.cget('text')}. Closed {', '.join(evicted)} to stay "
+                                        f"within the memory budget ({self.datasets.describe()})")
+    
+    def switch_dataset(self, name):
+        """Show an already loaded dataset with the highlights and filter it had"""
+        if name == self.dataset_name or name not in self.datasets:
+            return
+        if self.live_listener:
+            self.stop_live_scans()
+        self.stash_dataset()
+        
+        entry = self.datasets.get(name)
+        self.data = entry.data
+        self.dataset_name = name
+        for attribute in DATASET_STATE:
+            setattr(self, attribute, entry.state[attribute])
+        self.current_file_label.config(text=entry.state["label"])
+        self.update_replay_controls()
+        self.draw_grid()
+        self.update_dataset_choices()
+        self.status_bar.config(text=f"Switched to {name} ({self.datasets.describe()})")
+    
+    def update_dataset_choices(self):
+        self.dataset_combo.config(values=self.datasets.names())
+        self.dataset_var.set(self.dataset_name or "")
+    
+    def on_dataset_selected(self, event):
+        self.switch_dataset(self.dataset_var.get())
+    
+    def show_loaded_data(self, label_text):
+        """Show newly loaded and analyzed data on the grid"""
+        self.current_file_label.config(text=label_text)
+        if self.live_listener:
+            self.stop_live_scans()
+        self.reset_replay()
+        self.diff = None
+        self.pick_route = None
         
-        # Update status
-        self.status_bar.config(text=f"Loaded data with {len(self.duplicate_skus)} duplicate SKUs and {len(self.empty_bins_locations)} empty bins")
+        self.draw_grid()
+        
+        # Log what the dataset holds when allocations are traced
+        if self.data.memory.parts:
+            print(f"Loaded {label_text}. {self.data.memory.describe()}")
+        
+        # Update status bar
+        occupied_count = self.data.occupied_count(self.columns, self.rows)
+        total_cells = len(self.columns) * len(self.rows)
+        self.status_bar.config(text=f"Grid: {len(self.columns)}x{len(self.rows)} = {total_cells} cells, Occupied: {occupied_count}")
     
-    def load_csv_data(self, csv_file):
-        """Load and organize data from the CSV file"""
-        # Dictionary to store SKUs by grid location
-        grid_data = defaultdict(lambda: defaultdict(list))
+    def reset_replay(self):
+        """Build the replay for newly loaded data and park the slider at the end"""
+        # The old replay is dropped first, so the memory track sees only the new one
+        self.replay = None
+        with self.data.memory.track("replay", accumulate=True):
+            self.replay = GridReplay(self.data.scan_events) if self.data.scan_events else None
+            self.data.scan_events = []
+        self.replay_active = False
+        self.update_replay_controls()
+    
+    def update_replay_controls(self):
+        """Show the slider at the replay's position (the end until it is moved), or disable it"""
+        if self.replay and len(self.replay):
+            position = self.replay.position if self.replay_active else len(self.replay)
+            self.replay_scale.config(state=tk.NORMAL, to=len(self.replay))
+            self.replay_scale.set(position)
+            self.replay_label.config(text=self.replay.label(position))
+        else:
+            self.replay_scale.config(to=0)
+            self.replay_scale.set(0)
+            self.replay_scale.config(state=tk.DISABLED)
+            self.replay_label.config(text="No timestamps loaded")
+    
+    def on_replay_slider(self, value):
+        """Apply only the per-minute deltas between the old and new slider positions"""
+        if not self.replay:
+            return
+        position = int(float(value))
+        if self.replay_active and position == self.replay.position:
+            return
         
-        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            
-            # Read the header row to find column indices
-            headers = next(reader)
-            
-            # Find the indices of garment_sku and location_id columns (case insensitive)
-            sku_idx = None
-            location_idx = None
-            
-            for idx, header in enumerate(headers):
-                if header.lower() == "garment_sku":
-                    sku_idx = idx
-                elif header.lower() == "location_id":
-                    location_idx = idx
-            
-            # Verify we found the required columns
-            if sku_idx is None or location_idx is None:
-                raise ValueError("CSV file must contain 'garment_sku' and 'location_id' columns")
-            
-            # Process data rows
-            for row in reader:
-                # Skip rows that don't have enough columns
-                if len(row) <= max(sku_idx, location_idx):
-                    continue
-                
-                # Extract sku and location values
-                sku = row[sku_idx]
-                location = row[location_idx]
-                
-                # Save data for search functionality (without timestamp)
-                self.csv_data.append((sku, location))
-                
-                # Extract grid location from bin location
-                # Example format: R1S32-N-AT1
-                # We need to extract R[1] (rack/level) and [S] (column) to form "1S"
-                # Then we need to extract [32] (row number)
-                if len(location) >= 5 and location.startswith('R'):
-                    level = location[1:2]  # e.g., 1 from R1S32-N-AT1
-                    column_letter = location[2:3]  # e.g., S from R1S32-N-AT1
-                    row_num = location[3:5]  # e.g., 32 from R1S32-N-AT1
-                    
-                    column = level + column_letter  # e.g., 1S
-                    bin_code = location  # Full bin location
-                    
-                    # Add SKU to the grid's bin list
-                    grid_data[column][row_num].append((sku, bin_code))
+        # The first move switches the grid over to the replay's own state,
+        # which holds the latest scan of each bin
+        if not self.replay_active:
+            if position == len(self.replay):
+                return
+            self.data.start_replay(self.replay)
+            self.replay_active = True
+            self.draw_grid()
         
-        return grid_data
+        # Search data and analysis follow the changed bins only
+        with self.perf.span("replay_seek"):
+            changed_cells = self.data.seek_replay(self.replay, position)
+        self.update_cell_colors(changed_cells)
+        self.replay_label.config(text=self.replay.label(position))
+        self.status_bar.config(text=f"Replay at {self.replay.label(self.replay.position)}: "
+                                    f"{len(self.data.csv_data)} bins scanned")
+    
+    def toggle_live_scans(self):
+        """Start listening for scanner events, or stop when already listening"""
+        if self.live_listener:
+            self.stop_live_scans()
+            return
+        address = simpledialog.askstring("Live Scans", "Listen for timestamp,sku,location lines on:",
+                                         initialvalue=DEFAULT_ADDRESS, parent=self.root)
+        if not address:
+            return
+        try:
+            self.live_listener = ScanListener(address.strip()).start()
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Live Scans", f"Cannot listen on {address}: {str(e)}")
+            return
+        
+        # Live scans take over from the replay; the grid switches to the
+        # latest scan of each bin, and each scan replaces what its bin holds
+        self.replay = None
+        self.replay_active = False
+        self.replay_scale.config(to=0)
+        self.replay_scale.set(0)
+        self.replay_scale.config(state=tk.DISABLED)
+        self.replay_label.config(text="Live")
+        
+        self.data.start_live()
+        self.draw_grid()
+        self.live_btn.config(text="Stop Live Scans")
+        self.status_bar.config(text=self.live_listener.describe())
+        self.live_job = self.root.after(round(1000 / DEFAULT_FRAME_RATE), self.apply_live_scans)
+    
+    def apply_live_scans(self):
+        """Apply the scans received since the last frame and repaint only the cells they changed"""
+        events = self.live_listener.drain()
+        if events:
+            changed_cells = self.data.apply_scans(events)
+            self.update_cell_colors(changed_cells)
+            self.status_bar.config(text=f"{self.live_listener.describe()}; last frame: {len(events)} scans, "
+                                        f"{len(changed_cells)} cells repainted")
+        self.live_job = self.root.after(round(1000 / DEFAULT_FRAME_RATE), self.apply_live_scans)
+    
+    def stop_live_scans(self):
+        """Stop listening; the grid keeps the scans applied so far"""
+        self.root.after_cancel(self.live_job)
+        self.live_job = None
+        self.live_listener.stop()
+        self.status_bar.config(text=f"Stopped. {self.live_listener.describe()}")
+        self.live_listener = None
+        self.live_btn.config(text="Live Scans...")
+        self.replay_label.config(text="No timestamps loaded")
+    
+    def cell_color(self, col_name, row_name):
+        """Return the fill color for a grid cell"""
+        if self.cell_space.contains(self.highlight_mask, (col_name, row_name)):
+            return "orange"
+        if (col_name, row_name) in self.cell_overlay:
+            return self.cell_overlay[(col_name, row_name)]
+        has_items = col_name in self.data.grid_data and row_name in self.data.grid_data[col_name]
+        return "green" if has_items else "white"
+    
+    def update_cell_colors(self, cells):
+        """Recolor only the given grid cells"""
+        with self.perf.span("recolor"):
+            for cell_key in cells:
+                cell = self.cell_objects.get(cell_key)
+                if cell:
+                    self.canvas.itemconfig(cell['id'], fill=self.cell_color(*cell_key))
+    
+    def update_perf_gauges(self):
+        """Record the canvas item count and the loaded rows and occupied cells"""
+        self.perf.set_gauges(canvas_items=len(self.canvas.find_all()),
+                             rows=len(self.data.csv_data),
+                             cells=self.data.occupied_count(self.columns, self.rows))
+    
+    def open_stats_window(self):
+        """Show last/p50/p95 timings per operation, refreshed every second while open"""
+        if self.stats_window:
+            self.stats_window.lift()
+            return
+        
+        self.perf.enabled = True
+        window = self.stats_window = tk.Toplevel(self.root)
+        window.title("Performance Stats")
+        window.geometry("520x400")
+        window.protocol("WM_DELETE_WINDOW", self.close_stats_window)
+        
+        tree = ttk.Treeview(window, columns=SUMMARY_HEADERS, show="headings")
+        for header in SUMMARY_HEADERS:
+            tree.heading(header, text=header)
+            first = header == SUMMARY_HEADERS[0]
+            tree.column(header, width=160 if first else 80, anchor=tk.W if first else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        
+        gauges_label = tk.Label(window, text="", anchor=tk.W)
+        gauges_label.pack(fill=tk.X, padx=10)
+        
+        button_frame = tk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Reset", command=self.perf.clear).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=self.close_stats_window).pack(side=tk.RIGHT, padx=5)
+        
+        def refresh():
+            if self.stats_window is not window:
+                return
+            self.update_perf_gauges()
+            tree.delete(*tree.get_children())
+            for row in self.perf.summary_rows():
+                tree.insert("", tk.END, values=row)
+            trace = f" - tracing to {self.perf.trace_path}" if self.perf.trace_path else ""
+            gauges_label.config(text=self.perf.describe_gauges() + trace)
+            window.after(1000, refresh)
+        
+        refresh()
+    
+    def close_stats_window(self):
+        """Close the stats panel; timing stays on only when started from the environment"""
+        if self.stats_window:
+            self.stats_window.destroy()
+            self.stats_window = None
+        self.perf.enabled = self.perf_always_on
+    
+    def show_memory_report(self):
+        """Show the bytes held by each part of the loaded dataset, offering to start tracing when off"""
+        rows = self.data.memory.report_rows()
+        if rows:
+            messagebox.showinfo("Memory", "\n".join(f"{part}: {size} MB" for part, size in rows))
+        elif messagebox.askyesno("Memory", "Memory is only measured while allocations are traced, which slows "
+                                           "loading down. Start tracing now? Reload the file to measure it."):
+            start_tracing()
     
     def open_file_dialog(self):
-        """Open file dialog to select a CSV file"""
+        """Open file dialog to select a CSV file, compressed CSV or zip archive"""
         file_path = filedialog.askopenfilename(
             title="Select CSV File",
-            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")]
+            filetypes=SCAN_FILETYPES
         )
         if file_path:
             self.load_data_from_file(file_path)
             self.clear_search()
     
+    def open_history_dialog(self):
+        """Pick a snapshot store and a time, then show the grid as it was at that time"""
+        store_dir = filedialog.askdirectory(title="Select Snapshot Store Folder")
+        if not store_dir:
+            return
+        
+        try:
+            first_time, last_time = SnapshotStore(store_dir).time_range()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open history: {str(e)}")
+            return
+        if last_time is None:
+            messagebox.showinfo("History", "The snapshot store is empty.")
+            return
+        
+        as_of = simpledialog.askstring(
+            "Grid As Of",
+            f"Show the grid as of (history covers {first_time} to {last_time}):",
+            initialvalue=str(last_time),
+            parent=self.root
+        )
+        if as_of:
+            self.load_snapshot_as_of(store_dir, as_of.strip())
+            self.clear_search()
+    
+    def open_compare_dialog(self):
+        """Pick an older scan and overlay what changed between it and the loaded data"""
+        if not self.data.csv_data:
+            messagebox.showinfo("Compare", "Load the newer scan first, then compare it with an older one.")
+            return
+        
+        file_path = filedialog.askopenfilename(
+            title="Select Older Scan To Compare With",
+            filetypes=SCAN_FILETYPES
+        )
+        if file_path:
+            self.show_diff(file_path)
+    
+    def show_diff(self, old_file):
+        """Diff an older scan against the loaded data and color the changed cells"""
+        try:
+            with self.perf.span("diff"):
+                diff = SnapshotDiff(load_scan_pairs(old_file), self.data.csv_data)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to compare files: {str(e)}")
+            return
+        
+        self.clear_search(keep_fields=True)
+        self.diff = diff
+        self.cell_overlay = {cell: CATEGORY_COLORS[category]
+                             for cell, category in diff.cell_categories().items()}
+        self.current_filter = "diff"
+        self.update_cell_colors(self.cell_overlay)
+        
+        counts = diff.summary()
+        legend = ", ".join(f"{CATEGORY_LABELS[category]} ({CATEGORY_COLORS[category]}): {counts[category]}"
+                           for category in CATEGORIES)
+        self.status_bar.config(text=f"Compared with {old_file} - {legend}")
+    
+    def export_diff(self):
+        """Export the last comparison to a CSV, Parquet or Arrow file"""
+        if not self.diff:
+            messagebox.showinfo("Export", "Compare with an older scan first.")
+            return
+        
+        diff_data = self.diff.export_rows()
+        if not diff_data:
+            messagebox.showinfo("Export", "No changes found to export.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=EXPORT_FILETYPES,
+            title="Save Diff Export As"
+        )
+        
+        if not file_path:
+            return  # User cancelled
+        
+        try:
+            write_table(file_path, EXPORT_HEADERS, diff_data)
+            self.status_bar.config(text=f"Exported {len(diff_data)} changes to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
+    
     def create_ui(self):
         """Create the main UI components"""
         # Create top-level control panel
@@ -178,9 +493,27 @@ class WarehouseGridVisualizer:
         open_file_btn = tk.Button(file_frame, text="Open CSV File", command=self.open_file_dialog)
         open_file_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        open_history_btn = tk.Button(file_frame, text="Open History...", command=self.open_history_dialog)
+        open_history_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        compare_btn = tk.Button(file_frame, text="Compare With...", command=self.open_compare_dialog)
+        compare_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        export_diff_btn = tk.Button(file_frame, text="Export Diff", command=self.export_diff)
+        export_diff_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         self.current_file_label = tk.Label(file_frame, text="No file loaded")
         self.current_file_label.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # Datasets loaded this session; picking one switches without reloading
+        dataset_label = tk.Label(file_frame, text="Loaded:")
+        dataset_label.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.dataset_var = StringVar()
+        self.dataset_combo = ttk.Combobox(file_frame, textvariable=self.dataset_var, state="readonly", width=30)
+        self.dataset_combo.pack(side=tk.LEFT, padx=5, pady=5)
+        self.dataset_combo.bind("<<ComboboxSelected>>", self.on_dataset_selected)
+        
         # Zoom section
         zoom_frame = tk.LabelFrame(top_row, text="Zoom")
         zoom_frame.pack(side=tk.RIGHT, padx=5)
@@ -195,6 +528,14 @@ class WarehouseGridVisualizer:
         fit_btn = tk.Button(zoom_frame, text="Fit to Window", command=self.fit_to_window)
         fit_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # Timing of the last operations, canvas items, rows and cells
+        stats_btn = tk.Button(top_row, text="Stats...", command=self.open_stats_window)
+        stats_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+        
+        # Bytes held by the loaded dataset, its indexes and the canvas
+        memory_btn = tk.Button(top_row, text="Memory...", command=self.show_memory_report)
+        memory_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+        
         # Create bottom row for Search and Filter
         bottom_row = tk.Frame(control_panel)
         bottom_row.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
@@ -221,6 +562,20 @@ class WarehouseGridVisualizer:
         loc_entry = tk.Entry(loc_frame, textvariable=self.loc_search_var, width=20)
         loc_entry.pack(side=tk.LEFT, padx=5)
         
+        # Query mode for both fields: substring, wildcard (YTVTL9?X*) or regex (^R[12]E)
+        self.search_mode_var = StringVar(value=SUBSTRING)
+        ttk.Combobox(search_frame, textvariable=self.search_mode_var, values=SEARCH_MODES,
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=5)
+        
+        # Fuzzy SKU matching within a number of single-character edits
+        fuzzy_frame = tk.Frame(search_frame)
+        fuzzy_frame.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(fuzzy_frame, text="Fuzzy SKU", variable=self.fuzzy_var).pack(side=tk.LEFT)
+        self.fuzzy_distance_var = tk.IntVar(value=1)
+        tk.Spinbox(fuzzy_frame, from_=1, to=3, width=2, textvariable=self.fuzzy_distance_var).pack(side=tk.LEFT)
+        
         # Search button
         search_btn = tk.Button(search_frame, text="Search", command=self.search_grid)
         search_btn.pack(side=tk.LEFT, padx=5)
@@ -229,10 +584,26 @@ class WarehouseGridVisualizer:
         clear_btn = tk.Button(search_frame, text="Clear", command=self.clear_search)
         clear_btn.pack(side=tk.LEFT, padx=5)
         
+        # Every size of a style
+        style_btn = tk.Button(search_frame, text="Style...", command=self.open_style_dialog)
+        style_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Batch lookup of a whole pick list
+        pick_list_btn = tk.Button(search_frame, text="Pick List...", command=self.open_pick_list_dialog)
+        pick_list_btn.pack(side=tk.LEFT, padx=5)
+        
         # Filter section
         filter_frame = tk.LabelFrame(bottom_row, text="Filter")
         filter_frame.pack(side=tk.RIGHT, fill=tk.X, padx=5)
         
+        # How the next filter combines with the current highlight, and NOT
+        tk.Label(filter_frame, text="Combine:").pack(side=tk.LEFT, padx=(5, 0))
+        self.combine_var = StringVar(value=REPLACE)
+        ttk.Combobox(filter_frame, textvariable=self.combine_var, values=COMBINE_OPS,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=5, pady=5)
+        invert_btn = tk.Button(filter_frame, text="Invert", command=self.invert_highlight)
+        invert_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Duplicate SKUs button
         duplicate_btn = tk.Button(filter_frame, text="Duplicate SKUs", command=self.show_duplicate_skus)
         duplicate_btn.pack(side=tk.LEFT, padx=5, pady=5)
@@ -242,6 +613,21 @@ class WarehouseGridVisualizer:
                                        command=self.export_duplicate_skus)
         export_duplicate_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # Styles spread over several cells
+        style_duplicate_btn = tk.Button(filter_frame, text="Style Duplicates", command=self.show_style_duplicates)
+        style_duplicate_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        export_style_btn = tk.Button(filter_frame, text="Export Style Dups",
+                                     command=self.export_style_duplicates)
+        export_style_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Moves that gather each duplicate SKU into the fewest bins
+        consolidation_btn = tk.Button(filter_frame, text="Consolidation", command=self.show_consolidation_moves)
+        consolidation_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        export_moves_btn = tk.Button(filter_frame, text="Export Moves", command=self.export_consolidation_moves)
+        export_moves_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Empty Bins button
         empty_bins_btn = tk.Button(filter_frame, text="Empty Bins", command=self.show_empty_bins)
         empty_bins_btn.pack(side=tk.LEFT, padx=5, pady=5)
@@ -251,10 +637,30 @@ class WarehouseGridVisualizer:
                                    command=self.export_empty_bins)
         export_empty_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # Empty bins nearest a location or the last clicked cell
+        nearest_empty_btn = tk.Button(filter_frame, text="Nearest Empty...", command=self.open_nearest_empty_dialog)
+        nearest_empty_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Clear filter button
         clear_filter_btn = tk.Button(filter_frame, text="Clear Filter", command=self.clear_filter)
         clear_filter_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # Replay row: scrub through the loaded scans minute by minute
+        replay_frame = tk.LabelFrame(control_panel, text="Replay")
+        replay_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        
+        self.replay_scale = tk.Scale(replay_frame, from_=0, to=0, orient=tk.HORIZONTAL,
+                                     showvalue=False, command=self.on_replay_slider,
+                                     state=tk.DISABLED)
+        self.replay_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+        
+        self.replay_label = tk.Label(replay_frame, text="No timestamps loaded", width=20, anchor=tk.W)
+        self.replay_label.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Scanner events pushed over a local socket instead of the replay
+        self.live_btn = tk.Button(replay_frame, text="Live Scans...", command=self.toggle_live_scans)
+        self.live_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Status bar
         self.status_bar = tk.Label(self.root, text="Ready", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -285,8 +691,8 @@ class WarehouseGridVisualizer:
         # Calculate canvas dimensions
         self.update_canvas_dimensions()
         
-        # Draw the grid
-        self.draw_grid()
+        # Draw the grid once the window is on screen, at its fitted size
+        self.canvas.bind("<Map>", self.on_first_map)
         
         # Bind events
         self.canvas.bind("<Button-1>", self.on_canvas_click)
@@ -306,62 +712,63 @@ class WarehouseGridVisualizer:
     
     def draw_grid(self):
         """Draw the warehouse grid on the canvas with 90-degree counter-clockwise rotation"""
-        # Clear canvas
-        self.canvas.delete("all")
-        
-        # Store cell IDs and coordinates for later use
+        # Store cell IDs and coordinates for later use; the old table is
+        # dropped before the memory track starts
         self.cell_objects = {}
         
-        # In the rotated view:
-        # - What were columns now appear on the right side (vertical)
-        # - What were rows now appear on the top (horizontal) in reverse order (90 to 01)
-        
-        # Draw row headers (now across the top) in reverse order
-        for row_idx, row_name in enumerate(reversed(self.rows)):
-            x = self.header_width + row_idx * (self.cell_size + self.cell_padding)
-            self.canvas.create_rectangle(x, 0, x + self.cell_size, self.header_height, 
-                                       fill="lightgray", outline="black")
-            self.canvas.create_text(x + self.cell_size/2, self.header_height/2, 
-                                  text=row_name, font=("Arial", max(8, int(self.cell_size/4))))
-        
-        # Draw column headers (now down the left side)
-        for col_idx, col_name in enumerate(self.columns):
-            y = self.header_height + col_idx * (self.cell_size + self.cell_padding)
-            self.canvas.create_rectangle(0, y, self.header_width, y + self.cell_size, 
-                                       fill="lightgray", outline="black")
-            self.canvas.create_text(self.header_width/2, y + self.cell_size/2, 
-                                  text=col_name, font=("Arial", max(8, int(self.cell_size/4))))
-        
-        # Draw grid cells
-        for col_idx, col_name in enumerate(self.columns):
-            y = self.header_height + col_idx * (self.cell_size + self.cell_padding)
+        with self.perf.span("draw_grid"), self.data.memory.track("canvas cells"):
+            # Clear canvas
+            self.canvas.delete("all")
             
-            # Use reversed rows for the grid
+            # In the rotated view:
+            # - What were columns now appear on the right side (vertical)
+            # - What were rows now appear on the top (horizontal) in reverse order (90 to 01)
+            
+            # Draw row headers (now across the top) in reverse order
             for row_idx, row_name in enumerate(reversed(self.rows)):
                 x = self.header_width + row_idx * (self.cell_size + self.cell_padding)
+                self.canvas.create_rectangle(x, 0, x + self.cell_size, self.header_height, 
+                                           fill="lightgray", outline="black")
+                self.canvas.create_text(x + self.cell_size/2, self.header_height/2, 
+                                      text=row_name, font=("Arial", max(8, int(self.cell_size/4))))
+            
+            # Draw column headers (now down the left side)
+            for col_idx, col_name in enumerate(self.columns):
+                y = self.header_height + col_idx * (self.cell_size + self.cell_padding)
+                self.canvas.create_rectangle(0, y, self.header_width, y + self.cell_size, 
+                                           fill="lightgray", outline="black")
+                self.canvas.create_text(self.header_width/2, y + self.cell_size/2, 
+                                      text=col_name, font=("Arial", max(8, int(self.cell_size/4))))
+            
+            # Draw grid cells
+            for col_idx, col_name in enumerate(self.columns):
+                y = self.header_height + col_idx * (self.cell_size + self.cell_padding)
                 
-                # Determine if cell has items
-                has_items = col_name in self.grid_data and row_name in self.grid_data[col_name]
-                
-                # Determine color
-                if (col_name, row_name) in self.highlighted_cells:
-                    color = "orange"
-                else:
-                    color = "green" if has_items else "white"
-                
-                # Create cell rectangle
-                cell_id = self.canvas.create_rectangle(x, y, x + self.cell_size, y + self.cell_size, 
-                                                   fill=color, outline="black", tags=("cell",))
-                
-                # Store cell object reference and coordinates
-                self.cell_objects[(col_name, row_name)] = {
-                    'id': cell_id,
-                    'x1': x,
-                    'y1': y,
-                    'x2': x + self.cell_size,
-                    'y2': y + self.cell_size
-                }
-    
+                # Use reversed rows for the grid
+                for row_idx, row_name in enumerate(reversed(self.rows)):
+                    x = self.header_width + row_idx * (self.cell_size + self.cell_padding)
+                    
+                    # Highlights and diff overlay take precedence over occupancy
+                    color = self.cell_color(col_name, row_name)
+                    
+                    # Create cell rectangle
+                    cell_id = self.canvas.create_rectangle(x, y, x + self.cell_size, y + self.cell_size, 
+                                                       fill=color, outline="black", tags=("cell",))
+                    
+                    # Store cell object reference and coordinates
+                    self.cell_objects[(col_name, row_name)] = {
+                        'id': cell_id,
+                        'x1': x,
+                        'y1': y,
+                        'x2': x + self.cell_size,
+                        'y2': y + self.cell_size
+                    }
+            
+            self.draw_route()
+        
+        if self.perf.enabled:
+            self.update_perf_gauges()
+
     def on_canvas_click(self, event):
         """Handle canvas click event"""
         # Get canvas coordinates
@@ -377,6 +784,28 @@ class WarehouseGridVisualizer:
                 self.last_clicked = (col_name, row_name)
                 break
     
+    def on_first_map(self, event):
+        """Note the time to the first paint and draw the grid when the event loop is idle"""
+        self.canvas.unbind("<Map>")
+        self.perf.record("startup:window", time.perf_counter() - STARTED)
+        self.root.after_idle(self.populate_grid)
+    
+    def populate_grid(self):
+        """Draw the grid at the window's size, then load the file given on startup"""
+        self.grid_ready = True
+        self.fit_to_window()
+        if not self.cell_objects:
+            self.draw_grid()
+        self.perf.record("startup:grid", time.perf_counter() - STARTED)
+        
+        if self.perf.enabled:
+            print(f"Startup: window shown after {self.perf.samples['startup:window'][-1] * 1000:.0f} ms, "
+                  f"grid drawn after {self.perf.samples['startup:grid'][-1] * 1000:.0f} ms")
+        
+        if self.pending_file:
+            csv_file, self.pending_file = self.pending_file, None
+            self.load_data_from_file(csv_file)
+    
     def on_canvas_configure(self, event):
         """Handle canvas resize event"""
         # Update when window is resized
@@ -422,15 +851,15 @@ class WarehouseGridVisualizer:
         has_search = bool(sku_query or loc_query)
         
         # Add data to treeview
-        if column in self.grid_data and row in self.grid_data[column]:
+        if self.data.cell_items(column, row):
             # Find full details for each SKU at this location
-            for idx, (sku, bin_location) in enumerate(self.grid_data[column][row]):
+            for idx, (sku, bin_location) in enumerate(self.data.cell_items(column, row)):
                 item_id = tree.insert("", tk.END, values=(sku, bin_location))
                 
                 # Check if this item should be highlighted based on current filter
-                if self.current_filter == "duplicates" and sku in self.duplicate_skus:
+                if self.current_filter == "duplicates" and sku in self.data.duplicate_skus:
                     items_to_highlight.append(item_id)
-                elif self.current_filter == "empty" and (sku.upper() == "EMPTY" or not sku.strip()):
+                elif self.current_filter == "empty" and is_empty_sku(sku):
                     items_to_highlight.append(item_id)
                 # Highlight search matches
                 elif has_search:
@@ -479,6 +908,13 @@ class WarehouseGridVisualizer:
         copy_button = tk.Button(button_frame, text="Copy Selected", command=copy_selected_item)
         copy_button.pack(side=tk.LEFT, padx=5)
         
+        def show_nearest_empty():
+            details_window.destroy()
+            self.show_nearest_empty((column, row))
+        
+        nearest_button = tk.Button(button_frame, text="Nearest Empty Bins", command=show_nearest_empty)
+        nearest_button.pack(side=tk.LEFT, padx=5)
+        
         help_text = tk.Label(button_frame, text="Right-click or press Ctrl+C to copy items", fg="gray")
         help_text.pack(side=tk.RIGHT, padx=5)
         
@@ -556,56 +992,44 @@ class WarehouseGridVisualizer:
     
     def search_grid(self):
         """Search the grid and highlight matching locations"""
-        # Clear previous highlights
-        self.clear_search(keep_fields=True)
-        
         sku_query = self.sku_search_var.get().strip().upper()
         loc_query = self.loc_search_var.get().strip().upper()
         
-        # If no search terms provided, return
+        # If no search terms provided, clear previous highlights and return
         if not sku_query and not loc_query:
+            self.clear_search(keep_fields=True)
             return
         
         print(f"Searching for SKU='{sku_query}', Location='{loc_query}'")
         
-        # Find matching locations
-        matching_locations = set()
+        # Fuzzy mode finds the nearest SKUs instead of substring matches
+        fuzzy_distance = self.fuzzy_distance_var.get() if self.fuzzy_var.get() else None
         
-        for sku, location in self.csv_data:
-            # Skip if location is too short
-            if len(location) < 5:
-                continue
-                
-            # Extract grid location using the same logic as load_csv_data
-            if location.startswith('R'):
-                level = location[1:2]          # e.g., 1 from R1S32-N-AT1
-                column_letter = location[2:3]  # e.g., S from R1S32-N-AT1
-                row = location[3:5]            # e.g., 32 from R1S32-N-AT1
-                column = level + column_letter  # e.g., 1S
-                
-                # Check if SKU or location matches search criteria
-                sku_match = sku_query and sku_query in sku.upper()
-                loc_match = loc_query and loc_query in location.upper()
-                
-                if sku_match or loc_match:
-                    matching_locations.add((column, row))
-                    print(f"Match found: SKU={sku}, Location={location}, Grid={column}{row}")
+        # Prefix and component location queries go through the location index,
+        # and wildcard/regex queries use the fields as typed
+        try:
+            matching_locations, fuzzy_matches = self.data.search(
+                self.sku_search_var.get(), self.loc_search_var.get(),
+                self.search_mode_var.get(), fuzzy_distance)
+        except re.error as e:
+            messagebox.showerror("Search Error", f"Invalid regular expression: {str(e)}")
+            return
+        except ValueError as e:
+            messagebox.showerror("Search Error", str(e))
+            return
         
         # Highlight matching locations
-        self.highlighted_cells = matching_locations
-        
-        # Update cell colors for matches
-        match_count = 0
-        for (col_name, row_name), cell in self.cell_objects.items():
-            if (col_name, row_name) in matching_locations:
-                self.canvas.itemconfig(cell['id'], fill="orange")
-                match_count += 1
+        match_count = len(matching_locations)
+        if fuzzy_matches:
+            message = (f"Found {match_count} matching locations. "
+                       f"Nearest SKUs: {describe_matches(fuzzy_matches)}")
+        else:
+            message = f"Found {match_count} matching locations"
+        self.highlight(matching_locations, "search", message)
         
         # If no matches found, show message
         if match_count == 0:
             tk.messagebox.showinfo("Search Results", "No matching locations found.")
-        else:
-            self.status_bar.config(text=f"Found {match_count} matching locations")
     
     def clear_search(self, keep_fields=False):
         """Clear search results and reset grid colors"""
@@ -614,19 +1038,18 @@ class WarehouseGridVisualizer:
             self.sku_search_var.set("")
             self.loc_search_var.set("")
         
-        # Reset cell colors for all cells
-        for (col_name, row_name), cell in self.cell_objects.items():
-            has_items = col_name in self.grid_data and row_name in self.grid_data[col_name]
-            color = "green" if has_items else "white"
-            self.canvas.itemconfig(cell['id'], fill=color)
-        
-        # Clear highlighted cells and filter
-        self.highlighted_cells = set()
+        # Clear highlighted cells, diff overlay, filter and route
+        self.highlight_mask = 0
+        self.cell_overlay = {}
         self.current_filter = None
+        self.pick_route = None
+        self.canvas.delete("route")
+        
+        # Reset cell colors for all cells
+        self.update_cell_colors(self.cell_objects)
         
         # Update status
-        occupied_count = sum(1 for c in self.columns for r in self.rows 
-                           if c in self.grid_data and r in self.grid_data[c])
+        occupied_count = self.data.occupied_count(self.columns, self.rows)
         total_cells = len(self.columns) * len(self.rows)
         
         if keep_fields:
@@ -634,6 +1057,161 @@ class WarehouseGridVisualizer:
         else:
             self.status_bar.config(text=f"Grid: {len(self.columns)}x{len(self.rows)} = {total_cells} cells, Occupied: {occupied_count}")
     
+    def highlight(self, cells, filter_name, message):
+        """Combine a filter result with the current highlight and repaint the cells that changed
+        
+        With the Replace operator the result simply becomes the highlight;
+        AND, OR and AND NOT combine it with what is highlighted already.
+        """
+        op = self.combine_var.get()
+        new_mask = combine(self.highlight_mask, self.cell_space.mask(cells), op)
+        changed = self.highlight_mask ^ new_mask
+        self.highlight_mask = new_mask
+        self.current_filter = filter_name if op == REPLACE else "combined"
+        self.update_cell_colors(self.cell_space.cells(changed))
+        
+        if op != REPLACE:
+            message += f" ({op} previous: {bin(new_mask).count('1')} locations highlighted)"
+        self.status_bar.config(text=message)
+    
+    def invert_highlight(self):
+        """Highlight every cell that is not highlighted now (NOT)"""
+        new_mask = self.cell_space.invert(self.highlight_mask)
+        changed = self.highlight_mask ^ new_mask
+        self.highlight_mask = new_mask
+        self.current_filter = "combined"
+        self.update_cell_colors(self.cell_space.cells(changed))
+        self.status_bar.config(text=f"Inverted: {bin(new_mask).count('1')} locations highlighted")
+    
+    def open_pick_list_dialog(self):
+        """Open a window for pasting or loading a pick list and looking up every SKU at once"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Pick List Lookup")
+        dialog.geometry("500x500")
+        dialog.transient(self.root)
+        
+        tk.Label(dialog, text="Paste SKUs (one per line, or separated by commas):").pack(anchor=tk.W, padx=10, pady=(10, 0))
+        
+        text_frame = tk.Frame(dialog)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        text_scrollbar = tk.Scrollbar(text_frame, orient=tk.VERTICAL)
+        text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        sku_text = tk.Text(text_frame, height=12, yscrollcommand=text_scrollbar.set)
+        sku_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        text_scrollbar.config(command=sku_text.yview)
+        
+        tk.Label(dialog, text="Not found:").pack(anchor=tk.W, padx=10)
+        not_found_frame = tk.Frame(dialog)
+        not_found_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        not_found_scrollbar = tk.Scrollbar(not_found_frame, orient=tk.VERTICAL)
+        not_found_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        not_found_list = tk.Listbox(not_found_frame, height=6, yscrollcommand=not_found_scrollbar.set)
+        not_found_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        not_found_scrollbar.config(command=not_found_list.yview)
+        
+        result_label = tk.Label(dialog, text="", anchor=tk.W)
+        result_label.pack(fill=tk.X, padx=10)
+        
+        def load_file():
+            file_path = filedialog.askopenfilename(
+                title="Select Pick List",
+                filetypes=[("Pick Lists", "*.txt *.csv *.csv.gz"), ("All Files", "*.*")],
+                parent=dialog
+            )
+            if not file_path:
+                return
+            try:
+                skus = read_sku_list(file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read pick list: {str(e)}", parent=dialog)
+                return
+            sku_text.delete("1.0", tk.END)
+            sku_text.insert("1.0", "\n".join(skus))
+        
+        def look_up():
+            result = self.look_up_pick_list(parse_sku_list(sku_text.get("1.0", tk.END)))
+            not_found_list.delete(0, tk.END)
+            for sku in result.not_found:
+                not_found_list.insert(tk.END, sku)
+            result_label.config(text=result.summary())
+        
+        def plan_route():
+            route = self.plan_pick_route()
+            if route:
+                result_label.config(text=route.summary())
+        
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Load File...", command=load_file).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Look Up", command=look_up).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Export Results", command=self.export_pick_list).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Plan Route", command=plan_route).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def look_up_pick_list(self, skus):
+        """Resolve a pick list through the SKU index and highlight every cell that holds one"""
+        with self.perf.span("pick_list"):
+            result = self.data.sku_index().lookup(skus)
+        self.pick_list_result = result
+        self.highlight(result.cells, "pick_list", result.summary())
+        return result
+    
+    def plan_pick_route(self):
+        """Plan a walking order through the cells of the last pick list and draw it"""
+        if not self.pick_list_result or not self.pick_list_result.cells:
+            messagebox.showinfo("Pick Route", "Look up a pick list first.")
+            return None
+        
+        with self.perf.span("pick_route"):
+            self.pick_route = PickRoute(self.get_route_layout(), self.pick_list_result.cells)
+        self.draw_route()
+        self.status_bar.config(text=self.pick_route.summary())
+        return self.pick_route
+    
+    def route_coords(self, point):
+        """Return the canvas center of a route point; cross aisles sit just off the grid"""
+        level, aisle, row = point
+        step = self.cell_size + self.cell_padding
+        col_idx = self.columns.index(f"{level}{chr(ord('A') + aisle)}")
+        row = min(max(row, 0.5), len(self.rows) + 0.5)
+        return (self.header_width + (len(self.rows) - row) * step + self.cell_size / 2,
+                self.header_height + col_idx * step + self.cell_size / 2)
+    
+    def draw_route(self):
+        """Draw the planned pick route over the grid with the stop numbers"""
+        self.canvas.delete("route")
+        if not self.pick_route:
+            return
+        
+        coords = [value for point in self.pick_route.path() for value in self.route_coords(point)]
+        self.canvas.create_line(*coords, fill="blue", width=2, tags=("route",))
+        for stop, point in enumerate(self.pick_route.points[1:], 1):
+            x, y = self.route_coords(point)
+            self.canvas.create_text(x, y, text=str(stop), fill="blue",
+                                    font=("Arial", max(7, int(self.cell_size / 3)), "bold"), tags=("route",))
+    
+    def export_pick_list(self):
+        """Export the last pick list lookup to a CSV, Parquet or Arrow file"""
+        if not self.pick_list_result:
+            messagebox.showinfo("Export", "Look up a pick list first.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=EXPORT_FILETYPES,
+            title="Save Pick List Results As"
+        )
+        
+        if not file_path:
+            return  # User cancelled
+        
+        try:
+            rows = self.pick_list_result.export_rows()
+            write_table(file_path, PICK_LIST_HEADERS, rows)
+            self.status_bar.config(text=f"Exported {len(rows)} pick list SKUs to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
+    
     def zoom_in(self):
         """Increase the cell size"""
         self.cell_size += 5
@@ -641,13 +1219,7 @@ class WarehouseGridVisualizer:
         self.header_width = max(40, self.cell_size + 15)
         self.update_canvas_dimensions()
         self.draw_grid()
-        
-        # Reapply highlighting if needed
-        if self.highlighted_cells:
-            for (col_name, row_name), cell in self.cell_objects.items():
-                if (col_name, row_name) in self.highlighted_cells:
-                    self.canvas.itemconfig(cell['id'], fill="orange")
-    
+            
     def zoom_out(self):
         """Decrease the cell size"""
         if self.cell_size > 10:
@@ -656,21 +1228,15 @@ class WarehouseGridVisualizer:
             self.header_width = max(40, self.cell_size + 15)
             self.update_canvas_dimensions()
             self.draw_grid()
-            
-            # Reapply highlighting if needed
-            if self.highlighted_cells:
-                for (col_name, row_name), cell in self.cell_objects.items():
-                    if (col_name, row_name) in self.highlighted_cells:
-                        self.canvas.itemconfig(cell['id'], fill="orange")
-    
+                
     def fit_to_window(self):
         """Resize the grid to fit the window"""
         # Get canvas dimensions
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         
-        # Ensure we have valid dimensions
-        if canvas_width < 50 or canvas_height < 50:
+        # Ensure we have valid dimensions, and wait for the first draw
+        if canvas_width < 50 or canvas_height < 50 or not self.grid_ready:
             return
         
         # Calculate optimal cell size
@@ -687,13 +1253,7 @@ class WarehouseGridVisualizer:
         # Update canvas and redraw
         self.update_canvas_dimensions()
         self.draw_grid()
-        
-        # Reapply highlighting if needed
-        if self.highlighted_cells:
-            for (col_name, row_name), cell in self.cell_objects.items():
-                if (col_name, row_name) in self.highlighted_cells:
-                    self.canvas.itemconfig(cell['id'], fill="orange")
-        
+                
         # Keep last clicked cell in view if possible
         if self.last_clicked and self.last_clicked in self.cell_objects:
             self.scroll_to_cell(self.last_clicked)
@@ -715,113 +1275,143 @@ class WarehouseGridVisualizer:
         else:
             self.zoom_out()
     
-    def find_duplicate_skus(self):
-        """Find all SKUs that appear in multiple locations (excluding EMPTY and blank SKUs)"""
-        sku_locations = defaultdict(list)
-        duplicate_skus = set()
-        duplicate_locations = set()
-        
-        # First pass: collect all bin locations for each SKU
-        for sku, location in self.csv_data:
-            # Skip empty, EMPTY, or SKUs that aren't exactly 9 characters
-            if not sku.strip() or sku.upper() == "EMPTY" or len(sku) != 9:
-                continue
-                
-            if len(location) >= 5 and location.startswith('R'):
-                try:
-                    level = location[1:2]
-                    column_letter = location[2:3]
-                    row_num = location[3:5]
-                    
-                    column = level + column_letter
-                    sku_locations[sku].append((column, row_num))
-                except:
-                    # Skip invalid formats
-                    pass
-        
-        # Now find the SKUs that appear in multiple locations
-        for sku, locations in sku_locations.items():
-            if len(locations) > 1:
-                duplicate_skus.add(sku)
-                duplicate_locations.update(locations)
-                
-        return duplicate_locations
-    
     def show_duplicate_skus(self):
         """Highlight grid cells with duplicate SKUs"""
-        # Clear previous highlights
-        self.clear_search(keep_fields=True)
-        
         # Find all locations with duplicate SKUs
-        duplicate_locations = self.find_duplicate_skus()
-        
-        # Highlight the cells
-        highlighted_count = 0
-        for (col_name, row_name), cell in self.cell_objects.items():
-            if (col_name, row_name) in duplicate_locations:
-                self.canvas.itemconfig(cell['id'], fill="orange")
-                highlighted_count += 1
-        
-        # Update highlighted cells and current filter
-        self.highlighted_cells = duplicate_locations
-        self.current_filter = "duplicates"
+        duplicate_locations = self.data.duplicate_cells()
         
-        # Update status bar
+        # Highlight the cells and update the status bar
         if duplicate_locations:
-            self.status_bar.config(text=f"Found {len(duplicate_locations)} locations with duplicate SKUs")
+            message = f"Found {len(duplicate_locations)} locations with duplicate SKUs"
         else:
-            self.status_bar.config(text="No duplicate SKUs found")
+            message = "No duplicate SKUs found"
+        self.highlight(duplicate_locations, "duplicates", message)
+    
+    def open_style_dialog(self):
+        """Ask for a style (or any SKU of it) and highlight every bin holding one of its sizes"""
+        style = simpledialog.askstring("Style Lookup", "Style or SKU (e.g. YTVTL90):", parent=self.root)
+        if style:
+            self.show_style(style)
+    
+    def show_style(self, style):
+        """Highlight every cell holding any size of a style"""
+        style_index = self.data.style_index()
+        sizes = style_index.sizes(style)
+        cells = style_index.cells(style)
+        self.highlight(cells, "style", f"Style {style_index.normalize(style)}: sizes "
+                                       f"{', '.join(sorted(sizes))} in {len(cells)} locations")
+        
+        if not sizes:
+            messagebox.showinfo("Style Lookup", f"Style {style_index.normalize(style)} not found.")
     
-    def find_empty_bins(self):
-        """Find all locations with empty bins in the CSV data"""
-        empty_bins = set()
+    def show_style_duplicates(self):
+        """Highlight grid cells holding a style whose sizes are spread over several cells"""
+        duplicate_styles = self.data.style_index().duplicate_styles()
+        cells = set().union(*duplicate_styles.values())
         
-        for sku, location in self.csv_data:
-            # Skip invalid locations
-            if len(location) < 5 or not location.startswith('R'):
-                continue
-                
-            # Check if this is an empty SKU (either 'EMPTY' or a blank string)
-            if sku.upper() == "EMPTY" or not sku.strip():
-                # Extract grid coordinates
-                try:
-                    level = location[1:2]
-                    column_letter = location[2:3]
-                    row_num = location[3:5]
-                    
-                    column = level + column_letter
-                    empty_bins.add((column, row_num))
-                except:
-                    # Skip invalid formats
-                    pass
-                    
-        return empty_bins
+        if duplicate_styles:
+            message = f"Found {len(duplicate_styles)} styles spread over {len(cells)} locations"
+        else:
+            message = "No styles spread over several locations"
+        self.highlight(cells, "style_duplicates", message)
+    
+    def export_style_duplicates(self):
+        """Export the style-level duplicate report to a CSV, Parquet or Arrow file"""
+        style_data = self.data.style_index().export_duplicate_rows()
         
-    def show_empty_bins(self):
-        """Highlight grid cells with empty bins"""
-        # Clear previous highlights
-        self.clear_search(keep_fields=True)
+        if not style_data:
+            messagebox.showinfo("Export", "No styles spread over several locations to export.")
+            return
         
-        # Get all empty bin locations
-        empty_locations = self.find_empty_bins()
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=EXPORT_FILETYPES,
+            title="Save Style Duplicates Export As"
+        )
         
-        # Highlight the cells with empty bins
-        highlighted_count = 0
-        for (col_name, row_name), cell in self.cell_objects.items():
-            # Check if this cell is in our empty locations
-            if (col_name, row_name) in empty_locations:
-                self.canvas.itemconfig(cell['id'], fill="orange")
-                highlighted_count += 1
+        if not file_path:
+            return  # User cancelled
         
-        # Update highlighted cells and current filter
-        self.highlighted_cells = empty_locations
-        self.current_filter = "empty"
+        try:
+            write_table(file_path, STYLE_DUPLICATE_HEADERS, style_data)
+            self.status_bar.config(text=f"Exported {len(style_data)} styles to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
+    
+    def get_route_layout(self):
+        """Return the walking distance tables, built the first time a route or plan needs them"""
+        if self.route_layout is None:
+            self.route_layout = AisleLayout(self.columns, self.rows)
+        return self.route_layout
+    
+    def get_consolidation_plan(self):
+        """Return the consolidation plan for the current data, planning it on first use"""
+        if not self.data.has_index('consolidation'):
+            self.status_bar.config(text="Planning consolidation moves...")
+            self.root.update_idletasks()
+        return self.data.consolidation_plan(self.get_route_layout())
+    
+    def show_consolidation_moves(self):
+        """Highlight every bin the consolidation plan moves units out of"""
+        plan = self.get_consolidation_plan()
+        self.highlight(plan.source_cells(), "consolidation", plan.summary())
+    
+    def export_consolidation_moves(self):
+        """Export the consolidation move list to a CSV, Parquet or Arrow file"""
+        move_data = self.get_consolidation_plan().export_rows()
         
-        # Update status bar
+        if not move_data:
+            messagebox.showinfo("Export", "No duplicate SKUs to consolidate.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=EXPORT_FILETYPES,
+            title="Save Consolidation Moves As"
+        )
+        
+        if not file_path:
+            return  # User cancelled
+        
+        try:
+            write_table(file_path, MOVE_HEADERS, move_data)
+            self.status_bar.config(text=f"Exported {len(move_data)} moves to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
+    
+    def open_nearest_empty_dialog(self):
+        """Ask for a location, defaulting to the last clicked cell, and show the nearest empty bins"""
+        query = simpledialog.askstring("Nearest Empty Bins", "Bin location or grid cell (e.g. R2E59-N-BD1 or 2E59):",
+                                       initialvalue="".join(self.last_clicked or ()), parent=self.root)
+        if query:
+            self.show_nearest_empty(query)
+    
+    def show_nearest_empty(self, query):
+        """Highlight the cells of the empty bins nearest a location on the same level"""
+        try:
+            nearest, cells = self.data.empty_bin_index.nearest_cells(query)
+        except ValueError as e:
+            messagebox.showerror("Nearest Empty Bins", str(e))
+            return
+        
+        name = "".join(query) if isinstance(query, tuple) else query.strip().upper()
+        if nearest:
+            message = f"Nearest empty bins to {name}: {describe_nearest(nearest)}"
+        else:
+            message = f"No empty bins on the level of {name}"
+        self.highlight(cells, "nearest_empty", message)
+    
+    def show_empty_bins(self):
+        """Highlight grid cells with empty bins"""
+        # Get all empty bin locations
+        empty_locations = self.data.empty_cells()
+        
+        # Highlight the cells with empty bins and update the status bar
         if empty_locations:
-            self.status_bar.config(text=f"Found {len(empty_locations)} locations with empty bins")
+            message = f"Found {len(empty_locations)} locations with empty bins"
         else:
-            self.status_bar.config(text="No empty bins found")
+            message = "No empty bins found"
+        self.highlight(empty_locations, "empty", message)
     
     def clear_filter(self):
         """Clear filter highlighting"""
@@ -829,9 +1419,9 @@ class WarehouseGridVisualizer:
         self.clear_search()
 
     def export_duplicate_skus(self):
-        """Export duplicate SKUs to a CSV file"""
+        """Export duplicate SKUs to a CSV, Parquet or Arrow file"""
         # Get all duplicate SKU data
-        duplicate_data = self.prepare_duplicate_skus_export()
+        duplicate_data = self.data.duplicate_skus_rows()
         
         if not duplicate_data:
             messagebox.showinfo("Export", "No duplicate SKUs found to export.")
@@ -840,7 +1430,7 @@ class WarehouseGridVisualizer:
         # Ask user where to save the file
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=EXPORT_FILETYPES,
             title="Save Duplicate SKUs Export As"
         )
         
@@ -848,13 +1438,8 @@ class WarehouseGridVisualizer:
             return  # User cancelled
             
         try:
-            # Write to CSV
-            with open(file_path, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(["SKU", "Bin Locations"])  # Header
-                
-                for sku, locations in duplicate_data:
-                    writer.writerow([sku, locations])
+            # Write as CSV, Parquet or Arrow depending on the chosen extension
+            write_table(file_path, DUPLICATE_HEADERS, duplicate_data)
                     
             self.status_bar.config(text=f"Exported {len(duplicate_data)} duplicate SKUs to {file_path}")
             
@@ -866,40 +1451,10 @@ class WarehouseGridVisualizer:
         except Exception as e:
             messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
     
-    def prepare_duplicate_skus_export(self):
-        """Prepare data for duplicate SKUs export"""
-        # Dictionary to store all locations for each SKU
-        sku_locations = defaultdict(list)
-        
-        # First pass: collect all bin locations for each SKU
-        for sku, location in self.csv_data:
-            # Skip empty, EMPTY, or SKUs that aren't exactly 9 characters
-            if not sku.strip() or sku.upper() == "EMPTY" or len(sku) != 9:
-                continue
-                
-            if len(location) >= 5 and location.startswith('R'):
-                sku_locations[sku].append(location)
-        
-        # Second pass: filter to only keep duplicates and format for export
-        export_data = []
-        
-        for sku, locations in sku_locations.items():
-            if len(locations) > 1:  # It's a duplicate
-                # Sort locations for consistency
-                locations.sort()
-                # Join all locations with commas
-                locations_text = ", ".join(locations)
-                export_data.append((sku, locations_text))
-        
-        # Sort by SKU for easier reading
-        export_data.sort(key=lambda x: x[0])
-        
-        return export_data
-    
     def export_empty_bins(self):
-        """Export empty bins to a CSV file"""
+        """Export empty bins to a CSV, Parquet or Arrow file"""
         # Get all empty bin data
-        empty_bins_data = self.prepare_empty_bins_export()
+        empty_bins_data = self.data.empty_bins_rows()
         
         if not empty_bins_data:
             messagebox.showinfo("Export", "No empty bins found to export.")
@@ -908,7 +1463,7 @@ class WarehouseGridVisualizer:
         # Ask user where to save the file
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=EXPORT_FILETYPES,
             title="Save Empty Bins Export As"
         )
         
@@ -916,13 +1471,8 @@ class WarehouseGridVisualizer:
             return  # User cancelled
             
         try:
-            # Write to CSV
-            with open(file_path, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(["Grid Location", "Bin Locations"])  # Header
-                
-                for grid_loc, bin_locations in empty_bins_data:
-                    writer.writerow([grid_loc, bin_locations])
+            # Write as CSV, Parquet or Arrow depending on the chosen extension
+            write_table(file_path, EMPTY_BINS_HEADERS, empty_bins_data)
                     
             self.status_bar.config(text=f"Exported {len(empty_bins_data)} empty bin locations to {file_path}")
             
@@ -933,45 +1483,6 @@ class WarehouseGridVisualizer:
                 
         except Exception as e:
             messagebox.showerror("Export Error", f"Error exporting data: {str(e)}")
-    
-    def prepare_empty_bins_export(self):
-        """Prepare data for empty bins export"""
-        # Dictionary to store bin locations for each grid location
-        grid_locations = defaultdict(list)
-        
-        # Find all empty bins
-        for sku, location in self.csv_data:
-            # Check if this is an empty bin
-            if sku.upper() == "EMPTY" or not sku.strip():
-                if len(location) >= 5 and location.startswith('R'):
-                    try:
-                        # Extract grid coordinates
-                        level = location[1:2]
-                        column_letter = location[2:3]
-                        row_num = location[3:5]
-                        
-                        grid_loc = f"{level}{column_letter}{row_num}"
-                        
-                        # Add this bin location to the appropriate grid location
-                        grid_locations[grid_loc].append(location)
-                    except:
-                        # Skip invalid formats
-                        continue
-        
-        # Format for export
-        export_data = []
-        
-        for grid_loc, bin_locations in grid_locations.items():
-            # Sort locations for consistency
-            bin_locations.sort()
-            # Join all locations with commas
-            locations_text = ", ".join(bin_locations)
-            export_data.append((grid_loc, locations_text))
-        
-        # Sort by grid location for easier reading
-        export_data.sort(key=lambda x: x[0])
-        
-        return export_data
 
 if __name__ == "__main__":
     root = tk.Tk()